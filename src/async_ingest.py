@@ -0,0 +1,314 @@
+"""
+Concurrent PokeAPI ingestion for normalize_all_and_write.
+
+Every row still goes through the same steps as enrich_with_pokeapi (pokemon,
+species, evolution chain, first 8 moves), but rows are processed concurrently
+on one httpx.AsyncClient:
+  - a token bucket caps the request rate and a semaphore caps in-flight requests
+  - concurrent requests for the same endpoint share one fetch (moves and
+    evolution chains are shared by many pokemon), and moves/chains stay memoized
+    for the rest of the run
+  - finished rows are appended to a progress log, an interrupted run resumes from it
+
+Runs are incremental: data/normalize_manifest.json keeps, per record, a hash of
+its CSV row, of every PokeAPI cache entry it was built from, and of the written
+file. Rows where none of those changed are skipped without touching the
+network, files are rewritten (atomically) only when their bytes change, and
+the result lists what was added/updated and why.
+
+Point base_url at a local mock (python -m src.mock_pokeapi) to run it offline.
+"""
+from typing import Dict, Any, List, Optional, Set
+from .pokeapi_client import BASE, endpoint_from_url
+from .utils import (CACHE_DIR, DATA_DIR, cache_entry_hash, cache_path_for, content_hash, ensure_dirs, file_hash, load_json_file,
+                    write_json_file, write_json_if_changed)
+from .move_db import build_move_db_from_cache, write_move_table, reload_move_db
+from .data_loader import (NORMALIZED_DIR, DATA_RAW, load_kaggle_dataframe, build_basic_from_row, normalize_name,
+                          move_names_from_api, build_move_entry, assemble_enriched, write_roster_snapshot)
+from .roster_snapshot import load_snapshot
+import asyncio
+import json
+import time
+import httpx
+
+PROGRESS_LOG = CACHE_DIR / "ingest_progress.log"
+MANIFEST_PATH = DATA_DIR / "normalize_manifest.json"
+
+# endpoint kinds shared between many pokemon - worth keeping in memory for the whole run
+MEMO_KINDS = ("move", "evolution-chain")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncPokeAPI:
+    def __init__(self, base_url: str = BASE, concurrency: int = 16, rate: float = 20.0, timeout: float = 10.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(timeout=timeout, transport=transport,
+                                         limits=httpx.Limits(max_connections=concurrency))
+        self._sem = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._memo: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.stats = {"cache_hits": 0, "fetched": 0, "failed": 0, "deduplicated": 0}
+        # endpoints PokeAPI answered 404 for - a definite "no data", unlike timeouts and 5xx
+        self.not_found: Set[str] = set()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def fetch(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        endpoint = endpoint.strip("/")
+        if endpoint in self._memo:
+            self.stats["deduplicated"] += 1
+            return self._memo[endpoint]
+        fut = self._inflight.get(endpoint)
+        if fut is not None:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[endpoint] = fut
+        try:
+            data = await self._fetch_and_cache(endpoint)
+            fut.set_result(data)
+        except BaseException as e:
+            fut.set_exception(e)
+            # mark it retrieved, or a failure nobody else awaited logs "Future exception was never retrieved"
+            fut.exception()
+            raise
+        finally:
+            del self._inflight[endpoint]
+        if endpoint.split("/", 1)[0] in MEMO_KINDS:
+            self._memo[endpoint] = data
+        return data
+
+    async def _fetch_and_cache(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        cache_p = cache_path_for(endpoint)
+        cached = load_json_file(cache_p)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        async with self._sem:
+            await self._bucket.acquire()
+            try:
+                r = await self._client.get(f"{self.base_url}/{endpoint}")
+            except httpx.HTTPError:
+                self.stats["failed"] += 1
+                return None
+        if r.status_code != 200:
+            self.stats["failed"] += 1
+            if r.status_code == 404:
+                self.not_found.add(endpoint)
+            return None
+        data = r.json()
+        await asyncio.to_thread(write_json_file, cache_p, data)
+        self.stats["fetched"] += 1
+        return data
+
+
+async def _none() -> None:
+    return None
+
+
+async def enrich_async(api: AsyncPokeAPI, name: str, basic: Dict[str, Any], deps: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Async twin of data_loader.enrich_with_pokeapi; appends every endpoint it reads to deps."""
+    def fetch(endpoint: str):
+        if deps is not None:
+            deps.append(endpoint.strip("/"))
+        return api.fetch(endpoint)
+
+    api_poke, species = await asyncio.gather(
+        fetch(f"pokemon/{name.lower()}"),
+        fetch(f"pokemon-species/{name.lower()}"),
+    )
+    chain_task = None
+    if species:
+        evo = species.get("evolution_chain")
+        if evo and evo.get("url"):
+            chain_task = fetch(endpoint_from_url(evo.get("url")))
+    move_names = move_names_from_api(api_poke)
+    move_tasks = [fetch(f"move/{m}") if m else _none() for m in move_names]
+    results = await asyncio.gather(chain_task or _none(), *move_tasks)
+    evolution_chain, move_datas = results[0], results[1:]
+    detailed_moves = [build_move_entry(m, d, basic) for m, d in zip(move_names, move_datas)]
+    return assemble_enriched(basic, detailed_moves, evolution_chain)
+
+
+# ---- change detection ----
+# manifest: key -> {"row": hash of the CSV basics, "inputs": {endpoint: hash of the cache entry as stored},
+#                   "output": hash of the file in data/normalized}
+# an input is NOT_FOUND when PokeAPI answered 404, None when the fetch failed otherwise (retried next run)
+NOT_FOUND = "404"
+
+def load_manifest() -> Dict[str, Dict[str, Any]]:
+    return load_json_file(MANIFEST_PATH) or {}
+
+
+def _read_progress() -> Dict[str, Optional[Dict[str, Any]]]:
+    # key -> manifest entry for rows finished by an interrupted run (None: written before entries were logged)
+    if not PROGRESS_LOG.exists():
+        return {}
+    done = {}
+    with open(PROGRESS_LOG, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+                done[item["key"]] = item["entry"]
+            except (ValueError, TypeError, KeyError):
+                done[line] = None
+    return done
+
+
+class InputHashes:
+    """Hash of each PokeAPI cache entry, read at most once per run (None = not cached)."""
+    def __init__(self):
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def get(self, endpoint: str) -> Optional[str]:
+        if endpoint not in self._memo:
+            self._memo[endpoint] = cache_entry_hash(cache_path_for(endpoint))
+        return self._memo[endpoint]
+
+    def forget(self, endpoints: List[str]):
+        for ep in endpoints:
+            self._memo.pop(ep, None)
+
+
+def stale_reasons(key: str, basic: Dict[str, Any], prior: Optional[Dict[str, Any]], inputs: InputHashes) -> List[str]:
+    """Why `key` has to be re-enriched; empty when its row, inputs and output are all as recorded."""
+    if prior is None:
+        return ["new"]
+    reasons = []
+    if prior.get("row") != content_hash(basic):
+        reasons.append("row")
+    recorded = prior.get("inputs") or {}
+    if any(h is None for h in recorded.values()):
+        # something failed to fetch last time, try again
+        reasons.append("incomplete")
+    elif any(inputs.get(ep) != (None if h == NOT_FOUND else h) for ep, h in recorded.items()):
+        reasons.append("inputs")
+    if file_hash(NORMALIZED_DIR / f"{key}.json") != prior.get("output"):
+        reasons.append("output")
+    return reasons
+
+
+async def normalize_all_async(base_url: str = BASE, concurrency: int = 16, rate: float = 20.0, resume: bool = True,
+                              transport: Optional[httpx.AsyncBaseTransport] = None, force: bool = False) -> Dict[str, Any]:
+    """
+    Incremental rebuild of data/normalized: only rows whose CSV values, upstream
+    cache entries or output file changed since the last run are re-enriched, and a
+    file is only rewritten when its content differs. force=True re-checks every row.
+    """
+    ensure_dirs()
+    df = load_kaggle_dataframe()
+    basics = [build_basic_from_row(row) for _, row in df.iterrows()]
+    # rows that normalize to the same file: the last one in CSV order wins, as it always has
+    by_key = {normalize_name(b["name"]): b for b in basics}
+    manifest = {} if force else load_manifest()
+    done = _read_progress() if resume else {}
+    if not resume and PROGRESS_LOG.exists():
+        PROGRESS_LOG.unlink()
+
+    inputs = InputHashes()
+    pending = {k: b for k, b in by_key.items() if k not in done}
+    reasons = await asyncio.to_thread(lambda: {k: stale_reasons(k, b, manifest.get(k), inputs) for k, b in pending.items()})
+    todo = {k: r for k, r in reasons.items() if r}
+
+    api = AsyncPokeAPI(base_url, concurrency=concurrency, rate=rate, transport=transport)
+    moves = build_move_db_from_cache()
+    # records whose moves weren't all in the move table yet, re-stored by id at the end
+    inline: Dict[str, Dict[str, Any]] = {}
+    added: List[str] = []
+    updated: List[str] = []
+    PROGRESS_LOG.parent.mkdir(parents=True, exist_ok=True)
+    progress = open(PROGRESS_LOG, "a", encoding="utf-8")
+    # bound the number of rows in flight too, so memory stays flat on big runs
+    row_sem = asyncio.Semaphore(concurrency)
+
+    async def one(key: str):
+        basic = by_key[key]
+        async with row_sem:
+            deps: List[str] = []
+            try:
+                enriched = await enrich_async(api, basic["name"], basic, deps)
+            except Exception:
+                enriched = basic
+            stored = moves.to_stored(enriched)
+            if "moves" in stored:
+                inline[key] = enriched
+            path = NORMALIZED_DIR / f"{key}.json"
+            existed = path.exists()
+            if await asyncio.to_thread(write_json_if_changed, path, stored):
+                (updated if existed else added).append(key)
+            # payloads fetched just now replace whatever the check phase saw
+            inputs.forget(deps)
+            hashes = {ep: inputs.get(ep) for ep in deps}
+            entry = {"row": content_hash(basic), "inputs": {ep: NOT_FOUND if h is None and ep in api.not_found else h for ep, h in hashes.items()},
+                     "output": file_hash(path)}
+            manifest[key] = entry
+            progress.write(json.dumps({"key": key, "entry": entry}) + "\n")
+            progress.flush()
+
+    try:
+        await asyncio.gather(*(one(k) for k in todo))
+    finally:
+        progress.close()
+        await api.aclose()
+    for key, entry in done.items():
+        if entry is not None:
+            manifest[key] = entry
+    # moves fetched during this run join the canonical table
+    moves = build_move_db_from_cache()
+    moves_changed = write_move_table(moves)
+    reload_move_db()
+    for key, enriched in inline.items():
+        path = NORMALIZED_DIR / f"{key}.json"
+        if write_json_if_changed(path, moves.to_stored(enriched)):
+            manifest[key]["output"] = file_hash(path)
+    manifest = {k: v for k, v in manifest.items() if k in by_key}
+    write_json_file(MANIFEST_PATH, manifest)
+    changed = bool(added or updated or done)
+    snapshot = None
+    if changed or load_snapshot(NORMALIZED_DIR, DATA_RAW) is None:
+        snapshot = await asyncio.to_thread(write_roster_snapshot)
+    # complete: next run starts from scratch
+    PROGRESS_LOG.unlink()
+    orphaned = sorted(p.stem for p in NORMALIZED_DIR.glob("*.json") if p.stem not in by_key)
+    return {
+        "rows": len(basics), "records": len(by_key), "checked": len(pending), "reenriched": len(todo),
+        "resumed": len(done), "added": sorted(added), "updated": sorted(updated),
+        "unchanged": len(by_key) - len(added) - len(updated), "moves_changed": moves_changed,
+        "reasons": {k: todo[k] for k in sorted(todo)}, "orphaned": orphaned, "snapshot": snapshot, **api.stats,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Rebuild data/normalized from the Kaggle CSV + PokeAPI")
+    ap.add_argument("--base-url", default=BASE)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--rate", type=float, default=20.0, help="max requests per second")
+    ap.add_argument("--no-resume", action="store_true")
+    ap.add_argument("--force", action="store_true", help="ignore the manifest and re-check every row")
+    args = ap.parse_args()
+    print(json.dumps(asyncio.run(normalize_all_async(args.base_url, args.concurrency, args.rate, not args.no_resume, force=args.force)), indent=2))
@@ -0,0 +1,210 @@
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from .schemas import BatchBattleRequest, BatchBattleResult, Distribution, RateEstimate
+from .battle_sim import make_instance, run_battle, decide_winner, build_move_table, make_policies
+from .data_loader import get_normalized_pokemon
+from .vector_sim import simulate_vectorized, WINNER_CODES
+from .metrics import span, inc
+from collections import Counter
+from itertools import chain, repeat
+import random
+import math
+import time
+
+Z_95 = 1.959963984540054
+
+def wilson_interval(successes: int, n: int, z: float = Z_95) -> RateEstimate:
+    if n == 0:
+        return RateEstimate(rate=0.0, ci_low=0.0, ci_high=0.0)
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return RateEstimate(rate=p, ci_low=round(max(0.0, centre - half), 6), ci_high=round(min(1.0, centre + half), 6))
+
+def distribution_of_counts(hist: Dict[int, int]) -> Distribution:
+    """Distribution of a value -> count histogram; equal to distribution() of the expanded values, in O(distinct values) memory."""
+    items = sorted(hist.items())
+    n = sum(c for _, c in items)
+    mean = sum(v * c for v, c in items) / n
+    # same float additions in the same order as summing over the sorted values
+    var = sum(chain.from_iterable(repeat((v - mean) ** 2, c) for v, c in items)) / n
+
+    def pct(q: float) -> int:
+        # nearest-rank percentile
+        rank = min(n - 1, max(0, math.ceil(q * n) - 1))
+        seen = 0
+        for v, c in items:
+            seen += c
+            if seen > rank:
+                return v
+        return items[-1][0]
+
+    return Distribution(
+        mean=mean, std=math.sqrt(var), min=items[0][0],
+        p5=pct(0.05), p25=pct(0.25), p50=pct(0.5), p75=pct(0.75), p95=pct(0.95),
+        max=items[-1][0], histogram=dict(items)
+    )
+
+def distribution(values: List[int]) -> Distribution:
+    return distribution_of_counts(Counter(values))
+
+def merge_batches(parts: List[BatchBattleResult], base_seed: int) -> BatchBattleResult:
+    """
+    Combine results of consecutive run ranges of one matchup (see split_batch).
+    Histograms hold every value, so this is exactly the single-process result.
+    """
+    n = sum(p.n_runs for p in parts)
+    wins_a = sum(p.wins_a for p in parts)
+    wins_b = sum(p.wins_b for p in parts)
+    draws = sum(p.draws for p in parts)
+
+    def merged(field: str) -> Distribution:
+        total: Counter = Counter()
+        for p in parts:
+            total.update(getattr(p, field).histogram)
+        return distribution_of_counts(total)
+
+    return BatchBattleResult(
+        pokemon_a=parts[0].pokemon_a, pokemon_b=parts[0].pokemon_b, n_runs=n, base_seed=base_seed,
+        wins_a=wins_a, wins_b=wins_b, draws=draws,
+        win_rate_a=wilson_interval(wins_a, n), win_rate_b=wilson_interval(wins_b, n), draw_rate=wilson_interval(draws, n),
+        turns=merged("turns"), remaining_hp_a=merged("remaining_hp_a"), remaining_hp_b=merged("remaining_hp_b"),
+    )
+
+# below this many runs a batch isn't worth splitting across workers
+SHARD_MIN_RUNS = 2000
+
+def split_batch(request: BatchBattleRequest, shards: int) -> List[BatchBattleRequest]:
+    """
+    Consecutive run ranges of request, one per shard: range [start, end) keeps the
+    seeds base_seed + start ... so merge_batches reproduces the unsplit result.
+    Only scalar batches with random move choice split; anything else comes back whole.
+    """
+    if shards <= 1 or request.n_runs < SHARD_MIN_RUNS or request.engine != "scalar":
+        return [request]
+    if any(p.policy not in (None, "random") for p in (request.pokemon_a, request.pokemon_b)):
+        # search policies share caches across runs, splitting could change their choices
+        return [request]
+    base_seed = request.base_seed if request.base_seed is not None else random.randint(1, 10**9)
+    k = min(shards, request.n_runs)
+    bounds = [request.n_runs * i // k for i in range(k + 1)]
+    return [request.model_copy(update={"n_runs": hi - lo, "base_seed": base_seed + lo}) for lo, hi in zip(bounds, bounds[1:])]
+
+def summarize_counts(name_a: str, name_b: str, base_seed: int, winners: Dict[str, int], turns: Dict[int, int], hp_a: Dict[int, int], hp_b: Dict[int, int]) -> BatchBattleResult:
+    n = sum(winners.values())
+    wins_a, wins_b, draws = winners.get("pokemon_a", 0), winners.get("pokemon_b", 0), winners.get("draw", 0)
+    return BatchBattleResult(
+        pokemon_a=name_a, pokemon_b=name_b, n_runs=n, base_seed=base_seed,
+        wins_a=wins_a, wins_b=wins_b, draws=draws,
+        win_rate_a=wilson_interval(wins_a, n),
+        win_rate_b=wilson_interval(wins_b, n),
+        draw_rate=wilson_interval(draws, n),
+        turns=distribution_of_counts(turns),
+        remaining_hp_a=distribution_of_counts(hp_a),
+        remaining_hp_b=distribution_of_counts(hp_b),
+    )
+
+def summarize_runs(name_a: str, name_b: str, base_seed: int, winners: List[str], turns: List[int], hp_a: List[int], hp_b: List[int]) -> BatchBattleResult:
+    return summarize_counts(name_a, name_b, base_seed, Counter(winners), Counter(turns), Counter(hp_a), Counter(hp_b))
+
+def iter_scalar_runs(p_a_data: Dict[str, Any], ra: Any, p_b_data: Dict[str, Any], rb: Any, n_runs: int, max_turns: int, base_seed: int, policies: Optional[Tuple[Any, Any]] = None) -> Iterator[Tuple[str, int, int, int]]:
+    """(winner, turns, hp_a, hp_b) of each log-free simulate_battle run; run i uses random.Random(base_seed + i). Policies (and their search caches) are shared by all runs."""
+    # move tables only depend on the matchup, build them once for all runs
+    A = make_instance(p_a_data, ra)
+    B = make_instance(p_b_data, rb)
+    tables = (build_move_table(A, B), build_move_table(B, A))
+    for i in range(n_runs):
+        rnd = random.Random(base_seed + i)
+        A = make_instance(p_a_data, ra)
+        B = make_instance(p_b_data, rb)
+        t = run_battle(A, B, ra, rb, rnd, max_turns, tables=tables, policies=policies)
+        yield decide_winner(A, B), t, A["hp"], B["hp"]
+
+def run_scalar_batch(p_a_data: Dict[str, Any], ra: Any, p_b_data: Dict[str, Any], rb: Any, n_runs: int, max_turns: int, base_seed: int, policies: Optional[Tuple[Any, Any]] = None) -> Tuple[List[str], List[int], List[int], List[int]]:
+    winners: List[str] = []
+    turns: List[int] = []
+    hp_a: List[int] = []
+    hp_b: List[int] = []
+    for w, t, a, b in iter_scalar_runs(p_a_data, ra, p_b_data, rb, n_runs, max_turns, base_seed, policies):
+        winners.append(w)
+        turns.append(t)
+        hp_a.append(a)
+        hp_b.append(b)
+    return winners, turns, hp_a, hp_b
+
+def simulate_batch(request: BatchBattleRequest) -> Optional[BatchBattleResult]:
+    """
+    Run request.n_runs independent battles with the simulate_battle rules but no
+    log building. Run i is seeded with base_seed + i, so it reproduces exactly what
+    /mcp/tools/battle/simulate returns for that seed.
+    engine="vector" runs them in lockstep with numpy instead; base_seed then seeds
+    the numpy generator (reproducible, but not run-by-run identical to the scalar path).
+    The vector engine only models random move choice; other policies always run scalar.
+    Returns None when either pokemon is unknown.
+    """
+    ra = request.pokemon_a
+    rb = request.pokemon_b
+    opt = request.options
+    max_turns = (opt.max_turns if opt else None) or 200
+    base_seed = request.base_seed if request.base_seed is not None else random.randint(1, 10**9)
+
+    p_a_data = get_normalized_pokemon(ra.name)
+    p_b_data = get_normalized_pokemon(rb.name)
+    if not p_a_data or not p_b_data:
+        return None
+
+    policies = make_policies(ra, rb, opt)
+    if request.engine == "vector" and policies is None:
+        with span("sim.batch", {"engine": "vector"}):
+            vb = simulate_vectorized(p_a_data, ra, p_b_data, rb, request.n_runs, max_turns, base_seed)
+        inc("sim.battles", request.n_runs)
+        winners = [WINNER_CODES[w] for w in vb.winner.tolist()]
+        return summarize_runs(p_a_data["name"], p_b_data["name"], base_seed, winners, vb.turns.tolist(), vb.hp_a.tolist(), vb.hp_b.tolist())
+
+    with span("sim.batch", {"engine": "scalar"}):
+        winners, turns, hp_a, hp_b = run_scalar_batch(p_a_data, ra, p_b_data, rb, request.n_runs, max_turns, base_seed, policies)
+    inc("sim.battles", request.n_runs)
+    return summarize_runs(p_a_data["name"], p_b_data["name"], base_seed, winners, turns, hp_a, hp_b)
+
+def stream_batch_part(request: BatchBattleRequest, cursor: Optional[tuple], limit: int, budget_s: float) -> Tuple[List[Dict[str, Any]], Optional[tuple]]:
+    """
+    simulate_batch as a stream of independent jobs: the next "run" events (run
+    index, seed, winner, turns, remaining hp), up to `limit` of them or fewer once
+    `budget_s` seconds are spent, and the cursor to pass to the next call; None
+    after the final "result" event, whose BatchBattleResult is identical to
+    simulate_batch's for the same base_seed. The cursor is the next run and the
+    histograms so far, so it doesn't grow with n_runs. Always the scalar engine;
+    a single "error" event when either pokemon is unknown.
+    """
+    deadline = time.perf_counter() + budget_s
+    ra = request.pokemon_a
+    rb = request.pokemon_b
+    opt = request.options
+    max_turns = (opt.max_turns if opt else None) or 200
+    if cursor is None:
+        base_seed = request.base_seed if request.base_seed is not None else random.randint(1, 10**9)
+        cursor = (base_seed, 0, Counter(), Counter(), Counter(), Counter())
+    base_seed, start, winners, turns, hp_a, hp_b = cursor
+
+    p_a_data = get_normalized_pokemon(ra.name)
+    p_b_data = get_normalized_pokemon(rb.name)
+    if not p_a_data or not p_b_data:
+        return [{"event": "error", "status": 404, "detail": f"Pokemon {ra.name} or {rb.name} not found"}], None
+
+    events: List[Dict[str, Any]] = []
+    runs = iter_scalar_runs(p_a_data, ra, p_b_data, rb, request.n_runs - start, max_turns, base_seed + start, make_policies(ra, rb, opt))
+    for i, (w, t, a, b) in enumerate(runs, start):
+        winners[w] += 1
+        turns[t] += 1
+        hp_a[a] += 1
+        hp_b[b] += 1
+        events.append({"event": "run", "run": i, "seed": base_seed + i, "winner": w, "turns": t, "hp_a": a, "hp_b": b})
+        if len(events) >= limit or time.perf_counter() >= deadline:
+            break
+    inc("sim.battles", len(events))
+    done = start + len(events)
+    if done < request.n_runs:
+        return events, (base_seed, done, winners, turns, hp_a, hp_b)
+    result = summarize_counts(p_a_data["name"], p_b_data["name"], base_seed, winners, turns, hp_a, hp_b)
+    events.append({"event": "result", **result.model_dump()})
+    return events, None
@@ -1,6 +1,7 @@
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Iterator, List, Tuple, Optional, NamedTuple
 from .schemas import BattleRequest, BattleResult, PokemonFinalState
-from .data_loader import get_normalized_pokemon
+from .data_loader import get_normalized_pokemon, suggest_names
+from .metrics import span, inc
 import random
 import math
 
@@ -52,16 +53,56 @@ TYPE_CHART = {
               "fire": 0.5, "poison": 0.5, "steel": 0.5},
 }
 
+# dense, integer-indexed form of TYPE_CHART: TYPE_MATRIX[attacking][defending]
+TYPES: Tuple[str, ...] = tuple(TYPE_CHART.keys())
+TYPE_INDEX: Dict[str, int] = {t: i for i, t in enumerate(TYPES)}
+N_TYPES = len(TYPES)
+NO_TYPE = N_TYPES  # "no second type" slot in DEFENDER_PRODUCTS
+TYPE_MATRIX: Tuple[Tuple[float, ...], ...] = tuple(
+    tuple(TYPE_CHART[atk].get(dfn, 1.0) for dfn in TYPES) for atk in TYPES
+)
+# DEFENDER_PRODUCTS[d1][d2][atk]: combined multiplier of attacking type atk vs a (d1, d2) defender
+DEFENDER_PRODUCTS: Tuple[Tuple[Tuple[float, ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            (TYPE_MATRIX[atk][d1] if d1 < N_TYPES else 1.0) * (TYPE_MATRIX[atk][d2] if d2 < N_TYPES else 1.0)
+            for atk in range(N_TYPES)
+        )
+        for d2 in range(N_TYPES + 1)
+    )
+    for d1 in range(N_TYPES + 1)
+)
+
+def type_index(t: Optional[str]) -> Optional[int]:
+    return TYPE_INDEX.get(t.lower()) if t else None
+
+def defender_products(defender_types: List[str]) -> Tuple[float, ...]:
+    """Multiplier of every attacking type (by TYPE_INDEX) against this defender."""
+    idx = [i for i in (type_index(t) for t in defender_types) if i is not None]
+    if len(idx) <= 2:
+        idx += [NO_TYPE] * (2 - len(idx))
+        return DEFENDER_PRODUCTS[idx[0]][idx[1]]
+    # more than two types never happens in the dataset, but stay correct
+    row = [1.0] * N_TYPES
+    for d in idx:
+        for atk in range(N_TYPES):
+            row[atk] *= TYPE_MATRIX[atk][d]
+    return tuple(row)
+
 def type_multiplier(move_type: str, defender_types: List[str]) -> float:
-    m = 1.0
-    if not move_type:
-        return m
-    move_type = move_type.lower()
-    for dt in defender_types:
-        dt_l = dt.lower()
-        mult = TYPE_CHART.get(move_type, {}).get(dt_l, 1.0)
-        m *= mult
-    return m
+    atk = type_index(move_type)
+    if atk is None:
+        return 1.0
+    return defender_products(defender_types)[atk]
+
+def effectiveness_message(te: float) -> str:
+    if te == 0.0:
+        return "It has no effect."
+    elif te < 1.0:
+        return "It's not very effective."
+    elif te > 1.0:
+        return "It's super effective!"
+    return ""
 
 def choose_default_moves(poke: Dict[str, Any]) -> List[Dict[str,Any]]:
     # If dataset has moves, return first up to 4; otherwise create simple stabs
@@ -74,10 +115,9 @@ def choose_default_moves(poke: Dict[str, Any]) -> List[Dict[str,Any]]:
         {"name": f"{t}-blast" , "power": 90, "accuracy": 95, "type": t, "category": "special"}
     ]
 
-def compute_damage(attacker: Dict[str, Any], defender: Dict[str, Any], move: Dict[str, Any], level: int, is_crit: bool, rand_factor: float) -> int:
+def damage_terms(attacker: Dict[str, Any], defender: Dict[str, Any], move: Dict[str, Any], level: int) -> Tuple[float, float, float]:
+    """(base, stab, type effectiveness) - the parts of compute_damage that don't depend on crit/random roll."""
     power = move.get("power") or 0
-    if power == 0:
-        return 0
     # choose stats depending on category
     category = (move.get("category") or "").lower()
     if category == "special":
@@ -90,189 +130,349 @@ def compute_damage(attacker: Dict[str, Any], defender: Dict[str, Any], move: Dic
     base = (((2 * level) / 5 + 2) * power * (A / max(1, D)) / 50) + 2
     # STAB
     stab = 1.5 if move.get("type") and move.get("type").lower() in [t.lower() for t in attacker.get("types", [])] else 1.0
-    # type effectiveness
-    te = type_multiplier(move.get("type") or "", attacker.get("_target_types", []))  # We'll set _target_types on defender when calling
-    crit = 1.5 if is_crit else 1.0
+    # type effectiveness against the defender
+    te = type_multiplier(move.get("type") or "", defender.get("types", []))
+    return base, stab, te
+
+def compute_damage(attacker: Dict[str, Any], defender: Dict[str, Any], move: Dict[str, Any], level: int, is_crit: bool, rand_factor: float) -> int:
+    power = move.get("power") or 0
+    if power == 0:
+        return 0
+    base, stab, te = damage_terms(attacker, defender, move, level)
+    crit = CRIT_MULT if is_crit else 1.0
     modifier = stab * te * crit * rand_factor
     damage = math.floor(base * modifier)
     return max(1, damage)
 
-def simulate_battle(request: BattleRequest) -> BattleResult:
-    # Load dataset for both Pokémon
-    ra = request.pokemon_a
-    rb = request.pokemon_b
-    opt = request.options or {}
-    seed = opt.seed or random.randint(1, 10**9)
-    rnd = random.Random(seed)
-    max_turns = opt.max_turns or 200
+# turn rules, shared by battle_turns, vector_sim, exact_sim and the search in policies
+PARALYSIS_SKIP = 0.25
+CRIT_CHANCE = 0.0625  # ~6.25% classic crit
+CRIT_MULT = 1.5
+RAND_LOW, RAND_HIGH = 0.85, 1.0
 
-    p_a_data = get_normalized_pokemon(ra.name)
-    p_b_data = get_normalized_pokemon(rb.name)
-    if not p_a_data or not p_b_data:
-        # build a minimal response
-        log = []
-        if not p_a_data: log.append(f"Pokémon {ra.name} not found.")
-        if not p_b_data: log.append(f"Pokémon {rb.name} not found.")
-        final_states = {
-            "pokemon_a": PokemonFinalState(name=ra.name, hp=0, max_hp=0, status=None),
-            "pokemon_b": PokemonFinalState(name=rb.name, hp=0, max_hp=0, status=None)
-        }
-        return BattleResult(battle_log=log, winner=None, turns=0, final_states=final_states)
-
-    # create per-battle mutable instances
-    def make_instance(data: Dict[str, Any], override: Any):
-        max_hp = data["stats"]["hp"]
-        inst = {
-            "name": data["name"],
-            "max_hp": max_hp,
-            "hp": max_hp,
-            "stats": dict(data["stats"]),
-            "types": data.get("types", []),
-            "moves": choose_default_moves(data),
-            "status": override.status if override and override.status else None,
-            "level": override.level if override and override.level else 50,
-            "ability": override.ability if override else None,
-            "item": override.item if override else None,
-            # helper fields
-            "_paralyzed": False,
-            "_burn": False,
-            "_poison": False
-        }
-        # apply explicit status if provided
-        if inst["status"]:
-            s = inst["status"].lower()
-            if s == "paralysis" or s == "paralyzed": inst["_paralyzed"] = True
-            if s == "burn": inst["_burn"] = True
-            if s == "poison": inst["_poison"] = True
-        return inst
+def burn_chip(inst: Dict[str, Any]) -> int:
+    return max(1, math.floor(inst["max_hp"] / 16))
 
-    A = make_instance(p_a_data, ra)
-    B = make_instance(p_b_data, rb)
+def poison_chip(inst: Dict[str, Any]) -> int:
+    return max(1, math.floor(inst["max_hp"] / 8))
 
-    logs: List[str] = []
-    turns = 0
+def chip_damage(inst: Dict[str, Any]) -> int:
+    """Total end-of-turn burn + poison damage for inst."""
+    return (burn_chip(inst) if inst["_burn"] else 0) + (poison_chip(inst) if inst["_poison"] else 0)
 
-    # set target types helper for damage function
-    def set_target_types_for(defender):
-        defender["_target_types"] = defender["types"]
+class MoveEntry(NamedTuple):
+    move: Dict[str, Any]
+    base: float     # damage before modifiers, burn penalty already applied
+    mod: float      # stab * type effectiveness
+    te: float
+    te_msg: str
+    accuracy: float  # hit chance in [0, 1]
+    no_damage: bool  # power 0/None -> compute_damage returns 0
 
-    set_target_types_for(A)
-    set_target_types_for(B)
+def build_move_table(actor: Dict[str, Any], target: Dict[str, Any]) -> List[MoveEntry]:
+    """
+    Everything about actor's moves against target that is fixed for the whole battle,
+    so the turn loop only applies the crit and random factor.
+    Statuses never change mid-battle, so the burn attack penalty is folded in here.
+    """
+    products = defender_products(target["types"])
+    own_types = {t.lower() for t in actor.get("types", [])}
+    stats = actor["stats"]
+    level = actor["level"]
+    table = []
+    for move in actor["moves"]:
+        mtype = (move.get("type") or "").lower()
+        category = (move.get("category") or "").lower()
+        if category == "special":
+            A = stats["special_attack"]
+            D = target["stats"]["special_defense"]
+        else:
+            A = stats["attack"]
+            # burn halves attack for physical moves
+            if actor["_burn"] and (move.get("category") or "physical").lower() != "special":
+                A = max(1, math.floor(A / 2))
+            D = target["stats"]["defense"]
+        power = move.get("power") or 0
+        base = (((2 * level) / 5 + 2) * power * (A / max(1, D)) / 50) + 2
+        stab = 1.5 if mtype and mtype in own_types else 1.0
+        atk = TYPE_INDEX.get(mtype)
+        te = products[atk] if atk is not None else 1.0
+        table.append(MoveEntry(move, base, stab * te, te, effectiveness_message(te), (move.get("accuracy") or 100) / 100.0, power == 0))
+    return table
 
-    # battle loop
+# create per-battle mutable instances
+def make_instance(data: Dict[str, Any], override: Any) -> Dict[str, Any]:
+    max_hp = data["stats"]["hp"]
+    inst = {
+        "name": data["name"],
+        "max_hp": max_hp,
+        "hp": max_hp,
+        "stats": dict(data["stats"]),
+        "types": data.get("types", []),
+        "moves": choose_default_moves(data),
+        "status": override.status if override and override.status else None,
+        "level": override.level if override and override.level else 50,
+        "ability": override.ability if override else None,
+        "item": override.item if override else None,
+        # helper fields
+        "_paralyzed": False,
+        "_burn": False,
+        "_poison": False
+    }
+    # apply explicit status if provided
+    if inst["status"]:
+        s = inst["status"].lower()
+        if s == "paralysis" or s == "paralyzed": inst["_paralyzed"] = True
+        if s == "burn": inst["_burn"] = True
+        if s == "poison": inst["_poison"] = True
+    return inst
+
+def requested_move_index(instance: Dict[str, Any], request_inst: Any) -> Optional[int]:
+    """First move named in the request (substring match), None if none is named or none matches."""
+    if request_inst and request_inst.moves:
+        for nm in request_inst.moves:
+            # find move in instance moves by name substring match
+            for i, m in enumerate(instance["moves"]):
+                if nm.lower() in m["name"].lower():
+                    return i
+    return None
+
+# choose moves: if user specified move names in request prefer those
+def pick_move_index(instance: Dict[str, Any], request_inst: Any, rnd: random.Random) -> int:
+    idx = requested_move_index(instance, request_inst)
+    if idx is not None:
+        return idx
+    return rnd.randrange(0, len(instance["moves"]))
+
+def pick_move(instance: Dict[str, Any], request_inst: Any, rnd: random.Random) -> Dict[str, Any]:
+    return instance["moves"][pick_move_index(instance, request_inst, rnd)]
+
+# structured battle events: compact tuples, rendered to text only when asked (render_events)
+# side: 0 = pokemon_a, 1 = pokemon_b; move: index into that side's move table
+EV_TURN = 0            # (EV_TURN, turn)
+EV_PARALYZED = 1       # (EV_PARALYZED, side)
+EV_MISS = 2            # (EV_MISS, side, move)
+EV_HIT = 3             # (EV_HIT, side, move, damage, crit, target_hp)
+EV_FAINT = 4           # (EV_FAINT, side)
+EV_BURN = 5            # (EV_BURN, side, chip, hp)
+EV_POISON = 6          # (EV_POISON, side, chip, hp)
+EV_FAINT_BURN = 7      # (EV_FAINT_BURN, side)
+EV_FAINT_POISON = 8    # (EV_FAINT_POISON, side)
+
+def battle_turns(A: Dict[str, Any], B: Dict[str, Any], ra: Any, rb: Any, rnd: random.Random, max_turns: int, record: bool = False, tables: Optional[Tuple[List[MoveEntry], List[MoveEntry]]] = None, policies: Optional[Tuple[Any, Any]] = None, turn: int = 0) -> Iterator[Optional[List[tuple]]]:
+    """
+    Core turn loop as a generator: mutates A and B in place and yields once per
+    turn played, after that turn's end-of-turn effects. With record=False it yields
+    None (fast path for batch runs); otherwise the turn's EV_* tuples. The rules
+    and the sequence of rnd draws are identical either way.
+    tables: prebuilt (A vs B, B vs A) move tables, e.g. shared across batch runs.
+    policies: (A's, B's) move policy (see policies.py); None picks like RandomPolicy.
+    turn: turns already played, to continue a battle restored mid-way (see battle_state.py).
+    """
+    table_a, table_b = tables or (build_move_table(A, B), build_move_table(B, A))
+    # speed with paralysis effect (statuses are fixed for the battle, so is the order)
+    a_speed = A["stats"]["speed"] * (0.5 if A["_paralyzed"] else 1.0)
+    b_speed = B["stats"]["speed"] * (0.5 if B["_paralyzed"] else 1.0)
+    b_first = b_speed > a_speed
+    turns = turn
+    events: Optional[List[tuple]] = None
     while A["hp"] > 0 and B["hp"] > 0 and turns < max_turns:
         turns += 1
-        logs.append(f"--- Turn {turns} ---")
-        # speed with paralysis effect
-        a_speed = A["stats"]["speed"] * (0.5 if A["_paralyzed"] else 1.0)
-        b_speed = B["stats"]["speed"] * (0.5 if B["_paralyzed"] else 1.0)
-
-        # choose moves: if user specified move names in request prefer those
-        def pick_move(instance, request_inst):
-            # if request_inst provided moves -> try to match by name
-            if request_inst and request_inst.moves:
-                for nm in request_inst.moves:
-                    # find move in instance moves by name substring match
-                    for m in instance["moves"]:
-                        if nm.lower() in m["name"].lower():
-                            return m
-                # fallback to first
-            return instance["moves"][rnd.randrange(0, len(instance["moves"]))]
-
-        move_a = pick_move(A, ra)
-        move_b = pick_move(B, rb)
+        if record: events = [(EV_TURN, turns)]
+
+        if policies is None:
+            ia = pick_move_index(A, ra, rnd)
+            ib = pick_move_index(B, rb, rnd)
+        else:
+            turns_left = max_turns - turns + 1
+            ia = policies[0].choose(A, B, table_a, table_b, not b_first, turns_left, rnd)
+            ib = policies[1].choose(B, A, table_b, table_a, b_first, turns_left, rnd)
 
         # action order
-        order = [(A, move_a, ra, "pokemon_a", B), (B, move_b, rb, "pokemon_b", A)]
-        if b_speed > a_speed:
-            order = [(B, move_b, rb, "pokemon_b", A), (A, move_a, ra, "pokemon_a", B)]
+        order = [(0, A, table_a, ia, 1, B), (1, B, table_b, ib, 0, A)]
+        if b_first:
+            order.reverse()
 
         # process both actions
-        for actor, move, req_inst, actor_label, target in order:
+        for side, actor, table, mi, target_side, target in order:
             if actor["hp"] <= 0 or target["hp"] <= 0:
                 continue  # fainted mid-turn
+            entry = table[mi]
             # paralysis check
             if actor["_paralyzed"]:
                 p_fail = rnd.random()
-                if p_fail < 0.25:
-                    logs.append(f"{actor['name']} is paralyzed and couldn't move!")
+                if p_fail < PARALYSIS_SKIP:
+                    if events is not None: events.append((EV_PARALYZED, side))
                     continue
             # accuracy check
-            acc = move.get("accuracy") or 100
-            if rnd.random() > (acc / 100.0):
-                logs.append(f"{actor['name']} used {move['name']} but it missed!")
+            if rnd.random() > entry.accuracy:
+                if events is not None: events.append((EV_MISS, side, mi))
                 continue
             # critical?
-            is_crit = rnd.random() < 0.0625  # ~6.25% classic crit
-            rand_factor = rnd.uniform(0.85, 1.0)
-            # apply burn attack penalty for physical
-            saved_attack = actor["stats"]["attack"]
-            if actor["_burn"] and (move.get("category") or "physical").lower() != "special":
-                actor["stats"]["attack"] = max(1, math.floor(actor["stats"]["attack"] / 2))
-
-            # compute damage (set target types in move context)
-            target["_target_types"] = target["types"]
-            damage = compute_damage(actor, target, move, actor["level"], is_crit, rand_factor)
+            is_crit = rnd.random() < CRIT_CHANCE
+            rand_factor = rnd.uniform(RAND_LOW, RAND_HIGH)
+            if entry.no_damage:
+                damage = 0
+            else:
+                damage = max(1, math.floor(entry.base * (entry.mod * (CRIT_MULT if is_crit else 1.0) * rand_factor)))
             target["hp"] = max(0, target["hp"] - damage)
 
-            # restore attack if modified
-            actor["stats"]["attack"] = saved_attack
-
-            te = type_multiplier(move.get("type") or "", target["types"])
-            te_msg = ""
-            if te == 0.0:
-                te_msg = "It has no effect."
-            elif te < 1.0:
-                te_msg = "It's not very effective."
-            elif te > 1.0:
-                te_msg = "It's super effective!"
-
-            crit_msg = " A critical hit!" if is_crit else ""
-            logs.append(f"{actor['name']} used {move['name']} (power={move.get('power')}) → {damage} dmg.{crit_msg} {te_msg} {target['name']} HP {target['hp']}/{target['max_hp']}")
+            if events is not None: events.append((EV_HIT, side, mi, damage, int(is_crit), target["hp"]))
             # some moves may apply status via effect text - we won't parse; statuses can be applied by request or special chance in future
 
             if target["hp"] <= 0:
-                logs.append(f"{target['name']} fainted!")
+                if events is not None: events.append((EV_FAINT, target_side))
                 break
 
         # end of turn effects
-        for inst in (A, B):
+        for side, inst in ((0, A), (1, B)):
             if inst["_burn"]:
-                chip = max(1, math.floor(inst["max_hp"] / 16))
+                chip = burn_chip(inst)
                 inst["hp"] = max(0, inst["hp"] - chip)
-                logs.append(f"{inst['name']} is hurt by its burn and loses {chip} HP. {inst['name']} HP {inst['hp']}/{inst['max_hp']}")
-                if inst["hp"] <= 0:
-                    logs.append(f"{inst['name']} fainted from burn!")
+                if events is not None:
+                    events.append((EV_BURN, side, chip, inst["hp"]))
+                    if inst["hp"] <= 0:
+                        events.append((EV_FAINT_BURN, side))
             if inst["_poison"]:
-                chip = max(1, math.floor(inst["max_hp"] / 8))
+                chip = poison_chip(inst)
                 inst["hp"] = max(0, inst["hp"] - chip)
-                logs.append(f"{inst['name']} is hurt by poison and loses {chip} HP. {inst['name']} HP {inst['hp']}/{inst['max_hp']}")
-                if inst["hp"] <= 0:
-                    logs.append(f"{inst['name']} fainted from poison!")
+                if events is not None:
+                    events.append((EV_POISON, side, chip, inst["hp"]))
+                    if inst["hp"] <= 0:
+                        events.append((EV_FAINT_POISON, side))
 
+        yield events
         # check for end of battle
         if A["hp"] <= 0 or B["hp"] <= 0:
             break
 
-    # decide winner
+def run_battle(A: Dict[str, Any], B: Dict[str, Any], ra: Any, rb: Any, rnd: random.Random, max_turns: int, events: Optional[List[tuple]] = None, tables: Optional[Tuple[List[MoveEntry], List[MoveEntry]]] = None, policies: Optional[Tuple[Any, Any]] = None) -> int:
+    """
+    Play the whole battle (see battle_turns) and return the number of turns;
+    with an events list, every turn's EV_* tuples are appended to it.
+    """
+    turns = 0
+    for turn_events in battle_turns(A, B, ra, rb, rnd, max_turns, events is not None, tables, policies):
+        turns += 1
+        if turn_events is not None:
+            events.extend(turn_events)
+    return turns
+
+def render_event(ev: tuple, sides: Tuple[Dict[str, Any], Dict[str, Any]], tables: Tuple[List[MoveEntry], List[MoveEntry]]) -> str:
+    code = ev[0]
+    if code == EV_TURN:
+        return f"--- Turn {ev[1]} ---"
+    inst = sides[ev[1]]
+    if code == EV_PARALYZED:
+        return f"{inst['name']} is paralyzed and couldn't move!"
+    if code == EV_MISS:
+        move = tables[ev[1]][ev[2]].move
+        return f"{inst['name']} used {move['name']} but it missed!"
+    if code == EV_HIT:
+        entry = tables[ev[1]][ev[2]]
+        target = sides[1 - ev[1]]
+        crit_msg = " A critical hit!" if ev[4] else ""
+        return f"{inst['name']} used {entry.move['name']} (power={entry.move.get('power')}) → {ev[3]} dmg.{crit_msg} {entry.te_msg} {target['name']} HP {ev[5]}/{target['max_hp']}"
+    if code == EV_FAINT:
+        return f"{inst['name']} fainted!"
+    if code == EV_BURN:
+        return f"{inst['name']} is hurt by its burn and loses {ev[2]} HP. {inst['name']} HP {ev[3]}/{inst['max_hp']}"
+    if code == EV_POISON:
+        return f"{inst['name']} is hurt by poison and loses {ev[2]} HP. {inst['name']} HP {ev[3]}/{inst['max_hp']}"
+    if code == EV_FAINT_BURN:
+        return f"{inst['name']} fainted from burn!"
+    if code == EV_FAINT_POISON:
+        return f"{inst['name']} fainted from poison!"
+    raise ValueError(f"unknown battle event {ev!r}")
+
+def render_events(events: List[tuple], sides: Tuple[Dict[str, Any], Dict[str, Any]], tables: Tuple[List[MoveEntry], List[MoveEntry]]) -> List[str]:
+    return [render_event(ev, sides, tables) for ev in events]
+
+SUMMARY_EVENTS = (EV_FAINT, EV_FAINT_BURN, EV_FAINT_POISON)
+
+def render_log(events: Optional[List[tuple]], sides: Tuple[Dict[str, Any], Dict[str, Any]], tables: Tuple[List[MoveEntry], List[MoveEntry]], log_level: str, turns: int, winner: Optional[str]) -> List[str]:
+    """battle_log for log_level ("full" / "summary" / "none") from the recorded events; winner None: battle still running."""
+    if log_level == "full":
+        return render_events(events, sides, tables)
+    if log_level == "summary":
+        logs = render_events([ev for ev in events if ev[0] in SUMMARY_EVENTS], sides, tables)
+        if winner is not None:
+            logs.append(f"Battle ended after {turns} turns: {winner}")
+        return logs
+    return []
+
+def decide_winner(A: Dict[str, Any], B: Dict[str, Any]) -> str:
     if A["hp"] > 0 and B["hp"] <= 0:
-        winner = "pokemon_a"
+        return "pokemon_a"
     elif B["hp"] > 0 and A["hp"] <= 0:
-        winner = "pokemon_b"
+        return "pokemon_b"
     elif A["hp"] <= 0 and B["hp"] <= 0:
-        winner = "draw"
-    else:
-        # max turns reached
-        if A["hp"] > B["hp"]:
-            winner = "pokemon_a"
-        elif B["hp"] > A["hp"]:
-            winner = "pokemon_b"
-        else:
-            winner = "draw"
+        return "draw"
+    # max turns reached
+    if A["hp"] > B["hp"]:
+        return "pokemon_a"
+    elif B["hp"] > A["hp"]:
+        return "pokemon_b"
+    return "draw"
 
+def status_of(inst: Dict[str, Any]) -> Optional[str]:
+    return "burn" if inst["_burn"] else ("poison" if inst["_poison"] else ("paralysis" if inst["_paralyzed"] else None))
+
+def make_policies(ra: Any, rb: Any, opt: Any) -> Optional[Tuple[Any, Any]]:
+    """Per-side move policies from the request, None when both sides pick at random."""
+    if not (ra.policy not in (None, "random") or rb.policy not in (None, "random")):
+        return None
+    from .policies import make_policy
+    depth = getattr(opt, "search_depth", None) or 3
+    budget = getattr(opt, "time_budget_ms", None) or 50.0
+    return make_policy(ra.policy, ra, depth, budget), make_policy(rb.policy, rb, depth, budget)
+
+def not_found_line(name: str) -> str:
+    hint = suggest_names(name, 3)
+    return f"Pokémon {name} not found." + (f" Did you mean {', '.join(hint)}?" if hint else "")
+
+def not_found_result(ra: Any, rb: Any, p_a_data: Optional[Dict[str, Any]], p_b_data: Optional[Dict[str, Any]]) -> BattleResult:
+    # build a minimal response
+    log = []
+    if not p_a_data: log.append(not_found_line(ra.name))
+    if not p_b_data: log.append(not_found_line(rb.name))
     final_states = {
-        "pokemon_a": PokemonFinalState(name=A["name"], hp=A["hp"], max_hp=A["max_hp"], status=("burn" if A["_burn"] else ("poison" if A["_poison"] else ("paralysis" if A["_paralyzed"] else None)))),
-        "pokemon_b": PokemonFinalState(name=B["name"], hp=B["hp"], max_hp=B["max_hp"], status=("burn" if B["_burn"] else ("poison" if B["_poison"] else ("paralysis" if B["_paralyzed"] else None))))
+        "pokemon_a": PokemonFinalState(name=ra.name, hp=0, max_hp=0, status=None),
+        "pokemon_b": PokemonFinalState(name=rb.name, hp=0, max_hp=0, status=None)
+    }
+    return BattleResult(battle_log=log, winner=None, turns=0, final_states=final_states)
+
+def final_states_of(A: Dict[str, Any], B: Dict[str, Any]) -> Dict[str, PokemonFinalState]:
+    return {
+        "pokemon_a": PokemonFinalState(name=A["name"], hp=A["hp"], max_hp=A["max_hp"], status=status_of(A)),
+        "pokemon_b": PokemonFinalState(name=B["name"], hp=B["hp"], max_hp=B["max_hp"], status=status_of(B))
     }
 
-    return BattleResult(battle_log=logs, winner=winner, turns=turns, final_states=final_states)
+def simulate_battle(request: BattleRequest) -> BattleResult:
+    # Load dataset for both Pokémon
+    ra = request.pokemon_a
+    rb = request.pokemon_b
+    opt = request.options or {}
+    seed = opt.seed if opt.seed is not None else random.randint(1, 10**9)
+    rnd = random.Random(seed)
+    max_turns = opt.max_turns or 200
+
+    p_a_data = get_normalized_pokemon(ra.name)
+    p_b_data = get_normalized_pokemon(rb.name)
+    if not p_a_data or not p_b_data:
+        return not_found_result(ra, rb, p_a_data, p_b_data)
+
+    A = make_instance(p_a_data, ra)
+    B = make_instance(p_b_data, rb)
+
+    tables = (build_move_table(A, B), build_move_table(B, A))
+    log_level = getattr(opt, "log_level", None) or "full"
+    events: Optional[List[tuple]] = [] if log_level != "none" else None
+    with span("sim.turn_loop"):
+        turns = run_battle(A, B, ra, rb, rnd, max_turns, events, tables, make_policies(ra, rb, opt))
+    inc("sim.turns", turns)
+    winner = decide_winner(A, B)
+    with span("sim.render_log"):
+        logs = render_log(events, (A, B), tables, log_level, turns, winner)
+
+    return BattleResult(battle_log=logs, winner=winner, turns=turns, final_states=final_states_of(A, B))
@@ -0,0 +1,286 @@
+"""
+Checkpoint, resume, fork and replay for 1v1 battles.
+
+Apart from hp, everything in a battle instance (stats, types, statuses, move
+tables) is fixed by the request, so the whole mutable state of a battle is
+BattleState: turns played, both hp values and the random.Random state. A state
+plus the request it came from continues exactly the battle simulate_battle
+would have played with that seed.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from .schemas import (BattleRequest, BattleResult, BattleCheckpointRequest, BattleCheckpoint, BattleResumeRequest,
+                      BattleForkRequest, BatchBattleResult)
+from .battle_sim import (make_instance, build_move_table, battle_turns, render_log, render_events, decide_winner,
+                         final_states_of, make_policies, status_of, not_found_result, SUMMARY_EVENTS)
+from .batch_sim import summarize_counts
+from .data_loader import get_normalized_pokemon
+from .metrics import span, inc
+import base64
+import binascii
+import hashlib
+import random
+import struct
+import time
+
+MAGIC = b"BST1"
+# magic, turn, hp_a, hp_b, sides fingerprint, has gauss_next, gauss_next; then the 625 Mersenne Twister words
+_HEADER = struct.Struct("<4sIII8s?d")
+_RNG_WORDS = struct.Struct("<625I")
+
+
+def sides_fingerprint(request: BattleRequest) -> bytes:
+    # a state only makes sense for the two sides it was taken from
+    sides = request.pokemon_a.model_dump_json() + "|" + request.pokemon_b.model_dump_json()
+    return hashlib.blake2b(sides.encode("utf-8"), digest_size=8).digest()
+
+
+def _fresh_random(state: tuple) -> random.Random:
+    # skip Random()'s urandom seeding, the state is overwritten anyway
+    rnd = random.Random.__new__(random.Random)
+    rnd.setstate(state)
+    return rnd
+
+
+class BattleState:
+    """
+    Mutable part of a battle, 2533 bytes packed / 3380 chars base64 (almost all
+    of it the rng). Treat as immutable: the rng state is a tuple, so copies and
+    forks share it.
+    """
+    __slots__ = ("turn", "hp_a", "hp_b", "rng", "fingerprint")
+
+    def __init__(self, turn: int, hp_a: int, hp_b: int, rng: tuple, fingerprint: bytes):
+        self.turn = turn
+        self.hp_a = hp_a
+        self.hp_b = hp_b
+        self.rng = rng
+        self.fingerprint = fingerprint
+
+    def to_bytes(self) -> bytes:
+        _, words, gauss = self.rng
+        return _HEADER.pack(MAGIC, self.turn, self.hp_a, self.hp_b, self.fingerprint, gauss is not None, gauss or 0.0) + _RNG_WORDS.pack(*words)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "BattleState":
+        if len(raw) != _HEADER.size + _RNG_WORDS.size:
+            raise ValueError("Not a battle state")
+        magic, turn, hp_a, hp_b, fingerprint, has_gauss, gauss = _HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError("Not a battle state")
+        words = _RNG_WORDS.unpack_from(raw, _HEADER.size)
+        if words[-1] > 624:
+            raise ValueError("Corrupt battle state")
+        return cls(turn, hp_a, hp_b, (random.Random.VERSION, words, gauss if has_gauss else None), fingerprint)
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, text: str) -> "BattleState":
+        try:
+            raw = base64.urlsafe_b64decode(text.encode("ascii"))
+        except (UnicodeEncodeError, binascii.Error):
+            raise ValueError("Not a battle state")
+        return cls.from_bytes(raw)
+
+
+class BattleSession:
+    """
+    A 1v1 battle that can be advanced a few turns at a time, checkpointed,
+    restored and forked. Instances, move tables and policies are derived from the
+    request once; forks share the tables and policies (and their search caches).
+    """
+    __slots__ = ("ra", "rb", "A", "B", "tables", "policies", "rnd", "turn", "max_turns", "fingerprint")
+
+    def __init__(self, request: BattleRequest, p_a_data: Dict[str, Any], p_b_data: Dict[str, Any], seed: int):
+        opt = request.options or {}
+        self.ra = request.pokemon_a
+        self.rb = request.pokemon_b
+        self.A = make_instance(p_a_data, self.ra)
+        self.B = make_instance(p_b_data, self.rb)
+        self.tables = (build_move_table(self.A, self.B), build_move_table(self.B, self.A))
+        self.policies = make_policies(self.ra, self.rb, opt)
+        self.rnd = random.Random(seed)
+        self.turn = 0
+        self.max_turns = getattr(opt, "max_turns", None) or 200
+        self.fingerprint = sides_fingerprint(request)
+
+    @property
+    def finished(self) -> bool:
+        return self.A["hp"] <= 0 or self.B["hp"] <= 0 or self.turn >= self.max_turns
+
+    def play(self, turns: Optional[int] = None, record: bool = False) -> Optional[List[tuple]]:
+        """Advance up to `turns` turns (None: to the end); returns their EV_* events when record."""
+        events: Optional[List[tuple]] = [] if record else None
+        if turns == 0 or self.finished:
+            return events
+        played = 0
+        for turn_events in battle_turns(self.A, self.B, self.ra, self.rb, self.rnd, self.max_turns, record, self.tables, self.policies, self.turn):
+            self.turn += 1
+            played += 1
+            if record:
+                events.extend(turn_events)
+            if played == turns:
+                # the generator is suspended between turns, nothing is half applied
+                break
+        return events
+
+    def checkpoint(self) -> BattleState:
+        return BattleState(self.turn, self.A["hp"], self.B["hp"], self.rnd.getstate(), self.fingerprint)
+
+    def restore(self, state: BattleState):
+        if state.fingerprint != self.fingerprint:
+            raise ValueError("The battle state belongs to a different matchup")
+        if state.hp_a > self.A["max_hp"] or state.hp_b > self.B["max_hp"] or state.turn > self.max_turns:
+            raise ValueError("The battle state doesn't fit this matchup")
+        self.turn = state.turn
+        self.A["hp"] = state.hp_a
+        self.B["hp"] = state.hp_b
+        self.rnd = _fresh_random(state.rng)
+
+    def fork(self, seed: Optional[int] = None) -> "BattleSession":
+        """Independent copy at the current turn: two small dicts and the rng state. seed rerolls what happens next."""
+        other = BattleSession.__new__(BattleSession)
+        other.ra, other.rb = self.ra, self.rb
+        other.A, other.B = dict(self.A), dict(self.B)
+        other.tables, other.policies = self.tables, self.policies
+        other.rnd = random.Random(seed) if seed is not None else _fresh_random(self.rnd.getstate())
+        other.turn, other.max_turns, other.fingerprint = self.turn, self.max_turns, self.fingerprint
+        return other
+
+    def log(self, events: Optional[List[tuple]], log_level: str) -> List[str]:
+        winner = decide_winner(self.A, self.B) if self.finished else None
+        return render_log(events, (self.A, self.B), self.tables, log_level, self.turn, winner)
+
+    def result(self, events: Optional[List[tuple]], log_level: str) -> BattleResult:
+        return BattleResult(battle_log=self.log(events, log_level), winner=decide_winner(self.A, self.B),
+                            turns=self.turn, final_states=final_states_of(self.A, self.B))
+
+
+def open_session(request: BattleRequest, seed: int) -> Optional[BattleSession]:
+    p_a_data = get_normalized_pokemon(request.pokemon_a.name)
+    p_b_data = get_normalized_pokemon(request.pokemon_b.name)
+    if not p_a_data or not p_b_data:
+        return None
+    return BattleSession(request, p_a_data, p_b_data, seed)
+
+
+def _log_level(request: BattleRequest) -> str:
+    return getattr(request.options, "log_level", None) or "full"
+
+
+def checkpoint_battle(request: BattleCheckpointRequest) -> Optional[BattleCheckpoint]:
+    """Play request.turns turns of the seeded battle and return its state; None when either pokemon is unknown."""
+    seed = getattr(request.options, "seed", None)
+    if seed is None:
+        seed = random.randint(1, 10**9)
+    session = open_session(request, seed)
+    if session is None:
+        return None
+    log_level = _log_level(request)
+    with span("sim.turn_loop"):
+        events = session.play(request.turns, record=log_level != "none")
+    inc("sim.turns", session.turn)
+    return BattleCheckpoint(state=session.checkpoint().encode(), seed=seed, turn=session.turn,
+                            hp={"pokemon_a": session.A["hp"], "pokemon_b": session.B["hp"]},
+                            finished=session.finished, battle_log=session.log(events, log_level))
+
+
+def resume_battle(request: BattleResumeRequest) -> Optional[BattleResult]:
+    """
+    Continue a checkpoint to the end. Without reseed this is a deterministic replay:
+    turns, winner and final states equal the uninterrupted battle's, and battle_log
+    holds the turns after the checkpoint. Raises ValueError for a foreign state.
+    """
+    state = BattleState.decode(request.state)
+    session = open_session(request, 0)
+    if session is None:
+        return None
+    session.restore(state)
+    if request.reseed is not None:
+        session.rnd = random.Random(request.reseed)
+    log_level = _log_level(request)
+    with span("sim.turn_loop"):
+        events = session.play(record=log_level != "none")
+    inc("sim.turns", session.turn - state.turn)
+    return session.result(events, log_level)
+
+
+def fork_batch(request: BattleForkRequest) -> Optional[BatchBattleResult]:
+    """
+    What-if from a checkpoint: n_runs forks of the same position, fork i reseeded
+    with base_seed + i, played to the end. Turns count the whole battle.
+    """
+    state = BattleState.decode(request.state)
+    base = open_session(request, 0)
+    if base is None:
+        return None
+    base.restore(state)
+    base_seed = request.base_seed if request.base_seed is not None else random.randint(1, 10**9)
+    winners: Counter = Counter()
+    turns: Counter = Counter()
+    hp_a: Counter = Counter()
+    hp_b: Counter = Counter()
+    with span("sim.fork_batch"):
+        for i in range(request.n_runs):
+            fork = base.fork(base_seed + i)
+            fork.play()
+            winners[decide_winner(fork.A, fork.B)] += 1
+            turns[fork.turn] += 1
+            hp_a[fork.A["hp"]] += 1
+            hp_b[fork.B["hp"]] += 1
+    inc("sim.battles", request.n_runs)
+    return summarize_counts(base.A["name"], base.B["name"], base_seed, winners, turns, hp_a, hp_b)
+
+
+def stream_battle_part(request: BattleRequest, cursor: Optional[bytes], limit: int, budget_s: float) -> Tuple[List[Dict[str, Any]], Optional[bytes]]:
+    """
+    simulate_battle as a stream of independent jobs. Returns the next events, up
+    to `limit` of them or fewer once `budget_s` seconds are spent, and the cursor
+    (a packed BattleState) to pass to the next call; None after the last event.
+    The first call (cursor None) yields a "start" event (seed and both sides),
+    then comes a "turn" event per turn (its log lines at the requested log_level
+    and both hp values) and a final "result" event carrying the BattleResult
+    fields except battle_log. Any process can play the next part, and the same
+    seed plays the same battle as simulate_battle.
+    """
+    deadline = time.perf_counter() + budget_s
+    events: List[Dict[str, Any]] = []
+    ra = request.pokemon_a
+    rb = request.pokemon_b
+    p_a_data = get_normalized_pokemon(ra.name)
+    p_b_data = get_normalized_pokemon(rb.name)
+    if not p_a_data or not p_b_data:
+        result = not_found_result(ra, rb, p_a_data, p_b_data)
+        return [{"event": "result", **result.model_dump()}], None
+    if cursor is None:
+        seed = getattr(request.options, "seed", None)
+        if seed is None:
+            seed = random.randint(1, 10**9)
+        session = BattleSession(request, p_a_data, p_b_data, seed)
+        A, B = session.A, session.B
+        events.append({"event": "start", "seed": seed, "max_turns": session.max_turns,
+                       "pokemon_a": {"name": A["name"], "max_hp": A["max_hp"], "status": status_of(A)},
+                       "pokemon_b": {"name": B["name"], "max_hp": B["max_hp"], "status": status_of(B)}})
+    else:
+        session = BattleSession(request, p_a_data, p_b_data, 0)
+        session.restore(BattleState.from_bytes(cursor))
+    A, B = session.A, session.B
+
+    log_level = _log_level(request)
+    played = session.turn
+    while not session.finished and len(events) < limit:
+        turn_events = session.play(1, record=log_level != "none")
+        if log_level == "summary":
+            turn_events = [ev for ev in turn_events if ev[0] in SUMMARY_EVENTS]
+        log = render_events(turn_events, (A, B), session.tables) if turn_events else []
+        events.append({"event": "turn", "turn": session.turn, "log": log, "hp": {"pokemon_a": A["hp"], "pokemon_b": B["hp"]}})
+        if time.perf_counter() >= deadline:
+            break
+    inc("sim.turns", session.turn - played)
+    if not session.finished:
+        return events, session.checkpoint().to_bytes()
+    final_states = {side: st.model_dump() for side, st in final_states_of(A, B).items()}
+    events.append({"event": "result", "winner": decide_winner(A, B), "turns": session.turn, "final_states": final_states})
+    return events, None
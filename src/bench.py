@@ -0,0 +1,375 @@
+"""
+Benchmarks: simulator/data-path microbenchmarks and an in-process ASGI load
+generator for the MCP routes. Results are written as JSON and can be compared
+against a saved baseline, failing (exit 1) when a metric regresses by more
+than the allowed fraction.
+
+    python -m src.bench --save bench_results/baseline.json
+    python -m src.bench --compare bench_results/baseline.json --max-regression 0.25
+    python -m src.bench --only load --requests 500 --concurrency 16
+    python -m src.bench --compare base.json --threshold load.simulate.p99_ms=0.5
+    python -m src.bench --only startup
+    python -m src.bench --only scaling --workers 1,2,4,8
+
+Numbers are machine-specific; keep baselines per machine.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# metric name -> {"value": float, "unit": str, "higher_is_better": bool}
+Results = Dict[str, Dict[str, Any]]
+
+BENCH_NAMES = ["pikachu", "charizard", "blastoise", "venusaur", "gengar", "snorlax", "dragonite", "machamp", "alakazam", "lapras"]
+
+
+def _record(results: Results, name: str, value: float, unit: str, higher_is_better: bool):
+    results[name] = {"value": round(value, 4), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def throughput(fn: Callable[[], Any], min_time: float = 0.5, min_iters: int = 5) -> float:
+    """Calls per second of fn, timed over at least min_time seconds."""
+    fn()  # warm-up
+    n = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and n >= min_iters:
+            return n / elapsed
+
+
+def percentile(sorted_xs: List[float], q: float) -> float:
+    # nearest-rank, same as batch_sim.distribution
+    return sorted_xs[min(len(sorted_xs) - 1, max(0, math.ceil(q * len(sorted_xs)) - 1))]
+
+
+# ---- microbenchmarks ----
+
+def bench_simulate(results: Results, min_time: float):
+    from .battle_sim import simulate_battle
+    from .schemas import BattleRequest, BattlePokemonInstance, BattleOptions
+    for level in ("full", "none"):
+        seeds = iter(range(1, 10**9))
+        def run():
+            simulate_battle(BattleRequest(pokemon_a=BattlePokemonInstance(name="charizard"), pokemon_b=BattlePokemonInstance(name="blastoise"),
+                                          options=BattleOptions(seed=next(seeds), log_level=level)))
+        _record(results, f"micro.simulate_battle.log_{level}", throughput(run, min_time), "battles/s", True)
+
+
+def bench_lookups(results: Results, min_time: float):
+    from .data_loader import get_normalized_pokemon, reload_index
+    t = time.perf_counter()
+    reload_index()
+    _record(results, "micro.index.cold_build_ms", (time.perf_counter() - t) * 1000, "ms", False)
+    names = itertools.cycle(BENCH_NAMES)
+    _record(results, "micro.get_normalized_pokemon.warm", throughput(lambda: get_normalized_pokemon(next(names)), min_time), "lookups/s", True)
+    # partial names go through the Kaggle-row fallback
+    partial = itertools.cycle([n[:4] for n in BENCH_NAMES])
+    _record(results, "micro.get_normalized_pokemon.partial", throughput(lambda: get_normalized_pokemon(next(partial)), min_time), "lookups/s", True)
+    # one dropped letter each: typo resolution, and the "did you mean" ranking a 404 runs
+    typo = itertools.cycle([n[:2] + n[3:] for n in BENCH_NAMES])
+    _record(results, "micro.get_normalized_pokemon.typo", throughput(lambda: get_normalized_pokemon(next(typo)), min_time), "lookups/s", True)
+    from .data_loader import suggest_names
+    _record(results, "micro.suggest_names", throughput(lambda: suggest_names(next(typo)), min_time), "lookups/s", True)
+
+
+def bench_roster_query(results: Results, min_time: float):
+    from .data_loader import get_index
+    from .bulk import select_roster
+    idx = get_index()
+    # "speed >= 100 and resists fire": vectorized when the index came from the snapshot
+    query = {"min_stats": {"speed": 100}, "resists": ["fire"]}
+    _record(results, "micro.roster_query", throughput(lambda: select_roster(idx, **query), min_time), "queries/s", True)
+
+
+def bench_damage(results: Results, min_time: float):
+    from .battle_sim import type_multiplier, compute_damage, make_instance
+    from .data_loader import get_normalized_pokemon
+    A = make_instance(get_normalized_pokemon("charizard"), None)
+    B = make_instance(get_normalized_pokemon("venusaur"), None)
+    move = A["moves"][0]
+    batch = 1000
+
+    def tm():
+        for _ in range(batch):
+            type_multiplier("fire", ["grass", "poison"])
+
+    def cd():
+        for _ in range(batch):
+            compute_damage(A, B, move, 50, False, 0.9)
+    _record(results, "micro.type_multiplier", throughput(tm, min_time) * batch, "calls/s", True)
+    _record(results, "micro.compute_damage", throughput(cd, min_time) * batch, "calls/s", True)
+
+
+def bench_cache_scans(results: Results, min_time: float):
+    from .utils import POKEAPI_CACHE, get_cache_store
+    from .data_loader import NORMALIZED_DIR
+    _record(results, "micro.scan.normalized_dir", throughput(lambda: sum(1 for _ in NORMALIZED_DIR.glob("*.json")), min_time), "scans/s", True)
+    _record(results, "micro.scan.pokeapi_dir", throughput(lambda: sum(1 for _ in POKEAPI_CACHE.glob("*.json")), min_time), "scans/s", True)
+    store = get_cache_store()
+    if store is not None:
+        _record(results, "micro.scan.cache_store_keys", throughput(lambda: sum(1 for _ in store.keys()), min_time), "scans/s", True)
+
+
+MICRO = [bench_simulate, bench_lookups, bench_roster_query, bench_damage, bench_cache_scans]
+
+
+# ---- ASGI load generator ----
+
+def route_requests() -> Dict[str, Callable[[int], Tuple[str, str, Optional[dict]]]]:
+    """route name -> i -> (method, path, json body); i varies the pokemon/seed per request."""
+    def name(i: int) -> str:
+        return BENCH_NAMES[i % len(BENCH_NAMES)]
+
+    def other(i: int) -> str:
+        return BENCH_NAMES[(i * 7 + 3) % len(BENCH_NAMES)]
+    return {
+        "discovery": lambda i: ("GET", "/.well-known/mcp", None),
+        "pokemon_data": lambda i: ("GET", f"/mcp/resources/pokemon_data/{name(i)}", None),
+        "pokemon_data_bulk": lambda i: ("POST", "/mcp/resources/pokemon_data/bulk", {"generation": 1, "fields": ["stats", "types"], "limit": 50}),
+        "simulate": lambda i: ("POST", "/mcp/tools/battle/simulate",
+                               {"pokemon_a": {"name": name(i)}, "pokemon_b": {"name": other(i)}, "options": {"seed": i + 1}}),
+        "simulate_batch": lambda i: ("POST", "/mcp/tools/battle/simulate_batch",
+                                     {"pokemon_a": {"name": name(i)}, "pokemon_b": {"name": other(i)}, "n_runs": 100, "base_seed": i}),
+        "solve": lambda i: ("POST", "/mcp/tools/battle/solve", {"pokemon_a": {"name": name(i)}, "pokemon_b": {"name": other(i)}}),
+        "simulate_team": lambda i: ("POST", "/mcp/tools/battle/simulate_team",
+                                    {"team_a": {"members": [{"name": name(i + k)} for k in range(3)]},
+                                     "team_b": {"members": [{"name": other(i + k)} for k in range(3)]}, "options": {"seed": i + 1}}),
+    }
+
+
+async def load_route(client: Any, make: Callable[[int], Tuple[str, str, Optional[dict]]], n_requests: int, concurrency: int) -> Dict[str, float]:
+    # unmeasured warm-up: response caches, simulation workers' first imports
+    for i in range(concurrency):
+        method, path, body = make(n_requests + i)
+        await client.request(method, path, json=body)
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, body = make(i)
+            t = time.perf_counter()
+            r = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - t) * 1000)
+            if r.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    xs = sorted(latencies)
+    return {"rps": len(xs) / elapsed, "p50_ms": percentile(xs, 0.5), "p95_ms": percentile(xs, 0.95),
+            "p99_ms": percentile(xs, 0.99), "errors": errors}
+
+
+async def run_load(results: Results, n_requests: int, concurrency: int, routes: Optional[List[str]] = None):
+    import httpx
+    from .server import app
+    # ASGITransport doesn't send lifespan events, run startup/shutdown ourselves
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for route, make in route_requests().items():
+                if routes and route not in routes:
+                    continue
+                stats = await load_route(client, make, n_requests, concurrency)
+                _record(results, f"load.{route}.rps", stats["rps"], "req/s", True)
+                for q in ("p50_ms", "p95_ms", "p99_ms"):
+                    _record(results, f"load.{route}.{q}", stats[q], "ms", False)
+                _record(results, f"load.{route}.errors", stats["errors"], "count", False)
+
+
+# ---- startup ----
+
+# run in a fresh interpreter: import the app, run its startup, answer one request over raw ASGI
+STARTUP_CHILD = r"""
+import asyncio, json, resource, sys, time
+t0 = time.perf_counter()
+from src.server import app
+t1 = time.perf_counter()
+
+async def main():
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    path = "/mcp/resources/pokemon_data/pikachu"
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+             "server": ("bench", 80), "client": ("bench", 1)}
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+        await app(scope, receive, send)
+        return t2, time.perf_counter(), sent[0]["status"]
+
+t2, t3, status = asyncio.run(main())
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "ready_ms": (t2 - t0) * 1000, "first_response_ms": (t3 - t0) * 1000,
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "status": status,
+                  "modules": len(sys.modules), "heavy_imports": sum(m in sys.modules for m in ("pandas", "httpx"))}))
+"""
+
+
+def bench_startup(results: Results, runs: int = 3):
+    """Cold start of the server process (best of `runs`), simulations in-thread so no pool is spawned."""
+    root = Path(__file__).resolve().parents[1]
+    env = {**os.environ, "SIM_WORKERS": "0", "PYTHONPATH": str(root) + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-W", "ignore", "-c", STARTUP_CHILD], cwd=root, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    for key in ("import_ms", "ready_ms", "first_response_ms", "max_rss_mb"):
+        _record(results, f"startup.{key}", min(s[key] for s in samples), "MB" if key == "max_rss_mb" else "ms", False)
+    _record(results, "startup.modules", min(s["modules"] for s in samples), "modules", False)
+    # pandas / httpx pulled in by the serving path
+    _record(results, "startup.heavy_imports", max(s["heavy_imports"] for s in samples), "count", False)
+    _record(results, "startup.errors", sum(s["status"] != 200 for s in samples), "count", False)
+
+
+# ---- scaling ----
+
+def _pss_mb(pid: int) -> Optional[float]:
+    # proportional set size: pages shared with other processes (the mmap'd snapshot) are split between them
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def _scaling_round(executor, batches, big) -> Tuple[float, float]:
+    from .batch_sim import simulate_batch, split_batch, merge_batches
+    start = time.perf_counter()
+    await asyncio.gather(*(executor.run(simulate_batch, b, key=f"{b.pokemon_a.name}|{b.pokemon_b.name}") for b in batches))
+    routed = time.perf_counter() - start
+    start = time.perf_counter()
+    parts = await executor.run_sharded(simulate_batch, [(p,) for p in split_batch(big, executor.shards)])
+    merge_batches(parts, big.base_seed)
+    return routed, time.perf_counter() - start
+
+
+def bench_scaling(results: Results, worker_counts: List[int], runs_per_batch: int = 200, big_runs: int = 8000):
+    """
+    Matchup-routed shards (SIM_ROUTING=matchup) at each worker count: throughput of many
+    distinct batches routed by matchup key, and one big batch split over every shard.
+    """
+    from .offload import SimulationExecutor
+    from .schemas import BatchBattleRequest, BattlePokemonInstance
+    pairs = [(a, b) for a in BENCH_NAMES for b in BENCH_NAMES if a != b][:32]
+    batches = [BatchBattleRequest(pokemon_a=BattlePokemonInstance(name=a), pokemon_b=BattlePokemonInstance(name=b),
+                                  n_runs=runs_per_batch, base_seed=i) for i, (a, b) in enumerate(pairs)]
+    big = BatchBattleRequest(pokemon_a=BattlePokemonInstance(name="pikachu"), pokemon_b=BattlePokemonInstance(name="charizard"),
+                             n_runs=big_runs, base_seed=1)
+    split_base = None
+    for n in worker_counts:
+        executor = SimulationExecutor(n, max_queue=len(batches) + n, routing="matchup")
+        executor.start()
+        try:
+            asyncio.run(_scaling_round(executor, batches[:n], big.model_copy(update={"n_runs": 100 * n})))  # warm-up
+            routed, split = asyncio.run(_scaling_round(executor, batches, big))
+            pss = [_pss_mb(pid) for pool in executor._pools for pid in pool._processes]
+        finally:
+            executor.shutdown()
+        split_base = split_base or split
+        _record(results, f"scaling.w{n}.routed_battles_per_s", len(batches) * runs_per_batch / routed, "battles/s", True)
+        _record(results, f"scaling.w{n}.split_batch_ms", split * 1000, "ms", False)
+        _record(results, f"scaling.w{n}.split_speedup", split_base / split, "x", True)
+        if pss and None not in pss:
+            _record(results, f"scaling.w{n}.worker_pss_mb", sum(pss) / len(pss), "MB", False)
+
+
+# ---- baselines ----
+
+def compare(current: Results, baseline: Results, max_regression: float, thresholds: Dict[str, float]) -> List[str]:
+    """Human-readable failures for metrics that got worse than allowed; metrics missing on either side are skipped."""
+    failures = []
+    for name, cur in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = thresholds.get(name, max_regression)
+        b, c = base["value"], cur["value"]
+        if cur["unit"] == "count":
+            if c > b:
+                failures.append(f"{name}: {b:g} -> {c:g}")
+            continue
+        if b <= 0:
+            continue
+        change = (b - c) / b if cur["higher_is_better"] else (c - b) / b
+        if change > limit:
+            failures.append(f"{name}: {b:g} -> {c:g} {cur['unit']} ({change:+.0%} worse, limit {limit:.0%})")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Simulator and server benchmarks")
+    ap.add_argument("--only", choices=["micro", "load", "startup", "scaling"], help="scaling only runs when asked for")
+    ap.add_argument("--routes", help="comma-separated load routes (default: all)")
+    ap.add_argument("--requests", type=int, default=200, help="requests per route")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts for --only scaling")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds per microbenchmark")
+    ap.add_argument("--save", type=Path, help="write results JSON here")
+    ap.add_argument("--compare", type=Path, help="baseline JSON to check against")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="allowed fractional slowdown per metric")
+    ap.add_argument("--threshold", action="append", default=[], metavar="METRIC=FRACTION", help="per-metric override")
+    args = ap.parse_args(argv)
+
+    random.seed(0)
+    results: Results = {}
+    if args.only in (None, "micro"):
+        for bench in MICRO:
+            bench(results, args.min_time)
+    if args.only in (None, "load"):
+        routes = args.routes.split(",") if args.routes else None
+        asyncio.run(run_load(results, args.requests, args.concurrency, routes))
+    if args.only in (None, "startup"):
+        bench_startup(results)
+    if args.only == "scaling":
+        bench_scaling(results, [int(w) for w in args.workers.split(",")])
+
+    for name, r in results.items():
+        print(f"{name:48s} {r['value']:>14,.2f} {r['unit']}")
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(), "time": time.time(),
+                       "requests": args.requests, "concurrency": args.concurrency}, "results": results}
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        thresholds = {k: float(v) for k, v in (t.split("=", 1) for t in args.threshold)}
+        failures = compare(results, baseline, args.max_regression, thresholds)
+        for line in failures:
+            print("REGRESSION", line)
+        if failures:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
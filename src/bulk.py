@@ -0,0 +1,106 @@
+"""
+Helpers for the bulk pokemon_data endpoint: filters, field projection and
+opaque offset cursors over a stable roster order (pokedex number, then name).
+Roster-wide filtering runs on the columnar snapshot when the index has one.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from .pokemon_index import PokemonIndex
+from .schemas import PokemonResource, Stats
+from .battle_sim import TYPE_INDEX, defender_products, type_index
+import base64
+import json
+
+RESOURCE_FIELDS = tuple(PokemonResource.model_fields)
+STAT_NAMES = tuple(Stats.model_fields)
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["o"]
+    except Exception:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return offset
+
+
+def check_fields(fields: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """Requested projection in schema order (name always included), None for every field."""
+    if not fields:
+        return None
+    unknown = set(fields) - set(RESOURCE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields {sorted(unknown)}; available: {', '.join(RESOURCE_FIELDS)}")
+    wanted = set(fields) | {"name"}
+    if wanted == set(RESOURCE_FIELDS):
+        return None
+    return tuple(f for f in RESOURCE_FIELDS if f in wanted)
+
+
+def check_filters(min_stats: Optional[Dict[str, int]], max_stats: Optional[Dict[str, int]], resists: Optional[List[str]]):
+    for bound in (min_stats, max_stats):
+        unknown = set(bound or ()) - set(STAT_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown stats {sorted(unknown)}; available: {', '.join(STAT_NAMES)}")
+    unknown = [t for t in resists or () if type_index(t) is None]
+    if unknown:
+        raise ValueError(f"Unknown types {unknown}; available: {', '.join(TYPE_INDEX)}")
+
+
+def project(data: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    return {f: data[f] for f in fields}
+
+
+def matches(p: Dict[str, Any], generation: Optional[int] = None, type: Optional[str] = None, legendary: Optional[bool] = None,
+            min_stats: Optional[Dict[str, int]] = None, max_stats: Optional[Dict[str, int]] = None,
+            resists: Optional[List[str]] = None) -> bool:
+    if generation is not None and p.get("generation") != generation:
+        return False
+    if type is not None and type.lower() not in (t.lower() for t in p.get("types", [])):
+        return False
+    if legendary is not None and bool(p.get("legendary", False)) != legendary:
+        return False
+    stats = p.get("stats", {})
+    if any(stats.get(k, 0) < v for k, v in (min_stats or {}).items()):
+        return False
+    if any(stats.get(k, 0) > v for k, v in (max_stats or {}).items()):
+        return False
+    if resists:
+        products = defender_products(p.get("types", []))
+        if any(products[type_index(t)] >= 1.0 for t in resists):
+            return False
+    return True
+
+
+def select_roster(idx: PokemonIndex, **filters: Any) -> List[str]:
+    """Keys of every record passing the filters, in roster_order."""
+    order = roster_order(idx)
+    snap = idx.snapshot
+    if snap is None:
+        return [k for k in order if matches(idx.record(k), **filters)]
+    hits = set(snap.select(**filters))
+    return [k for k in order if k in hits]
+
+
+# (index, record count, order): rebuilt when the index is replaced or gains records
+_order_cache: Optional[Tuple[PokemonIndex, int, List[str]]] = None
+
+
+def roster_order(idx: PokemonIndex) -> List[str]:
+    global _order_cache
+    cached = _order_cache
+    if cached is not None and cached[0] is idx and cached[1] == len(idx):
+        return cached[2]
+
+    def key(k: str):
+        number = idx.record(k).get("number")
+        return (number if number is not None else 1 << 30, k)
+    order = sorted(idx.keys(), key=key)
+    _order_cache = (idx, len(idx), order)
+    return order
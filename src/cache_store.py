@@ -0,0 +1,143 @@
+"""
+Single-file PokeAPI cache: one SQLite table of zlib-compressed, compact JSON
+payloads keyed like the old files (cache_path_for(...).stem, e.g. "move__85").
+
+Payloads can be projected at write time down to the fields data_loader and the
+battle engine actually read, which is where most of the size goes (the raw
+pokemon payloads carry every version/game index).
+
+    python -m src.cache_store migrate            # import data/cache/pokeapi/*.json
+    python -m src.cache_store migrate --no-project
+    python -m src.cache_store stats
+"""
+from typing import Dict, Any, Optional, Iterator, Tuple
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import zlib
+
+# fields kept per endpoint kind when projecting; kinds not listed are stored whole
+PROJECTIONS: Dict[str, Tuple[str, ...]] = {
+    "pokemon": ("id", "name", "types", "species", "moves"),
+    "pokemon-species": ("id", "name", "evolution_chain", "generation", "is_legendary", "is_mythical", "varieties"),
+    "move": ("id", "name", "power", "accuracy", "pp", "priority", "type", "damage_class", "effect_chance", "effect_entries", "meta"),
+}
+
+
+def project_payload(key: str, data: Any) -> Any:
+    kind = key.split("__", 1)[0]
+    fields = PROJECTIONS.get(kind)
+    if fields is None or not isinstance(data, dict):
+        return data
+    out = {k: data[k] for k in fields if k in data}
+    if kind == "pokemon" and "moves" in out:
+        # only the move reference is used, version_group_details is most of the payload
+        out["moves"] = [{"move": m.get("move")} for m in out["moves"]]
+    if kind == "move" and "effect_entries" in out:
+        out["effect_entries"] = [{"short_effect": e.get("short_effect"), "language": e.get("language")} for e in out["effect_entries"]]
+    return out
+
+
+def encode(data: Any) -> bytes:
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class SqliteCacheStore:
+    def __init__(self, path: Path, project: bool = True):
+        self.path = Path(path)
+        self.project = project
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self._conn().commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (writes also come from asyncio.to_thread workers)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+        return decode(row[0]) if row else None
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """The stored (compressed) blob, for change detection without decoding."""
+        row = self._conn().execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put(self, key: str, data: Any):
+        if self.project:
+            data = project_payload(key, data)
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO entries (key, data) VALUES (?, ?)", (key, encode(data)))
+        conn.commit()
+
+    def put_many(self, items: Iterator[Tuple[str, Any]]) -> int:
+        conn = self._conn()
+        n = 0
+        with conn:
+            for key, data in items:
+                if self.project:
+                    data = project_payload(key, data)
+                conn.execute("INSERT OR REPLACE INTO entries (key, data) VALUES (?, ?)", (key, encode(data)))
+                n += 1
+        return n
+
+    def __contains__(self, key: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def keys(self, prefix: str = "") -> Iterator[str]:
+        for (k,) in self._conn().execute("SELECT key FROM entries WHERE key LIKE ? ORDER BY key", (prefix + "%",)):
+            yield k
+
+    def compact(self):
+        conn = self._conn()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self) -> Dict[str, Any]:
+        n, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM entries").fetchone()
+        return {"entries": n, "payload_bytes": size, "file_bytes": self.path.stat().st_size}
+
+
+def migrate_directory(src_dir: Path, store: SqliteCacheStore) -> Dict[str, Any]:
+    """Import every {key}.json in src_dir into the store. Files are left in place."""
+    files = sorted(Path(src_dir).glob("*.json"))
+    src_bytes = sum(p.stat().st_size for p in files)
+
+    def items():
+        for p in files:
+            with open(p, "r", encoding="utf-8") as f:
+                yield p.stem, json.load(f)
+
+    n = store.put_many(items())
+    store.compact()
+    return {"imported": n, "source_bytes": src_bytes, **store.stats()}
+
+
+if __name__ == "__main__":
+    import argparse
+    from .utils import POKEAPI_CACHE, POKEAPI_CACHE_DB
+    ap = argparse.ArgumentParser(description="Manage the single-file PokeAPI cache")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="import the per-endpoint JSON directory")
+    m.add_argument("--src", type=Path, default=POKEAPI_CACHE)
+    m.add_argument("--db", type=Path, default=POKEAPI_CACHE_DB)
+    m.add_argument("--no-project", action="store_true", help="store raw payloads unprojected")
+    st = sub.add_parser("stats")
+    st.add_argument("--db", type=Path, default=POKEAPI_CACHE_DB)
+    args = ap.parse_args()
+    if args.cmd == "migrate":
+        print(migrate_directory(args.src, SqliteCacheStore(args.db, project=not args.no_project)))
+    else:
+        print(SqliteCacheStore(args.db).stats())
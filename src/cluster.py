@@ -0,0 +1,52 @@
+"""
+Single-box multi-worker deployment:
+
+    python -m src.cluster --workers 4 [--http-workers 2] [--serve-only]
+
+The supervisor makes sure data/snapshot is current before any worker starts, so
+every process (HTTP workers and simulation shards alike) loads the roster by
+mmap'ing the same read-only .npy files: one copy in the page cache, no pandas,
+no per-process parse of data/normalized. Simulations then run on --workers
+single-process shards with SIM_ROUTING=matchup (see offload.py): a matchup
+always lands on the same shard and big batches are split across all of them.
+"""
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+
+def prepare_snapshot() -> dict:
+    """Build data/snapshot unless the current one still matches data/normalized + the CSV."""
+    from .data_loader import NORMALIZED_DIR, DATA_RAW, write_roster_snapshot
+    from .roster_snapshot import load_snapshot
+    snap = load_snapshot(NORMALIZED_DIR, DATA_RAW)
+    if snap is not None:
+        return {"rebuilt": False, "rows": len(snap)}
+    return {"rebuilt": True, **write_roster_snapshot()}
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Run the server with sharded simulation workers over a shared roster snapshot")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="simulation shards (one process each)")
+    ap.add_argument("--http-workers", type=int, default=1, help="uvicorn worker processes; each gets its own set of shards")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--serve-only", action="store_true", help="never fetch from PokeAPI or write normalized data")
+    args = ap.parse_args()
+
+    # read at import time by utils/offload, and inherited by every worker process
+    os.environ["SIM_WORKERS"] = str(args.workers)
+    os.environ["SIM_ROUTING"] = "matchup"
+    if args.serve_only:
+        os.environ["SERVE_ONLY"] = "1"
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    log.info("roster snapshot: %s", prepare_snapshot())
+    import uvicorn
+    uvicorn.run("src.server:app", host=args.host, port=args.port, workers=args.http_workers)
+
+
+if __name__ == "__main__":
+    main()
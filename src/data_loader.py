@@ -1,29 +1,33 @@
-import pandas as pd
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 from .pokeapi_client import get_pokemon_data_from_api, get_species_from_api, get_move_from_api, get_evolution_chain_by_url
-from .utils import ensure_dirs, write_json_file
+from .utils import file_lock, write_json_file, SERVE_ONLY
+from .pokemon_index import PokemonIndex
+from .name_index import normalize_name
+from .move_db import get_move_db
+from .roster_snapshot import load_snapshot, write_snapshot
+from .metrics import span, inc
 import json
-import re
+import threading
 
-ensure_dirs()
+# pandas is only needed to read the Kaggle CSV (normalization, or no usable roster snapshot)
+if TYPE_CHECKING:
+    import pandas as pd
 
 DATA_RAW = Path(__file__).resolve().parents[1] / "data" / "raw" / "All_Pokemon.csv"
 NORMALIZED_DIR = Path(__file__).resolve().parents[1] / "data" / "normalized"
-NORMALIZED_DIR.mkdir(parents=True, exist_ok=True)
 
-def normalize_name(n: str) -> str:
-    return re.sub(r"[^a-z0-9\-]", "", n.lower().replace(" ", "-"))
-
-def load_kaggle_dataframe() -> pd.DataFrame:
+def load_kaggle_dataframe() -> "pd.DataFrame":
     if not DATA_RAW.exists():
         raise FileNotFoundError(f"Place the Kaggle CSV at {DATA_RAW}")
+    import pandas as pd
     df = pd.read_csv(DATA_RAW)
     # drop rows without Name
     df = df[df["Name"].notna()]
     return df
 
 def parse_abilities(cell: Any) -> List[str]:
+    import pandas as pd
     if pd.isna(cell):
         return []
     if isinstance(cell, str):
@@ -31,7 +35,8 @@ def parse_abilities(cell: Any) -> List[str]:
         return [a.strip() for a in cell.split(",") if a.strip()]
     return []
 
-def build_basic_from_row(row: pd.Series) -> Dict[str, Any]:
+def build_basic_from_row(row: "pd.Series") -> Dict[str, Any]:
+    import pandas as pd
     types = []
     t1 = row.get("Type 1")
     t2 = row.get("Type 2")
@@ -57,20 +62,46 @@ def build_basic_from_row(row: pd.Series) -> Dict[str, Any]:
     }
     return obj
 
+# try to fetch detailed move info for top N moves (limit to e.g., 8 to save time)
+MOVE_DETAIL_LIMIT = 8
+
+def move_names_from_api(api_poke: Optional[Dict[str, Any]]) -> List[str]:
+    # moves: list of dicts with move name and url - we'll fetch move details lazily/truncate
+    if not api_poke:
+        return []
+    return [m.get("move", {}).get("name") for m in api_poke.get("moves", [])][:MOVE_DETAIL_LIMIT]
+
+def build_move_entry(move_name: Optional[str], move_data: Optional[Dict[str, Any]], basic: Dict[str, Any]) -> Dict[str, Any]:
+    if move_data:
+        return {
+            "name": move_data.get("name"),
+            "power": move_data.get("power"),
+            "accuracy": move_data.get("accuracy"),
+            "type": move_data.get("type", {}).get("name") if move_data.get("type") else None,
+            "category": move_data.get("damage_class", {}).get("name") if move_data.get("damage_class") else None,
+            "effect": (move_data.get("effect_entries") or [{}])[0].get("short_effect") if move_data.get("effect_entries") else None
+        }
+    # fallback minimal move object
+    return {
+        "name": move_name or "tackle",
+        "power": 40,
+        "accuracy": 100,
+        "type": basic["types"][0].lower() if basic.get("types") else "normal",
+        "category": "physical",
+        "effect": None
+    }
+
+def assemble_enriched(basic: Dict[str, Any], detailed_moves: List[Dict[str, Any]], evolution_chain: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    out = dict(basic)
+    out["moves"] = detailed_moves
+    out["evolution_chain"] = evolution_chain
+    return out
+
 def enrich_with_pokeapi(name: str, basic: Dict[str, Any]) -> Dict[str, Any]:
     # attempt to fetch moves & evolution from pokeapi
     api_poke = get_pokemon_data_from_api(name)
-    moves_list = []
     evolution_chain = None
 
-    if api_poke:
-        # moves: list of dicts with move name and url - we'll fetch move details lazily/truncate
-        for m in api_poke.get("moves", []):
-            move_entry = m.get("move", {})
-            moves_list.append({"name": move_entry.get("name"), "url": move_entry.get("url")})
-    else:
-        moves_list = []
-
     # species -> evolution chain
     species = get_species_from_api(name)
     if species:
@@ -79,68 +110,140 @@ def enrich_with_pokeapi(name: str, basic: Dict[str, Any]) -> Dict[str, Any]:
             chain = get_evolution_chain_by_url(evo.get("url"))
             evolution_chain = chain
 
-    # try to fetch detailed move info for top N moves (limit to e.g., 8 to save time)
     detailed_moves = []
-    limit = 8
-    for i, m in enumerate(moves_list[:limit]):
-        move_name = m.get("name")
+    for move_name in move_names_from_api(api_poke):
         move_data = get_move_from_api(move_name) if move_name else None
-        if move_data:
-            detailed_moves.append({
-                "name": move_data.get("name"),
-                "power": move_data.get("power"),
-                "accuracy": move_data.get("accuracy"),
-                "type": move_data.get("type", {}).get("name") if move_data.get("type") else None,
-                "category": move_data.get("damage_class", {}).get("name") if move_data.get("damage_class") else None,
-                "effect": (move_data.get("effect_entries") or [{}])[0].get("short_effect") if move_data.get("effect_entries") else None
-            })
-        else:
-            # fallback minimal move object
-            detailed_moves.append({
-                "name": move_name or "tackle",
-                "power": 40,
-                "accuracy": 100,
-                "type": basic["types"][0].lower() if basic.get("types") else "normal",
-                "category": "physical",
-                "effect": None
-            })
+        detailed_moves.append(build_move_entry(move_name, move_data, basic))
 
-    out = dict(basic)
-    out["moves"] = detailed_moves
-    out["evolution_chain"] = evolution_chain
-    return out
+    return assemble_enriched(basic, detailed_moves, evolution_chain)
 
 def normalize_all_and_write():
-    df = load_kaggle_dataframe()
-    for _, row in df.iterrows():
-        basic = build_basic_from_row(row)
-        name = basic["name"]
-        try:
-            enriched = enrich_with_pokeapi(name, basic)
-        except Exception:
-            enriched = basic
-        safe = normalize_name(name)
-        write_json_file(NORMALIZED_DIR / f"{safe}.json", enriched)
+    # concurrent asyncio pipeline, see async_ingest.py
+    import asyncio
+    from .async_ingest import normalize_all_async
+    return asyncio.run(normalize_all_async())
 
-def get_normalized_pokemon(name: str) -> Optional[Dict[str, Any]]:
+# resident index: built once (server startup or first lookup), no disk reads on the request path
+_index: Optional[PokemonIndex] = None
+_index_lock = threading.Lock()
+
+def _read_normalized_dir() -> Dict[str, Dict[str, Any]]:
+    records = {}
+    moves = get_move_db()
+    for p in sorted(NORMALIZED_DIR.glob("*.json")):
+        with open(p, "r", encoding="utf-8") as f:
+            records[p.stem] = moves.resolve(json.load(f))
+    return records
+
+def _read_kaggle_basics() -> List[Dict[str, Any]]:
+    try:
+        df = load_kaggle_dataframe()
+    except FileNotFoundError:
+        return []
+    return [build_basic_from_row(row) for _, row in df.iterrows()]
+
+def build_index() -> PokemonIndex:
+    with span("data.index_build"):
+        # columnar snapshot when it is current, else the JSON files + CSV
+        snap = load_snapshot(NORMALIZED_DIR, DATA_RAW)
+        if snap is not None:
+            moves = get_move_db()
+            records = {k: moves.resolve(r) for k, r in zip(snap.keys, snap.records("roster"))}
+            return PokemonIndex(records, list(snap.records("basics")), snapshot=snap)
+        return PokemonIndex(_read_normalized_dir(), _read_kaggle_basics())
+
+def write_roster_snapshot() -> Dict[str, Any]:
+    """Rewrite data/snapshot from data/normalized + the Kaggle CSV."""
+    return write_snapshot(NORMALIZED_DIR, DATA_RAW, _read_kaggle_basics())
+
+def get_index() -> PokemonIndex:
+    global _index
+    idx = _index
+    if idx is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_index()
+            idx = _index
+    return idx
+
+def reload_index() -> PokemonIndex:
+    """Rebuild the whole index from disk (e.g. after normalize_all_and_write)."""
+    global _index
+    idx = build_index()
+    with _index_lock:
+        _index = idx
+    return idx
+
+def invalidate_pokemon(name: str):
+    """Re-read a single normalized record from disk, or forget it if the file is gone."""
+    idx = get_index()
     safe = normalize_name(name)
     p = NORMALIZED_DIR / f"{safe}.json"
     if p.exists():
         with open(p, "r", encoding="utf-8") as f:
-            return json.load(f)
-    # try building on the fly
-    df = load_kaggle_dataframe()
-    row = df[df["Name"].str.lower() == name.lower()]
-    if row.empty:
-        # try partial match
-        row = df[df["Name"].str.lower().str.contains(name.lower())]
-        if row.empty:
-            return None
-    row0 = row.iloc[0]
-    basic = build_basic_from_row(row0)
-    try:
-        enriched = enrich_with_pokeapi(basic["name"], basic)
-    except Exception:
-        enriched = basic
-    write_json_file(NORMALIZED_DIR / f"{normalize_name(basic['name'])}.json", enriched)
-    return enriched
+            idx.put(safe, get_move_db().resolve(json.load(f)))
+    else:
+        idx.drop(safe)
+
+def get_resident_pokemon(name: str) -> Optional[Dict[str, Any]]:
+    """get_normalized_pokemon without the build-on-the-fly fallback: never blocks."""
+    idx = get_index()
+    rec = idx.record(normalize_name(name))
+    if rec is not None:
+        return rec
+    basic = idx.match_row(name)
+    return idx.record(normalize_name(basic["name"])) if basic is not None else None
+
+def suggest_names(name: str, limit: int = 5) -> List[str]:
+    """Closest known names to one that didn't resolve, best first ("did you mean")."""
+    return get_index().suggest(name, limit)
+
+async def get_normalized_pokemon_async(name: str) -> Optional[Dict[str, Any]]:
+    # resident hit answers inline; a miss may enrich from PokeAPI, keep that off the event loop
+    rec = get_resident_pokemon(name)
+    if rec is not None:
+        return rec
+    import asyncio
+    return await asyncio.to_thread(get_normalized_pokemon, name)
+
+def get_normalized_pokemon(name: str) -> Optional[Dict[str, Any]]:
+    idx = get_index()
+    safe = normalize_name(name)
+    rec = idx.record(safe)
+    if rec is not None:
+        inc("data.index_hits")
+        return rec
+    basic = idx.match_row(name)
+    if basic is None:
+        inc("data.not_found")
+        return None
+    key = normalize_name(basic["name"])
+    rec = idx.record(key)
+    if rec is not None:
+        inc("data.index_hits")
+        return rec
+    if SERVE_ONLY:
+        # a Kaggle row without a prebuilt record: don't fetch or write anything
+        inc("data.not_found")
+        return None
+    # try building on the fly; the lock keeps workers that miss the same key from building it twice
+    with span("data.build_on_miss"), file_lock(f"normalized-{key}"):
+        path = NORMALIZED_DIR / f"{key}.json"
+        if path.exists():
+            # another process wrote it after our index was built
+            with open(path, "r", encoding="utf-8") as f:
+                rec = get_move_db().resolve(json.load(f))
+            idx.put(key, rec)
+            return rec
+        inc("data.built_on_miss")
+        basic = dict(basic)
+        try:
+            enriched = enrich_with_pokeapi(basic["name"], basic)
+        except Exception:
+            enriched = basic
+        moves = get_move_db()
+        write_json_file(path, moves.to_stored(enriched))
+        # hand out the stored object: the response cache checks records by identity
+        rec = moves.resolve(enriched)
+        idx.put(key, rec)
+    return rec
@@ -0,0 +1,171 @@
+"""
+Exact 1v1 outcome probabilities without sampling.
+
+With random (or fixed, requested) move choice and statuses fixed for the
+battle, run_battle is a Markov chain over (hp_a, hp_b). Each side's action
+this turn has a small damage distribution: move pick x paralysis skip x
+accuracy x crit x the continuous 0.85-1.0 roll, which floor() maps to a handful
+of integers with exactly computable probabilities. The first mover's damage
+is independent of the second's, so a turn is a pair of 1-D distributions.
+
+solve_matchup pushes the probability mass over the HP grid one turn at a time;
+the two hits are applied one after the other (one numpy slice per damage value) until the remaining mass is below
+TOLERANCE or max_turns is reached, where decide_winner's HP comparison
+settles what is left. Results are cached per matchup.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from .schemas import BattleRequest, ExactBattleResult
+from .data_loader import get_normalized_pokemon
+from .metrics import span, inc
+from .battle_sim import PARALYSIS_SKIP, CRIT_CHANCE, CRIT_MULT, RAND_LOW, RAND_HIGH
+from .vector_sim import build_tables
+import math
+import threading
+import numpy as np
+
+# live mass left below this is reported as residual instead of simulated further
+TOLERANCE = 1e-12
+CACHE_SIZE = 4096
+
+
+def roll_distribution(k: float) -> Dict[int, float]:
+    """Distribution of max(1, floor(k * r)) for r ~ U(RAND_LOW, RAND_HIGH)."""
+    width = RAND_HIGH - RAND_LOW
+    lo, hi = k * RAND_LOW, k * RAND_HIGH
+    if hi - lo <= 0:
+        return {max(1, math.floor(lo)): 1.0}
+    out: Dict[int, float] = {}
+    d = math.floor(lo)
+    while d <= hi:
+        # share of the roll interval where d <= k*r < d+1
+        p = (min(hi, d + 1) - max(lo, d)) / (hi - lo)
+        if p > 0:
+            out[max(1, d)] = out.get(max(1, d), 0.0) + p
+        d += 1
+    return out
+
+
+def action_distribution(row: Dict[str, np.ndarray], side: str) -> List[Tuple[int, float]]:
+    """(damage, probability) for one side's action in a turn, 0 = skipped/missed/no damage."""
+    n_moves = int(row[f"n_moves_{side}"])
+    fixed = int(row[f"fixed_{side}"])
+    picks = [(fixed, 1.0)] if fixed >= 0 else [(k, 1.0 / n_moves) for k in range(n_moves)]
+    p_act = 1 - PARALYSIS_SKIP if row[f"par_{side}"] else 1.0
+    dist: Dict[int, float] = {}
+    for k, p_pick in picks:
+        p_hit = p_act * min(1.0, float(row[f"acc_{side}"][k]))
+        dist[0] = dist.get(0, 0.0) + p_pick * (1 - p_hit)
+        if bool(row[f"zero_{side}"][k]):
+            dist[0] += p_pick * p_hit
+            continue
+        base, mod = float(row[f"base_{side}"][k]), float(row[f"mod_{side}"][k])
+        for crit, p_crit in ((1.0, 1 - CRIT_CHANCE), (CRIT_MULT, CRIT_CHANCE)):
+            for dmg, p_roll in roll_distribution(base * mod * crit).items():
+                dist[dmg] = dist.get(dmg, 0.0) + p_pick * p_hit * p_crit * p_roll
+    return sorted((d, p) for d, p in dist.items() if p > 0)
+
+
+def solve_tables(row: Dict[str, np.ndarray], max_turns: int) -> Dict[str, float]:
+    """Forward DP over the HP grid for one build_tables row (scalars / per-move lists)."""
+    a_first = bool(row["a_first"])
+    # x = first mover's hp, y = second mover's hp
+    f, s = ("a", "b") if a_first else ("b", "a")
+    hx, hy = int(row[f"hp_{f}"]), int(row[f"hp_{s}"])
+    chip_x, chip_y = int(row[f"chip_{f}"]), int(row[f"chip_{s}"])
+    first = action_distribution(row, f)
+    second = action_distribution(row, s)
+
+    P = np.zeros((hx + 1, hy + 1))
+    P[hx, hy] = 1.0
+    xs = np.arange(hx + 1)
+    wins_x = wins_y = draws = expected_turns = 0.0
+    live = 1.0
+    turn = 0
+    while turn < max_turns and live > TOLERANCE:
+        turn += 1
+        # first mover hits y: Q[x, y1] is the mass at y1 = y - d1 >= 1, killed[x] the mass knocked out
+        Q = np.zeros_like(P)
+        killed = np.zeros(hx + 1)
+        for d1, p1 in first:
+            if d1 == 0:
+                Q += P * p1
+                continue
+            killed += P[:, 1:min(d1, hy) + 1].sum(axis=1) * p1
+            if d1 < hy:
+                Q[:, 1:hy + 1 - d1] += P[:, d1 + 1:] * p1
+        # a knocked-out second mover doesn't act; chip still applies to the first
+        survive = xs - chip_x > 0
+        absorbed_x = killed[survive].sum()
+        absorbed_y = 0.0
+        absorbed_draw = killed[~survive].sum()
+        # end-of-turn chip on y: columns 1..chip_y end at 0 hp
+        y_dead = Q[:, 1:chip_y + 1].sum(axis=1)
+        y_live = Q[:, chip_y + 1:]
+        new = np.zeros_like(P)
+        # second mover hits x, then chip on x
+        for d2, p2 in second:
+            dx = d2 + chip_x
+            cut_x = min(dx, hx) + 1  # rows x <= dx end at 0 hp
+            if cut_x <= hx:
+                new[1:hx + 1 - dx, 1:hy + 1 - chip_y] += y_live[cut_x:] * p2
+                absorbed_x += y_dead[cut_x:].sum() * p2
+            absorbed_y += y_live[:cut_x].sum() * p2
+            absorbed_draw += y_dead[:cut_x].sum() * p2
+        wins_x += absorbed_x
+        wins_y += absorbed_y
+        draws += absorbed_draw
+        expected_turns += turn * (absorbed_x + absorbed_y + absorbed_draw)
+        P = new
+        live = P.sum()
+
+    cap_prob = 0.0
+    if turn >= max_turns and live > 0:
+        # decide_winner at the turn cap: raw HP comparison
+        cap_prob = live
+        diff = xs[:, None] - np.arange(hy + 1)[None, :]
+        wins_x += P[diff > 0].sum()
+        wins_y += P[diff < 0].sum()
+        draws += P[diff == 0].sum()
+        expected_turns += turn * live
+        live = 0.0
+    win_a, win_b = (wins_x, wins_y) if a_first else (wins_y, wins_x)
+    return {"win_prob_a": win_a, "win_prob_b": win_b, "draw_prob": draws, "expected_turns": expected_turns,
+            "turn_cap_prob": cap_prob, "residual": live, "states": (hx + 1) * (hy + 1)}
+
+
+_cache: "OrderedDict[tuple, Tuple[Any, Any, Dict[str, float]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _matchup_key(inst: Any) -> tuple:
+    return (inst.name.lower(), inst.level, tuple(inst.moves or ()), (inst.status or "").lower())
+
+
+def solve_matchup(request: BattleRequest) -> Optional[ExactBattleResult]:
+    """Exact result for request's matchup (seed is ignored); None when either pokemon is unknown."""
+    ra, rb = request.pokemon_a, request.pokemon_b
+    opt = request.options
+    max_turns = (opt.max_turns if opt else None) or 200
+    p_a_data = get_normalized_pokemon(ra.name)
+    p_b_data = get_normalized_pokemon(rb.name)
+    if not p_a_data or not p_b_data:
+        return None
+    key = (_matchup_key(ra), _matchup_key(rb), max_turns)
+    entry = _cache.get(key)
+    # entries remember the records they were solved from, a reloaded record re-solves
+    if entry is not None and entry[0] is p_a_data and entry[1] is p_b_data:
+        with _cache_lock:
+            _cache.move_to_end(key)
+        inc("exact_cache.hits")
+        return ExactBattleResult(pokemon_a=p_a_data["name"], pokemon_b=p_b_data["name"], cached=True, **entry[2])
+    inc("exact_cache.misses")
+    with span("sim.exact_solve"):
+        tables = build_tables([(p_a_data, ra, p_b_data, rb)])
+        row = {k: v[0] for k, v in tables.items()}
+        result = solve_tables(row, max_turns)
+    with _cache_lock:
+        _cache[key] = (p_a_data, p_b_data, result)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ExactBattleResult(pokemon_a=p_a_data["name"], pokemon_b=p_b_data["name"], cached=False, **result)
@@ -0,0 +1,74 @@
+"""
+Background admin jobs (normalization, matchup matrix builds) with a status endpoint
+instead of holding an HTTP request open for the whole run.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import inspect
+import time
+import uuid
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "running"
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "kind": self.kind, "status": self.status, "started": self.started,
+                "finished": self.finished, "result": self.result, "error": self.error}
+
+
+class JobManager:
+    def __init__(self, keep: int = 50):
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._keep = keep
+
+    def running(self, kind: str) -> Optional[Job]:
+        for job in self._jobs.values():
+            if job.kind == kind and job.status == "running":
+                return job
+        return None
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args: Any) -> Job:
+        """
+        Start fn(*args) in the background: coroutine functions run on the event loop,
+        plain functions in a worker thread. Must be called from the event loop.
+        """
+        job = Job(kind)
+        self._jobs[job.id] = job
+        self._trim()
+
+        async def runner():
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    job.result = await fn(*args)
+                else:
+                    job.result = await asyncio.to_thread(fn, *args)
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished = time.time()
+                self._tasks.pop(job.id, None)
+
+        self._tasks[job.id] = asyncio.get_running_loop().create_task(runner())
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.started, reverse=True)
+
+    def _trim(self):
+        done = [j for j in self.list() if j.status != "running"]
+        for j in done[self._keep:]:
+            self._jobs.pop(j.id, None)
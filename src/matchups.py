@@ -0,0 +1,166 @@
+"""
+All-pairs win-probability matrix for the normalized roster.
+
+Layout under data/matchups/:
+  meta.json        roster order (normalized keys) + run parameters
+  win_matrix.npy   float32 (N, N), M[i, j] = P(roster[i] beats roster[j]) with i as pokemon_a
+                   for i < j (and from the same runs, the pokemon_b side for j > i); NaN = not computed
+  progress.npy     bool (N,), row i done = every pair (i, j > i) written
+
+Both .npy files are opened with np.load(mmap_mode=...), so queries read one row
+and a killed build resumes from the rows that are not marked done.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .utils import DATA_DIR, write_json_file, load_json_file
+from .schemas import BattlePokemonInstance
+from .data_loader import get_index
+from .batch_sim import run_scalar_batch
+from .vector_sim import simulate_vectorized
+import numpy as np
+import hashlib
+import multiprocessing
+import os
+
+MATCHUP_DIR = DATA_DIR / "matchups"
+META_PATH = MATCHUP_DIR / "meta.json"
+MATRIX_PATH = MATCHUP_DIR / "win_matrix.npy"
+PROGRESS_PATH = MATCHUP_DIR / "progress.npy"
+
+def pair_seed(base_seed: int, key_a: str, key_b: str) -> int:
+    # independent of worker count / scheduling order
+    h = hashlib.blake2b(f"{base_seed}:{key_a}:{key_b}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "little") >> 1
+
+def pair_win_rates(data_a: Dict[str, Any], data_b: Dict[str, Any], n_runs: int, max_turns: int, seed: int, engine: str = "vector") -> Tuple[float, float]:
+    """(P(a wins), P(b wins)) over n_runs battles with default instances (level 50, default moves)."""
+    ra = BattlePokemonInstance(name=data_a["name"])
+    rb = BattlePokemonInstance(name=data_b["name"])
+    if engine == "scalar":
+        winners, _, _, _ = run_scalar_batch(data_a, ra, data_b, rb, n_runs, max_turns, seed)
+        return winners.count("pokemon_a") / n_runs, winners.count("pokemon_b") / n_runs
+    vb = simulate_vectorized(data_a, ra, data_b, rb, n_runs, max_turns, seed)
+    return float(np.mean(vb.winner == 0)), float(np.mean(vb.winner == 1))
+
+# worker state, set once per process by _init_worker
+_roster: List[str] = []
+_params: Dict[str, Any] = {}
+
+def _init_worker(roster: List[str], params: Dict[str, Any]):
+    global _roster, _params
+    _roster = roster
+    _params = params
+    get_index()
+
+def _compute_row(i: int) -> Tuple[int, List[float], List[float]]:
+    idx = get_index()
+    key_i = _roster[i]
+    data_i = idx.record(key_i)
+    p_i, p_j = [], []
+    for j in range(i + 1, len(_roster)):
+        key_j = _roster[j]
+        seed = pair_seed(_params["seed"], key_i, key_j)
+        a, b = pair_win_rates(data_i, idx.record(key_j), _params["n_runs"], _params["max_turns"], seed, _params["engine"])
+        p_i.append(a)
+        p_j.append(b)
+    return i, p_i, p_j
+
+def _open_outputs(roster: List[str], params: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    meta = {"roster": roster, **params}
+    n = len(roster)
+    if load_json_file(META_PATH) == meta and MATRIX_PATH.exists() and PROGRESS_PATH.exists():
+        return np.load(MATRIX_PATH, mmap_mode="r+"), np.load(PROGRESS_PATH, mmap_mode="r+")
+    # roster or parameters changed: start over
+    MATCHUP_DIR.mkdir(parents=True, exist_ok=True)
+    matrix = np.lib.format.open_memmap(MATRIX_PATH, mode="w+", dtype=np.float32, shape=(n, n))
+    matrix[:] = np.nan
+    matrix.flush()
+    progress = np.lib.format.open_memmap(PROGRESS_PATH, mode="w+", dtype=bool, shape=(n,))
+    progress[:] = False
+    progress.flush()
+    write_json_file(META_PATH, meta)
+    return matrix, progress
+
+def build_matchup_matrix(n_runs: int = 64, seed: int = 0, max_turns: int = 200, engine: str = "vector", workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compute (or resume) the round-robin matrix over every pokemon in data/normalized.
+    Rows are farmed out to a process pool; each finished row is flushed to disk
+    before it is marked done.
+    """
+    roster = sorted(get_index().keys())
+    params = {"n_runs": n_runs, "seed": seed, "max_turns": max_turns, "engine": engine}
+    matrix, progress = _open_outputs(roster, params)
+    todo = [i for i in range(len(roster)) if not progress[i]]
+    workers = workers or os.cpu_count() or 1
+    # spawn: the server runs this from a job thread, forking a threaded process is not safe
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(roster, params)) as pool:
+        # low rows have the most pairs, submit them first
+        futures = [pool.submit(_compute_row, i) for i in todo]
+        for fut in as_completed(futures):
+            i, p_i, p_j = fut.result()
+            if p_i:
+                matrix[i, i + 1:] = p_i
+                matrix[i + 1:, i] = p_j
+            matrix.flush()
+            progress[i] = True
+            progress.flush()
+    return {"pokemon": len(roster), "rows_computed": len(todo), "complete": bool(progress.all())}
+
+# (meta.json mtime_ns + size, roster, key -> row), so queries don't re-parse the roster every time
+_roster_cache: Optional[Tuple[Tuple[int, int], List[str], Dict[str, int]]] = None
+
+def _roster_rows() -> Optional[Tuple[List[str], Dict[str, int]]]:
+    global _roster_cache
+    try:
+        st = META_PATH.stat()
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _roster_cache
+    if cached is None or cached[0] != stamp:
+        meta = load_json_file(META_PATH)
+        if meta is None:
+            return None
+        roster = meta["roster"]
+        cached = _roster_cache = (stamp, roster, {key: i for i, key in enumerate(roster)})
+    return cached[1], cached[2]
+
+def load_matchup_matrix() -> Optional[Tuple[List[str], np.ndarray]]:
+    rows = _roster_rows()
+    if rows is None or not MATRIX_PATH.exists():
+        return None
+    return rows[0], np.load(MATRIX_PATH, mmap_mode="r")
+
+def best_counters(name_key: str, top: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """
+    Pokemon that `name_key` is least likely to beat - a single row read.
+    Returns None if there is no matrix or the key is not in it.
+    """
+    rows = _roster_rows()
+    if rows is None or not MATRIX_PATH.exists():
+        return None
+    roster, row_of = rows
+    i = row_of.get(name_key)
+    if i is None:
+        return None
+    matrix = np.load(MATRIX_PATH, mmap_mode="r")
+    row = np.array(matrix[i])
+    row[i] = np.nan
+    order = np.argsort(row, kind="stable")
+    order = order[~np.isnan(row[order])][:top].tolist()
+    return [
+        {"name": roster[j], "win_rate_vs": float(matrix[j, i]), "target_win_rate": float(row[j])}
+        for j in order
+    ]
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Build the round-robin matchup matrix")
+    ap.add_argument("--runs", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-turns", type=int, default=200)
+    ap.add_argument("--engine", choices=["vector", "scalar"], default="vector")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    print(build_matchup_matrix(args.runs, args.seed, args.max_turns, args.engine, args.workers))
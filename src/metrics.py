@@ -0,0 +1,234 @@
+"""
+In-process metrics: counters, latency histograms and timing spans, exported
+as Prometheus text on /metrics.
+
+    with span("sim.turn_loop"):
+        ...
+    inc("pokeapi.cache_hits")
+
+Set METRICS_ENABLED=0 to turn recording off; span() then returns a shared
+no-op context manager and inc()/observe() return immediately.
+
+Per-request profiling: inside a collect() block every span/counter is also
+appended to a per-request list (a contextvar, so it follows asyncio tasks and
+to_thread). Work shipped to the simulation process pool is run through
+call_collected, which brings the worker's records back to be replayed here.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# seconds; covers a cached lookup (~µs) up to a long batch run
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# ("span" | "count", name, labels, value) - value is seconds for spans
+Record = Tuple[str, str, Labels, float]
+
+_collector: ContextVar[Optional[List[Record]]] = ContextVar("metrics_collector", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key: Tuple[str, Labels], n: float = 1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, key: Tuple[str, Labels], seconds: float):
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = Histogram()
+            h.observe(seconds)
+
+    def counter(self, name: str, labels: Labels = ()) -> float:
+        return self.counters.get((name, labels), 0)
+
+
+registry = Registry()
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def inc(name: str, n: float = 1, labels: Optional[Dict[str, str]] = None):
+    collected = _collector.get()
+    if not ENABLED and collected is None:
+        return
+    lb = _labels(labels)
+    registry.inc((name, lb), n)
+    if collected is not None:
+        collected.append(("count", name, lb, n))
+
+
+def observe(name: str, seconds: float, labels: Optional[Dict[str, str]] = None):
+    collected = _collector.get()
+    if not ENABLED and collected is None:
+        return
+    lb = _labels(labels)
+    registry.observe((name, lb), seconds)
+    if collected is not None:
+        collected.append(("span", name, lb, seconds))
+
+
+class _Span:
+    __slots__ = ("key", "collected", "start")
+
+    def __init__(self, key: Tuple[str, Labels], collected: Optional[List[Record]]):
+        self.key = key
+        self.collected = collected
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        registry.observe(self.key, seconds)
+        if self.collected is not None:
+            self.collected.append(("span", self.key[0], self.key[1], seconds))
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, labels: Optional[Dict[str, str]] = None):
+    collected = _collector.get()
+    if not ENABLED and collected is None:
+        return _NO_SPAN
+    return _Span((name, _labels(labels)), collected)
+
+
+@contextmanager
+def collect() -> Iterator[List[Record]]:
+    """Collect this context's records (e.g. one request) into the yielded list."""
+    records: List[Record] = []
+    token = _collector.set(records)
+    try:
+        yield records
+    finally:
+        _collector.reset(token)
+
+
+def collecting() -> bool:
+    return _collector.get() is not None
+
+
+def call_collected(collect_records: bool, fn: Callable[..., Any], *args: Any) -> Tuple[Any, List[Record]]:
+    """Run fn in a worker process and return its records alongside the result."""
+    if not collect_records:
+        return fn(*args), []
+    with collect() as records:
+        result = fn(*args)
+    return result, records
+
+
+def replay(records: List[Record]):
+    """Feed records produced in another process into this registry (and the current collector)."""
+    for kind, name, labels, value in records:
+        if kind == "span":
+            observe(name, value, dict(labels))
+        else:
+            inc(name, value, dict(labels))
+
+
+def breakdown(records: List[Record]) -> Dict[str, Dict[str, float]]:
+    """Per-span total ms and call count, plus counter totals, for one request."""
+    out: Dict[str, Dict[str, float]] = {}
+    for kind, name, labels, value in records:
+        key = name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+        entry = out.setdefault(key, {"ms": 0.0, "calls": 0} if kind == "span" else {"count": 0})
+        if kind == "span":
+            entry["ms"] = round(entry["ms"] + value * 1000, 3)
+            entry["calls"] += 1
+        else:
+            entry["count"] += value
+    return out
+
+
+def server_timing(records: List[Record]) -> str:
+    """Server-Timing header value: one entry per span name, durations summed."""
+    totals: Dict[str, float] = {}
+    for kind, name, labels, value in records:
+        if kind == "span":
+            totals[name] = totals.get(name, 0.0) + value
+    return ", ".join(f"{n.replace('.', '_')};dur={v * 1000:.3f}" for n, v in totals.items())
+
+
+def _prom_name(name: str) -> str:
+    return "pokemon_mcp_" + name.replace(".", "_").replace("-", "_")
+
+
+def _prom_labels(labels: Labels, extra: Labels = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus(gauges: Optional[Dict[str, float]] = None) -> str:
+    lines: List[str] = []
+    with registry._lock:
+        counters = sorted(registry.counters.items())
+        histograms = sorted(registry.histograms.items(), key=lambda kv: kv[0])
+        snapshots = [(key, list(h.counts), h.sum, h.count) for key, h in histograms]
+    seen = set()
+    for (name, labels), value in counters:
+        metric = _prom_name(name) + "_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_prom_labels(labels)} {value:g}")
+    for (name, labels), counts, total, count in snapshots:
+        metric = _prom_name(name) + "_seconds"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} histogram")
+            seen.add(metric)
+        cumulative = 0
+        for le, c in zip(BUCKETS, counts):
+            cumulative += c
+            lines.append(f"{metric}_bucket{_prom_labels(labels, (('le', f'{le:g}'),))} {cumulative}")
+        lines.append(f"{metric}_bucket{_prom_labels(labels, (('le', '+Inf'),))} {count}")
+        lines.append(f"{metric}_sum{_prom_labels(labels)} {total:.6f}")
+        lines.append(f"{metric}_count{_prom_labels(labels)} {count}")
+    for name, value in sorted((gauges or {}).items()):
+        metric = _prom_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,68 @@
+"""
+Local stand-in for PokeAPI, serving payloads from a cache directory laid out like
+data/cache/pokeapi ({endpoint with / -> __}.json) under /api/v2/{endpoint}.
+
+    python -m src.mock_pokeapi --port 9000 --latency 0.05
+    python -m src.async_ingest --base-url http://127.0.0.1:9000/api/v2
+
+Unknown endpoints return 404; --fail-rate makes a fraction of requests return 503.
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from .utils import POKEAPI_CACHE
+import random
+import threading
+import time
+
+
+def make_server(root: Path = POKEAPI_CACHE, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    counts = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                counts["requests"] += 1
+            if latency:
+                time.sleep(latency)
+            if fail_rate and random.random() < fail_rate:
+                self._send(503, b'{"detail": "unavailable"}')
+                return
+            path = self.path.split("?", 1)[0]
+            if not path.startswith("/api/v2/"):
+                self._send(404, b"Not Found")
+                return
+            endpoint = path[len("/api/v2/"):].strip("/")
+            p = root / (endpoint.replace("/", "__") + ".json")
+            if not p.exists():
+                self._send(404, b"Not Found")
+                return
+            self._send(200, p.read_bytes())
+
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.counts = counts
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Serve a PokeAPI cache directory as a fake PokeAPI")
+    ap.add_argument("--root", type=Path, default=POKEAPI_CACHE)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9000)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    srv = make_server(args.root, args.host, args.port, args.latency, args.fail_rate)
+    print(f"mock PokeAPI on http://{args.host}:{srv.server_address[1]}/api/v2")
+    srv.serve_forever()
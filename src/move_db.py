@@ -0,0 +1,190 @@
+"""
+Canonical move table shared by every pokemon record.
+
+Normalized pokemon files store `move_ids` (PokeAPI move ids) instead of embedding
+a copy of each move dict; at load time the ids resolve to one interned
+MoveRecord per move. The table lives in data/moves.json and is rebuilt from the
+cached move__* payloads.
+
+    python -m src.move_db migrate   # write data/moves.json, rewrite data/normalized to move_ids
+"""
+from typing import Dict, Any, List, Optional, Iterator
+from .utils import DATA_DIR, POKEAPI_CACHE, get_cache_store, load_json_file, write_json_file, write_json_if_changed
+from .metrics import inc
+import json
+import threading
+
+MOVES_PATH = DATA_DIR / "moves.json"
+
+# the dict shape data_loader.build_move_entry produces / the Move schema expects
+MOVE_FIELDS = ("name", "power", "accuracy", "type", "category", "effect")
+
+
+class MoveRecord:
+    """Read-only move; supports move["name"] / move.get("power") like the old dicts."""
+    __slots__ = ("id", "name", "power", "accuracy", "type", "category", "effect")
+
+    def __init__(self, id: int, name: str, power: Optional[int], accuracy: Optional[int],
+                 type: Optional[str], category: Optional[str], effect: Optional[str]):
+        self.id = id
+        self.name = name
+        self.power = power
+        self.accuracy = accuracy
+        self.type = type
+        self.category = category
+        self.effect = effect
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in MOVE_FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in MOVE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in MOVE_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"MoveRecord({self.id}, {self.name!r})"
+
+
+def move_from_api(move_data: Dict[str, Any]) -> Dict[str, Any]:
+    # same extraction as data_loader.build_move_entry, plus the id
+    return {
+        "id": move_data.get("id"),
+        "name": move_data.get("name"),
+        "power": move_data.get("power"),
+        "accuracy": move_data.get("accuracy"),
+        "type": move_data.get("type", {}).get("name") if move_data.get("type") else None,
+        "category": move_data.get("damage_class", {}).get("name") if move_data.get("damage_class") else None,
+        "effect": (move_data.get("effect_entries") or [{}])[0].get("short_effect") if move_data.get("effect_entries") else None
+    }
+
+
+class MoveDB:
+    def __init__(self, moves: List[Dict[str, Any]]):
+        # id order; records reference moves by PokeAPI id on disk and by the shared MoveRecord in memory
+        self.records: List[MoveRecord] = []
+        self.by_id: Dict[int, MoveRecord] = {}
+        self.by_name: Dict[str, MoveRecord] = {}
+        for m in sorted(moves, key=lambda m: m["id"]):
+            if m["id"] in self.by_id:
+                continue
+            rec = MoveRecord(m["id"], m["name"], m.get("power"), m.get("accuracy"),
+                             m.get("type"), m.get("category"), m.get("effect"))
+            self.records.append(rec)
+            self.by_id[rec.id] = rec
+            self.by_name[rec.name] = rec
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        return [{"id": r.id, **r.as_dict()} for r in self.records]
+
+    def intern(self, move: Any) -> Any:
+        """Shared MoveRecord for a move dict that matches the table exactly, else the dict itself."""
+        if isinstance(move, MoveRecord):
+            return move
+        rec = self.by_name.get(move.get("name"))
+        if rec is not None and rec.as_dict() == {f: move.get(f) for f in MOVE_FIELDS}:
+            return rec
+        return move
+
+    def resolve(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """In-place: turn `move_ids` (or embedded move dicts) into shared MoveRecords under "moves"."""
+        ids = record.get("move_ids")
+        if ids is not None:
+            moves = [self.by_id[i] for i in ids if i in self.by_id]
+            if len(moves) < len(ids):
+                # ids missing from data/moves.json (stale table): the moveset shrinks, make it visible
+                inc("moves.unresolved", len(ids) - len(moves))
+            record["moves"] = moves
+        elif record.get("moves"):
+            record["moves"] = [self.intern(m) for m in record["moves"]]
+        return record
+
+    def to_stored(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of record for writing to data/normalized: moves by id when every move is in the table."""
+        if "moves" not in record:
+            return dict(record)
+        moves = record.get("moves") or []
+        interned = [self.intern(m) for m in moves]
+        out = {k: v for k, v in record.items() if k not in ("moves", "move_ids")}
+        if all(isinstance(m, MoveRecord) for m in interned):
+            out["move_ids"] = [m.id for m in interned]
+        else:
+            out["moves"] = [m.as_dict() if isinstance(m, MoveRecord) else m for m in moves]
+        return out
+
+
+def move_dicts(moves: List[Any]) -> List[Dict[str, Any]]:
+    return [m.as_dict() if isinstance(m, MoveRecord) else m for m in moves]
+
+
+def _iter_cached_moves() -> Iterator[Dict[str, Any]]:
+    store = get_cache_store()
+    keys = set(store.keys("move__")) if store is not None else set()
+    keys |= {p.stem for p in POKEAPI_CACHE.glob("move__*.json")}
+    for key in sorted(keys):
+        data = load_json_file(POKEAPI_CACHE / f"{key}.json")
+        if data and data.get("id") is not None:
+            yield move_from_api(data)
+
+
+def build_move_db_from_cache() -> MoveDB:
+    return MoveDB(list(_iter_cached_moves()))
+
+
+def write_move_table(db: MoveDB) -> bool:
+    """Write data/moves.json; False when it already had this content."""
+    return write_json_if_changed(MOVES_PATH, db.to_json())
+
+
+_db: Optional[MoveDB] = None
+_db_lock = threading.Lock()
+
+
+def get_move_db() -> MoveDB:
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                table = load_json_file(MOVES_PATH)
+                _db = MoveDB(table) if table is not None else build_move_db_from_cache()
+    return _db
+
+
+def reload_move_db() -> MoveDB:
+    global _db
+    table = load_json_file(MOVES_PATH)
+    db = MoveDB(table) if table is not None else build_move_db_from_cache()
+    with _db_lock:
+        _db = db
+    return db
+
+
+if __name__ == "__main__":
+    import argparse
+    from .data_loader import NORMALIZED_DIR
+    ap = argparse.ArgumentParser(description="Build the canonical move table")
+    ap.add_argument("cmd", choices=["build", "migrate"], help="build: write data/moves.json; migrate: also rewrite data/normalized to move_ids")
+    args = ap.parse_args()
+    db = build_move_db_from_cache()
+    write_move_table(db)
+    print({"moves": len(db)})
+    if args.cmd == "migrate":
+        before = after = rewritten = 0
+        for p in sorted(NORMALIZED_DIR.glob("*.json")):
+            before += p.stat().st_size
+            with open(p, "r", encoding="utf-8") as f:
+                rec = json.load(f)
+            stored = db.to_stored(rec)
+            if stored != rec:
+                write_json_file(p, stored)
+                rewritten += 1
+            after += p.stat().st_size
+        print({"rewritten": rewritten, "bytes_before": before, "bytes_after": after})
@@ -0,0 +1,187 @@
+from typing import Dict, List, Optional, Set, Tuple
+import re
+
+# Kaggle name prefixes that PokeAPI writes as a suffix ("Alolan Vulpix" -> "vulpix-alola")
+REGIONAL = {"alolan": "alola", "galarian": "galar", "hisuian": "hisui", "paldean": "paldea"}
+SIZE_RE = re.compile(r"^(small|average|large|super)-size-(.+)$")
+FORM_RE = re.compile(r"^(.+)-(?:form|forme|mode|cloak|style)$")
+
+# candidates re-ranked by edit distance after the trigram shortlist
+SHORTLIST = 32
+
+
+def normalize_name(n: str) -> str:
+    return re.sub(r"[^a-z0-9\-]", "", n.lower().replace(" ", "-"))
+
+
+def _grams(s: str, n: int = 3) -> Set[str]:
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+def name_aliases(name: str) -> List[str]:
+    """Normalized spellings a row can be asked for: its key plus PokeAPI-style form names."""
+    key = normalize_name(name)
+    out = [key]
+    words = key.split("-")
+    if words[0] == "mega" and len(words) > 1:
+        # "Mega Charizard X" -> charizard-mega-x
+        out.append("-".join([words[1], "mega"] + words[2:]))
+    elif words[0] in REGIONAL and len(words) > 1:
+        out.append("-".join(words[1:] + [REGIONAL[words[0]]]))
+    m = SIZE_RE.match(key)
+    if m:
+        # "Small Size Pumpkaboo" -> pumpkaboo-small
+        out.append(f"{m.group(2)}-{m.group(1)}")
+    m = FORM_RE.match(key)
+    if m:
+        # "Aegislash Blade Form" -> aegislash-blade
+        out.append(m.group(1))
+    return out
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Restricted Damerau-Levenshtein (adjacent swaps count 1); anything above limit comes back as limit + 1."""
+    n, m = len(a), len(b)
+    if abs(n - m) > limit:
+        return limit + 1
+    big = limit + 1
+    # only cells within `limit` of the diagonal can stay under the limit, the rest stay at big
+    prev2: List[int] = []
+    prev = [j if j <= limit else big for j in range(m + 1)]
+    for i in range(1, n + 1):
+        lo, hi = max(1, i - limit), min(m, i + limit)
+        cur = [big] * (m + 1)
+        cur[0] = i if i <= limit else big
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            bj = b[j - 1]
+            d = prev[j - 1] + (ai != bj)
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == bj and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            cur[j] = d if d < big else big
+        if min(cur[lo - 1:hi + 1]) >= big:
+            return big
+        prev2, prev = prev, cur
+    return prev[m]
+
+
+def typo_limit(n: int) -> int:
+    # edits tolerated before a name stops resolving on its own: none for very short queries
+    if n <= 3:
+        return 0
+    if n <= 5:
+        return 1
+    return 2 if n <= 10 else 3
+
+
+class NameIndex:
+    """
+    Resolves a requested name to a row position in `names` (Kaggle CSV order):
+
+    1. exact, case-insensitive
+    2. alias: the normalized key or a PokeAPI-style form name (see name_aliases)
+    3. substring: rows whose name contains the query, preferring a match at the
+       start of a word, then CSV order (so "aegislash" is the Shield Form)
+    4. typo: closest alias by edit distance, within typo_limit(len(query))
+
+    suggest() ranks the nearest rows for "did you mean" answers. Everything is
+    precomputed; a miss costs one trigram shortlist plus ~SHORTLIST bounded
+    edit distances.
+    """
+
+    def __init__(self, names: List[str]):
+        self._lower = [str(n).lower() for n in names]
+        # exact lowercase name -> first row position
+        self._exact: Dict[str, int] = {}
+        # trigram -> row positions, used for the substring fallback
+        self._gram_rows: Dict[str, Set[int]] = {}
+        # alias -> first row position; (alias, row, trigram count) terms + padded trigram postings for typos
+        self._alias: Dict[str, int] = {}
+        self._terms: List[Tuple[str, int, int]] = []
+        self._term_grams: Dict[str, List[int]] = {}
+        for pos, lname in enumerate(self._lower):
+            self._exact.setdefault(lname, pos)
+            for g in _grams(lname):
+                self._gram_rows.setdefault(g, set()).add(pos)
+            for alias in name_aliases(lname):
+                if alias in self._alias:
+                    continue
+                self._alias[alias] = pos
+                tid = len(self._terms)
+                grams = _grams(f"^{alias}$")
+                self._terms.append((alias, pos, len(grams)))
+                for g in grams:
+                    self._term_grams.setdefault(g, []).append(tid)
+
+    def resolve(self, name: str) -> Optional[int]:
+        q = name.lower()
+        pos = self._exact.get(q)
+        if pos is not None:
+            return pos
+        key = normalize_name(q)
+        pos = self._alias.get(key)
+        if pos is not None:
+            return pos
+        pos = self._substring_row(q)
+        if pos is not None:
+            return pos
+        ranked = self._ranked(key, typo_limit(len(key)), 1)
+        return ranked[0] if ranked else None
+
+    def suggest(self, name: str, limit: int = 5) -> List[int]:
+        """Row positions of the closest names, best first; empty when nothing is remotely close."""
+        key = normalize_name(name)
+        return self._ranked(key, max(2, len(key) // 3), limit)
+
+    def _ranked(self, key: str, max_distance: int, keep: int) -> List[int]:
+        # up to `keep` distinct rows whose shortlisted aliases are within max_distance, closest first
+        if not key:
+            return []
+        grams = _grams(f"^{key}$")
+        shared: Dict[int, int] = {}
+        for g in grams:
+            for tid in self._term_grams.get(g, ()):
+                shared[tid] = shared.get(tid, 0) + 1
+        shortlist = sorted(shared, key=lambda t: (-shared[t], t))[:SHORTLIST]
+        best: Dict[int, Tuple[int, bool, int]] = {}
+        for tid in shortlist:
+            alias, pos, n_grams = self._terms[tid]
+            # one edit breaks at most 3 trigrams, so few shared ones rule a term out without the DP
+            if max(len(grams), n_grams) - shared[tid] > 3 * max_distance:
+                continue
+            d = edit_distance(key, alias, max_distance)
+            # ties: typos rarely hit the first letter, then more shared trigrams
+            rank = (d, alias[0] != key[0], -shared[tid])
+            if d > max_distance or (pos in best and best[pos] <= rank):
+                continue
+            best[pos] = rank
+            if len(best) >= keep:
+                # later terms only matter if they beat the keep-th closest so far
+                max_distance = sorted(v[0] for v in best.values())[keep - 1]
+        return sorted(best, key=lambda pos: (best[pos], pos))[:keep]
+
+    def _substring_row(self, q: str) -> Optional[int]:
+        grams = _grams(q)
+        if not grams:
+            # too short for the trigram index, plain scan over ~1k names
+            hits = [pos for pos, lname in enumerate(self._lower) if q in lname]
+        else:
+            candidates = None
+            # intersect smallest posting lists first
+            for g in sorted(grams, key=lambda g: len(self._gram_rows.get(g, ()))):
+                rows = self._gram_rows.get(g)
+                if not rows:
+                    return None
+                candidates = set(rows) if candidates is None else candidates & rows
+                if not candidates:
+                    return None
+            hits = [pos for pos in sorted(candidates) if q in self._lower[pos]]
+        for pos in hits:
+            lname = self._lower[pos]
+            if lname.startswith(q) or f" {q}" in lname or f"-{q}" in lname:
+                return pos
+        return hits[0] if hits else None
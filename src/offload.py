@@ -0,0 +1,127 @@
+"""
+Process pool for CPU-bound simulations, so they neither block the event loop
+nor compete with request handling for Starlette's threadpool.
+
+SIM_WORKERS      worker processes (default: cpu count; 0 = run in a thread instead)
+SIM_MAX_QUEUE    submitted-but-unfinished jobs before new ones are refused (default: 8 per worker)
+SIM_ROUTING      "shared": one pool, any idle worker takes the next job (default)
+                 "matchup": one single-process shard per worker; jobs with the same
+                 routing key (a matchup) always land on the same shard, so its
+                 per-process caches (exact solver, search tables) keep hitting, and
+                 run_sharded() can spread one big job over every shard
+"""
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from .data_loader import get_index
+from . import metrics
+import asyncio
+import hashlib
+import multiprocessing
+import os
+
+ROUTINGS = ("shared", "matchup")
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _warm_worker():
+    # build the resident index in each worker before the first real job lands there
+    get_index()
+
+
+def shard_of(key: str, n: int) -> int:
+    # stable across processes and restarts, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") % n
+
+
+class SimulationExecutor:
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None, routing: str = "shared"):
+        cpu = os.cpu_count() or 1
+        self.workers = cpu if workers is None else workers
+        self.max_queue = max_queue if max_queue is not None else max(1, self.workers) * 8
+        if routing not in ROUTINGS:
+            raise ValueError(f"Unknown routing {routing!r}; available: {', '.join(ROUTINGS)}")
+        self.routing = routing
+        self.pending = 0
+        # shared: one pool of `workers` processes; matchup: `workers` pools of one process each
+        self._pools: List[ProcessPoolExecutor] = []
+        self._load: List[int] = []
+
+    @property
+    def shards(self) -> int:
+        return len(self._pools) if self.routing == "matchup" else 1
+
+    def start(self):
+        if self.workers > 0 and not self._pools:
+            # spawn: the server process has threads running, forking it is not safe
+            ctx = multiprocessing.get_context("spawn")
+            sizes = [1] * self.workers if self.routing == "matchup" else [self.workers]
+            self._pools = [ProcessPoolExecutor(max_workers=n, mp_context=ctx, initializer=_warm_worker) for n in sizes]
+            self._load = [0] * len(self._pools)
+            for pool, n in zip(self._pools, sizes):
+                for _ in range(n):
+                    pool.submit(int)
+
+    def restart(self):
+        """Fresh workers (e.g. after the normalized data was rebuilt); queued work finishes on the old pools."""
+        old, self._pools = self._pools, []
+        self.start()
+        for pool in old:
+            pool.shutdown(wait=False)
+
+    def shutdown(self):
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools = []
+
+    def _pick(self, key: Optional[str], shard: Optional[int]) -> int:
+        if len(self._pools) == 1:
+            return 0
+        if shard is not None:
+            return shard % len(self._pools)
+        if key is not None:
+            return shard_of(key, len(self._pools))
+        return min(range(len(self._pools)), key=self._load.__getitem__)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, key: Optional[str] = None, shard: Optional[int] = None) -> Any:
+        """
+        Run fn(*args) off the event loop; raises QueueFull when max_queue jobs are already pending.
+        key (e.g. a matchup) / shard pick the worker under "matchup" routing; the shared pool ignores both.
+        """
+        if self.pending >= self.max_queue:
+            raise QueueFull(f"{self.pending} simulations already queued")
+        self.pending += 1
+        try:
+            if not self._pools:
+                # to_thread copies the context, spans land in the request's collector directly
+                return await asyncio.to_thread(fn, *args)
+            i = self._pick(key, shard)
+            self._load[i] += 1
+            try:
+                want = metrics.ENABLED or metrics.collecting()
+                result, records = await asyncio.get_running_loop().run_in_executor(self._pools[i], metrics.call_collected, want, fn, *args)
+            finally:
+                self._load[i] -= 1
+            metrics.replay(records)
+            return result
+        finally:
+            self.pending -= 1
+
+    async def run_sharded(self, fn: Callable[..., Any], parts: Sequence[Tuple[Any, ...]]) -> List[Any]:
+        """fn(*part) for every part, part i on shard i; all or nothing with respect to the queue limit."""
+        if self.pending + len(parts) > self.max_queue:
+            raise QueueFull(f"{self.pending} simulations already queued")
+        return await asyncio.gather(*(self.run(fn, *part, shard=i) for i, part in enumerate(parts)))
+
+    def status(self) -> dict:
+        return {"workers": self.workers, "routing": self.routing, "pending": self.pending, "max_queue": self.max_queue,
+                "shard_load": list(self._load) if self.routing == "matchup" else None}
+
+
+def executor_from_env() -> SimulationExecutor:
+    workers = os.environ.get("SIM_WORKERS")
+    max_queue = os.environ.get("SIM_MAX_QUEUE")
+    return SimulationExecutor(int(workers) if workers else None, int(max_queue) if max_queue else None,
+                              os.environ.get("SIM_ROUTING", "shared"))
@@ -1,13 +1,163 @@
-import httpx
-from typing import Optional, Dict, Any
-from .utils import cache_path_for, load_json_file, write_json_file, ensure_dirs
+"""
+Blocking PokeAPI client with an on-disk cache (data/cache/pokeapi, see utils).
+
+POKEAPI_BASE_URL          upstream, e.g. a local src.mock_pokeapi (default: https://pokeapi.co/api/v2)
+POKEAPI_TIMEOUT           seconds per request (default 10)
+POKEAPI_MAX_CONNECTIONS   connection pool size (default 10)
+POKEAPI_MAX_KEEPALIVE     idle connections kept open (default 5)
+POKEAPI_NEGATIVE_TTL      seconds a 404 is remembered before asking again (default 600)
+POKEAPI_ERROR_TTL         seconds a timeout / 5xx for an endpoint is remembered (default 5)
+POKEAPI_BREAKER_FAILURES  consecutive upstream failures that open the circuit (default 5)
+POKEAPI_BREAKER_COOLDOWN  seconds the circuit stays open before one trial request (default 30)
+
+Concurrent misses on the same endpoint share one request (single flight).
+"""
+from typing import Optional, Dict, Any, Tuple
+from concurrent.futures import Future
+from .utils import cache_path_for, load_json_file, write_json_file, SERVE_ONLY
+from .metrics import span, inc
+import os
+import threading
 import time
 
-BASE = "https://pokeapi.co/api/v2"
+BASE = os.environ.get("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2").rstrip("/")
+TIMEOUT = float(os.environ.get("POKEAPI_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.environ.get("POKEAPI_MAX_CONNECTIONS", "10"))
+MAX_KEEPALIVE = int(os.environ.get("POKEAPI_MAX_KEEPALIVE", "5"))
+NEGATIVE_TTL = float(os.environ.get("POKEAPI_NEGATIVE_TTL", "600"))
+ERROR_TTL = float(os.environ.get("POKEAPI_ERROR_TTL", "5"))
+BREAKER_FAILURES = int(os.environ.get("POKEAPI_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("POKEAPI_BREAKER_COOLDOWN", "30"))
+# remembered failures beyond this evict the oldest
+NEGATIVE_MAX_ENTRIES = 10000
+
+
+class CircuitBreaker:
+    """
+    `failures` consecutive upstream failures (timeouts, connection errors, 5xx/429)
+    open the circuit: fetches fail fast for `cooldown` seconds instead of each
+    waiting out the timeout. Then a single trial request goes through (half-open);
+    success closes the circuit, another failure opens it again. 404s are answers,
+    not failures.
+    """
+
+    def __init__(self, failures: int, cooldown: float, clock=time.monotonic):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        # half-open: cooled down, trial request pending or in flight
+        return "half_open" if self._trial or self._clock() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or self._clock() - self.opened_at < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.consecutive = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self._trial or self.consecutive >= self.failures:
+                if self.opened_at is None or self._trial:
+                    inc("pokeapi.circuit_opened")
+                self.opened_at = self._clock()
+                self._trial = False
 
-ensure_dirs()
 
-_client = httpx.Client(timeout=10.0)
+breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN)
+
+# endpoint -> (expires at, "not_found" | "error"); checked before going upstream
+_negative: Dict[str, Tuple[float, str]] = {}
+# endpoint -> result of the fetch currently running for it
+_inflight: Dict[str, Future] = {}
+_state_lock = threading.Lock()
+
+# created on the first live fetch, so serving cached/prebuilt data never imports httpx
+_client = None
+_client_lock = threading.Lock()
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                _client = httpx.Client(timeout=TIMEOUT, limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE))
+    return _client
+
+def _remember_failure(endpoint: str, kind: str, ttl: float):
+    with _state_lock:
+        _negative.pop(endpoint, None)
+        _negative[endpoint] = (time.monotonic() + ttl, kind)
+        while len(_negative) > NEGATIVE_MAX_ENTRIES:
+            del _negative[next(iter(_negative))]
+
+def _known_failure(endpoint: str) -> Optional[str]:
+    entry = _negative.get(endpoint)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        with _state_lock:
+            _negative.pop(endpoint, None)
+        return None
+    return entry[1]
+
+def forget_failures():
+    """Drop remembered 404s/errors and close the circuit, e.g. after pointing at a fixed upstream."""
+    with _state_lock:
+        _negative.clear()
+    breaker.success()
+
+def client_status() -> Dict[str, Any]:
+    return {"circuit": breaker.state, "consecutive_failures": breaker.consecutive,
+            "negative_entries": len(_negative), "inflight": len(_inflight)}
+
+def _fetch_upstream(endpoint: str, cache_p) -> Optional[Dict[str, Any]]:
+    if not breaker.allow():
+        inc("pokeapi.circuit_rejected")
+        return None
+    url = f"{BASE}/{endpoint.strip('/')}"
+    try:
+        with span("pokeapi.fetch"):
+            r = _get_client().get(url)
+        if r.status_code == 200:
+            data = r.json()
+        elif r.status_code == 429 or r.status_code >= 500:
+            raise RuntimeError(f"upstream answered {r.status_code}")
+        else:
+            # the upstream is fine, the endpoint just doesn't exist
+            breaker.success()
+            inc("pokeapi.not_found")
+            _remember_failure(endpoint, "not_found", NEGATIVE_TTL)
+            return None
+    except Exception:
+        breaker.failure()
+        inc("pokeapi.fetch_errors")
+        _remember_failure(endpoint, "error", ERROR_TTL)
+        return None
+    breaker.success()
+    write_json_file(cache_p, data)
+    # be polite to api
+    time.sleep(0.05)
+    return data
 
 def fetch_and_cache(endpoint: str) -> Optional[Dict[str, Any]]:
     """
@@ -17,22 +167,39 @@ def fetch_and_cache(endpoint: str) -> Optional[Dict[str, Any]]:
     cache_p = cache_path_for(endpoint)
     cached = load_json_file(cache_p)
     if cached is not None:
+        inc("pokeapi.cache_hits")
         return cached
 
-    url = f"{BASE}/{endpoint.strip('/')}"
-    try:
-        r = _client.get(url)
-        if r.status_code == 200:
-            data = r.json()
-            write_json_file(cache_p, data)
-            # be polite to api
-            time.sleep(0.05)
-            return data
-        else:
-            return None
-    except Exception:
+    inc("pokeapi.cache_misses")
+    if SERVE_ONLY:
+        inc("pokeapi.refused")
+        return None
+    if _known_failure(endpoint) is not None:
+        inc("pokeapi.negative_hits")
         return None
 
+    with _state_lock:
+        fut = _inflight.get(endpoint)
+        leader = fut is None
+        if leader:
+            fut = _inflight[endpoint] = Future()
+    if not leader:
+        inc("pokeapi.coalesced")
+        return fut.result()
+    try:
+        # the previous leader may have finished between our checks and taking the lead
+        data = load_json_file(cache_p)
+        if data is None and _known_failure(endpoint) is None:
+            data = _fetch_upstream(endpoint, cache_p)
+        fut.set_result(data)
+        return data
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _state_lock:
+            del _inflight[endpoint]
+
 def get_pokemon_data_from_api(name: str) -> Optional[Dict[str, Any]]:
     return fetch_and_cache(f"pokemon/{name.lower()}")
 
@@ -42,7 +209,11 @@ def get_move_from_api(move_name_or_id: str) -> Optional[Dict[str, Any]]:
 def get_species_from_api(name: str) -> Optional[Dict[str, Any]]:
     return fetch_and_cache(f"pokemon-species/{name.lower()}")
 
+def endpoint_from_url(url: str) -> str:
+    # url like https://pokeapi.co/api/v2/evolution-chain/1/ (or the same path on a mock server)
+    if "/api/v2/" in url:
+        return url.split("/api/v2/", 1)[1]
+    return url.replace(BASE + "/", "")
+
 def get_evolution_chain_by_url(url: str) -> Optional[Dict[str, Any]]:
-    # url like https://pokeapi.co/api/v2/evolution-chain/1/
-    endpoint = url.replace(BASE + "/", "")
-    return fetch_and_cache(endpoint)
+    return fetch_and_cache(endpoint_from_url(url))
@@ -0,0 +1,50 @@
+from typing import Dict, Any, List, Optional
+from .name_index import NameIndex
+
+
+class PokemonIndex:
+    """
+    Resident lookup structure built once from data/normalized + the Kaggle CSV
+    (or the columnar snapshot of both, see roster_snapshot.py).
+
+    records: normalized key (file stem, see data_loader.normalize_name) -> normalized record
+    basics: Kaggle basic records (build_basic_from_row output) in CSV order
+
+    Lookups never touch disk. Callers must treat returned dicts as read-only,
+    they are shared between requests.
+
+    snapshot: the RosterSnapshot the records were loaded from, for vectorized
+    queries; dropped as soon as put/drop makes the two disagree.
+    """
+
+    def __init__(self, records: Dict[str, Dict[str, Any]], basics: List[Dict[str, Any]], snapshot: Any = None):
+        self._records = dict(records)
+        self.snapshot = snapshot
+        self._basics = list(basics)
+        self.names = NameIndex([b["name"] for b in self._basics])
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def keys(self) -> List[str]:
+        return list(self._records.keys())
+
+    def record(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(key)
+
+    def put(self, key: str, record: Dict[str, Any]):
+        self._records[key] = record
+        self.snapshot = None
+
+    def drop(self, key: str):
+        self._records.pop(key, None)
+        self.snapshot = None
+
+    def match_row(self, name: str) -> Optional[Dict[str, Any]]:
+        """Kaggle row for `name`: exact, alias, substring, then typo match (see NameIndex)."""
+        pos = self.names.resolve(name)
+        return self._basics[pos] if pos is not None else None
+
+    def suggest(self, name: str, limit: int = 5) -> List[str]:
+        """Display names closest to `name`, best first, for "did you mean" answers."""
+        return [self._basics[pos]["name"] for pos in self.names.suggest(name, limit)]
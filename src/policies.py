@@ -0,0 +1,207 @@
+"""
+Move-selection policies for run_battle.
+
+A policy is called once per turn for its side:
+    policy.choose(me, foe, my_table, foe_table, me_first, turns_left, rnd) -> move index
+me/foe are the live battle instances, the tables their prebuilt MoveEntry lists
+(battle_sim.build_move_table). Moves named in the request (BattlePokemonInstance.moves)
+always win, as before; the policy only decides otherwise.
+
+  random          uniform pick - the original behaviour, same rnd draws
+  greedy          highest expected damage this turn, no rnd draws
+  expectiminimax  depth-limited search over (hp_me, hp_foe) with chance nodes for
+                  paralysis, accuracy, crits and damage rolls; the opponent is
+                  assumed to answer with its worst move for us. Iterative deepening
+                  under a per-decision time budget, memoized in an LRU
+                  transposition table keyed on exact HP, statuses and horizon, so a
+                  node's value never depends on what was searched before.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from .battle_sim import (MoveEntry, pick_move_index, requested_move_index, chip_damage,
+                         PARALYSIS_SKIP, CRIT_CHANCE, CRIT_MULT, RAND_LOW, RAND_HIGH)
+import math
+import random
+import time
+
+POLICY_NAMES = ("random", "greedy", "expectiminimax")
+
+# the RAND_LOW-RAND_HIGH uniform roll, discretised
+ROLL_POINTS = (RAND_LOW, (RAND_LOW + RAND_HIGH) / 2, RAND_HIGH)
+
+
+def expected_damage(entry: MoveEntry) -> float:
+    if entry.no_damage:
+        return 0.0
+    crit = 1 + CRIT_CHANCE * (CRIT_MULT - 1)
+    return max(1.0, entry.base * entry.mod * crit * sum(ROLL_POINTS) / len(ROLL_POINTS)) * min(1.0, entry.accuracy)
+
+
+def hit_outcomes(entry: MoveEntry, paralyzed: bool) -> Tuple[Tuple[float, int], ...]:
+    """(probability, damage) pairs for one action, equal damages merged; misses/skips are damage 0."""
+    p_act = 1 - PARALYSIS_SKIP if paralyzed else 1.0
+    p_hit = p_act * min(1.0, entry.accuracy)
+    dist: Dict[int, float] = {0: 1 - p_hit}
+    for crit, p_crit in ((1.0, 1 - CRIT_CHANCE), (CRIT_MULT, CRIT_CHANCE)):
+        for roll in ROLL_POINTS:
+            dmg = 0 if entry.no_damage else max(1, math.floor(entry.base * (entry.mod * crit * roll)))
+            dist[dmg] = dist.get(dmg, 0.0) + p_hit * p_crit / len(ROLL_POINTS)
+    return tuple((p, d) for d, p in dist.items() if p > 0)
+
+
+class RandomPolicy:
+    def __init__(self, request_inst: Any = None):
+        self.request_inst = request_inst
+
+    def choose(self, me, foe, my_table, foe_table, me_first, turns_left, rnd: random.Random) -> int:
+        return pick_move_index(me, self.request_inst, rnd)
+
+
+class GreedyPolicy:
+    def __init__(self, request_inst: Any = None):
+        self.request_inst = request_inst
+
+    def choose(self, me, foe, my_table, foe_table, me_first, turns_left, rnd: random.Random) -> int:
+        idx = requested_move_index(me, self.request_inst)
+        if idx is not None:
+            return idx
+        # damage past the foe's remaining HP is worth nothing; ties go to the earlier move
+        hp = foe["hp"]
+        return max(range(len(my_table)), key=lambda i: (min(hp, expected_damage(my_table[i])), -i))
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class ExpectiminimaxPolicy:
+    def __init__(self, request_inst: Any = None, depth: int = 3, time_budget_ms: float = 50.0,
+                 table_size: int = 200_000):
+        self.request_inst = request_inst
+        self.depth = depth
+        self.time_budget = time_budget_ms / 1000.0
+        self.table_size = table_size
+        self.table: "OrderedDict[tuple, float]" = OrderedDict()
+        self._outcomes: Dict[Tuple[int, bool], Tuple[List[MoveEntry], List[Tuple[Tuple[float, int], ...]]]] = {}
+        self._greedy = GreedyPolicy(request_inst)
+        self.stats = {"decisions": 0, "hits": 0, "misses": 0, "evicted": 0, "max_depth": 0, "timeouts": 0}
+
+    def choose(self, me, foe, my_table, foe_table, me_first, turns_left, rnd: random.Random) -> int:
+        idx = requested_move_index(me, self.request_inst)
+        if idx is not None:
+            return idx
+        self.stats["decisions"] += 1
+        ctx = _SearchContext(self, me, foe, my_table, foe_table, me_first, time.perf_counter() + self.time_budget)
+        best = None
+        for depth in range(1, self.depth + 1):
+            try:
+                best = ctx.root(depth, turns_left)
+            except _OutOfTime:
+                self.stats["timeouts"] += 1
+                break
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+            if depth >= turns_left:
+                break  # deeper search can't see past the turn cap
+        if best is None:
+            return self._greedy.choose(me, foe, my_table, foe_table, me_first, turns_left, rnd)
+        return best
+
+    def outcomes(self, table: List[MoveEntry], paralyzed: bool) -> List[Tuple[Tuple[float, int], ...]]:
+        key = (id(table), paralyzed)
+        hit = self._outcomes.get(key)
+        if hit is None:
+            # keep the table alive with its outcomes, so its id (also in the search keys) isn't reused
+            hit = self._outcomes[key] = (table, [hit_outcomes(e, paralyzed) for e in table])
+        return hit[1]
+
+    def lookup(self, key: tuple) -> Optional[float]:
+        v = self.table.get(key)
+        if v is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.table.move_to_end(key)
+        return v
+
+    def store(self, key: tuple, value: float):
+        self.table[key] = value
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+            self.stats["evicted"] += 1
+
+
+class _SearchContext:
+    """One decision's fixed facts: who moves first, damage outcome lists, chip damage, deadline."""
+
+    def __init__(self, policy: ExpectiminimaxPolicy, me, foe, my_table, foe_table, me_first: bool, deadline: float):
+        self.policy = policy
+        self.hp_me, self.hp_foe = me["hp"], foe["hp"]
+        self.max_me, self.max_foe = me["max_hp"], foe["max_hp"]
+        self.me_first = me_first
+        self.my_out = policy.outcomes(my_table, me["_paralyzed"])
+        self.foe_out = policy.outcomes(foe_table, foe["_paralyzed"])
+        self.chip_me, self.chip_foe = chip_damage(me), chip_damage(foe)
+        self.deadline = deadline
+        # everything about the matchup besides the two HP values
+        self.matchup = (id(my_table), id(foe_table), me_first,
+                        (me["_paralyzed"], me["_burn"], me["_poison"]), (foe["_paralyzed"], foe["_burn"], foe["_poison"]))
+        self._ticks = 0
+
+    def root(self, depth: int, turns_left: int) -> int:
+        best_i, best_v = 0, -math.inf
+        for i in range(len(self.my_out)):
+            v = min(self.q(self.hp_me, self.hp_foe, i, j, depth, turns_left) for j in range(len(self.foe_out)))
+            if v > best_v:
+                best_i, best_v = i, v
+        return best_i
+
+    def value(self, hp_me: int, hp_foe: int, depth: int, turns_left: int) -> float:
+        if hp_me <= 0 or hp_foe <= 0:
+            return 0.0 if hp_me <= 0 and hp_foe <= 0 else (1.0 if hp_me > 0 else -1.0)
+        if turns_left <= 0:
+            # decide_winner compares raw HP at the turn cap
+            return 0.0 if hp_me == hp_foe else (1.0 if hp_me > hp_foe else -1.0)
+        if depth <= 0:
+            return hp_me / self.max_me - hp_foe / self.max_foe
+        self._ticks += 1
+        if self._ticks & 63 == 0 and time.perf_counter() > self.deadline:
+            raise _OutOfTime()
+        key = (self.matchup, hp_me, hp_foe, depth, min(turns_left, depth + 1))
+        v = self.policy.lookup(key)
+        if v is None:
+            v = max(min(self.q(hp_me, hp_foe, i, j, depth, turns_left) for j in range(len(self.foe_out)))
+                    for i in range(len(self.my_out)))
+            self.policy.store(key, v)
+        return v
+
+    def q(self, hp_me: int, hp_foe: int, i: int, j: int, depth: int, turns_left: int) -> float:
+        """Expected value of one turn where we use move i and the foe move j."""
+        total = 0.0
+        first, second = (self.my_out[i], self.foe_out[j]) if self.me_first else (self.foe_out[j], self.my_out[i])
+        for p1, d1 in first:
+            if self.me_first:
+                a_me, a_foe = hp_me, max(0, hp_foe - d1)
+                second_acts = a_foe > 0
+            else:
+                a_me, a_foe = max(0, hp_me - d1), hp_foe
+                second_acts = a_me > 0
+            for p2, d2 in (second if second_acts else ((1.0, 0),)):
+                if self.me_first:
+                    b_me, b_foe = max(0, a_me - d2), a_foe
+                else:
+                    b_me, b_foe = a_me, max(0, a_foe - d2)
+                # end-of-turn burn/poison hits both sides
+                b_me = max(0, b_me - self.chip_me)
+                b_foe = max(0, b_foe - self.chip_foe)
+                total += p1 * p2 * self.value(b_me, b_foe, depth - 1, turns_left - 1)
+        return total
+
+
+def make_policy(name: Optional[str], request_inst: Any = None, depth: int = 3, time_budget_ms: float = 50.0):
+    if name in (None, "random"):
+        return RandomPolicy(request_inst)
+    if name == "greedy":
+        return GreedyPolicy(request_inst)
+    if name == "expectiminimax":
+        return ExpectiminimaxPolicy(request_inst, depth=depth, time_budget_ms=time_budget_ms)
+    raise ValueError(f"Unknown move policy {name!r}")
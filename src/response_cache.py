@@ -0,0 +1,69 @@
+"""
+Pre-encoded JSON responses for the pokemon_data resource.
+
+Entries hold the response bytes, the same payload as plain JSON-ready data
+(for projections), and a content-hash ETag, keyed by normalized name. Each
+entry remembers the index record it was built from, so a record replaced by
+reload_index / invalidate_pokemon is re-encoded on the next request without
+any explicit bookkeeping; clear() drops everything at once.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from pydantic import BaseModel
+from .metrics import span, inc
+import hashlib
+import threading
+
+
+class CachedResponse(NamedTuple):
+    source: Any
+    data: Dict[str, Any]
+    body: bytes
+    etag: str
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak validators compare equal for GET
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries: Dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str, source: Any, build: Callable[[Any], BaseModel]) -> CachedResponse:
+        """Cached response for key if it was built from this same source object, else build(source) and store it."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.source is source:
+            self.stats["hits"] += 1
+            inc("response_cache.hits")
+            return entry
+        self.stats["misses"] += 1
+        inc("response_cache.misses")
+        with span("encode.pokemon_data"):
+            model = build(source)
+            body = model.model_dump_json().encode("utf-8")
+            entry = CachedResponse(source, model.model_dump(mode="json"), body, etag_for(body))
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def drop(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,312 @@
+"""
+Columnar snapshot of the roster, so startup doesn't parse ~1k JSON files plus
+the Kaggle CSV, and roster-wide queries run as numpy masks.
+
+Layout under data/snapshot/: current.json names the live generation directory
+(v{time_ns}-{pid}/), which holds one set of arrays per table ("roster" = the
+normalized records keyed like data/normalized, "basics" = Kaggle rows in CSV order):
+  meta.json                  source signature, type vocabulary, deduplicated
+                             evolution chains, per-table keys/names/abilities
+  {table}_stats.npy          int16 (N, 6), STAT_FIELDS order
+  {table}_types.npy          int16 (N, 2), codes into meta["types"], -1 = no type
+  {table}_generation.npy     int16 (N,), -1 = unknown
+  {table}_number.npy         int32 (N,), -1 = unknown
+  {table}_legendary.npy      bool (N,)
+  roster_chain.npy           int32 (N,), index into meta["chains"], -1 = null
+  roster_move_offsets.npy    int32 (N + 1,), row i's moves are move_ids[off[i]:off[i + 1]]
+  roster_move_ids.npy        int32, PokeAPI move ids (resolved through move_db)
+
+Arrays are opened with np.load(mmap_mode="r"), so files are never rewritten in
+place (truncating a mapped file kills its readers with SIGBUS): a rebuild writes
+a new generation directory and then atomically replaces current.json. Readers
+see the old snapshot or the new one, never a mix; the previous generation is
+kept for processes still switching. A snapshot is only used while
+its source signature (count, sizes and mtimes of the normalized files, the CSV)
+still matches, so a record built on the fly sends the next startup back to the
+JSON files until the snapshot is rebuilt:
+
+    python -m src.roster_snapshot build
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from pathlib import Path
+from .utils import DATA_DIR, load_json_file, write_json_file
+import numpy as np
+import json
+import os
+import shutil
+import time
+
+SNAPSHOT_DIR = DATA_DIR / "snapshot"
+# {"dir": generation directory name}
+CURRENT_PATH = SNAPSHOT_DIR / "current.json"
+# generations kept on disk: the current one and the one before it
+KEEP_GENERATIONS = 2
+FORMAT_VERSION = 1
+
+STAT_FIELDS = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+BASIC_FIELDS = ("name", "number", "types", "abilities", "stats", "generation", "legendary")
+# key order of a stored data/normalized record
+ROSTER_FIELDS = BASIC_FIELDS + ("evolution_chain", "move_ids")
+TABLE_FIELDS = {"roster": ROSTER_FIELDS, "basics": BASIC_FIELDS}
+
+
+def source_signature(normalized_dir: Path, csv_path: Path) -> Dict[str, Any]:
+    count = size = mtime_sum = mtime_max = 0
+    if normalized_dir.is_dir():
+        with os.scandir(normalized_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    count += 1
+                    size += st.st_size
+                    mtime_sum += st.st_mtime_ns
+                    mtime_max = max(mtime_max, st.st_mtime_ns)
+    csv = None
+    if csv_path.exists():
+        st = csv_path.stat()
+        csv = [st.st_size, st.st_mtime_ns]
+    return {"files": count, "size": size, "mtime_sum": mtime_sum, "mtime_max": mtime_max, "csv": csv}
+
+
+def _fits(rec: Dict[str, Any], fields: Tuple[str, ...]) -> bool:
+    """True when the columns reproduce rec exactly."""
+    if tuple(rec.keys()) != fields:
+        return False
+    stats = rec["stats"]
+    types = rec["types"]
+    return (isinstance(stats, dict) and tuple(stats.keys()) == STAT_FIELDS
+            and all(type(v) is int and -2**15 <= v < 2**15 for v in stats.values())
+            and isinstance(types, list) and len(types) <= 2 and all(isinstance(t, str) for t in types)
+            and isinstance(rec["abilities"], list)
+            and all(v is None or (type(v) is int and 0 <= v < 2**15) for v in (rec["number"], rec["generation"]))
+            and type(rec["legendary"]) is bool
+            and all(type(i) is int for i in rec.get("move_ids", ())))
+
+
+def _columns(records: List[Dict[str, Any]], fields: Tuple[str, ...], types: Dict[str, int],
+             chains: Dict[str, int], chain_list: List[Any]) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    n = len(records)
+    stats = np.zeros((n, len(STAT_FIELDS)), dtype=np.int16)
+    type_codes = np.full((n, 2), -1, dtype=np.int16)
+    generation = np.full(n, -1, dtype=np.int16)
+    number = np.full(n, -1, dtype=np.int32)
+    legendary = np.zeros(n, dtype=bool)
+    names: List[str] = []
+    abilities: List[List[str]] = []
+    # rows the columns can't reproduce are kept verbatim (their columns still filled for queries)
+    raw: Dict[str, Dict[str, Any]] = {}
+    chain = np.full(n, -1, dtype=np.int32)
+    offsets = np.zeros(n + 1, dtype=np.int32)
+    move_ids: List[int] = []
+    for i, rec in enumerate(records):
+        if not _fits(rec, fields):
+            raw[str(i)] = rec
+        names.append(str(rec.get("name")))
+        abilities.append(list(rec.get("abilities") or []))
+        st = rec.get("stats") or {}
+        stats[i] = [int(st.get(f, 0)) for f in STAT_FIELDS]
+        for j, t in enumerate((rec.get("types") or [])[:2]):
+            type_codes[i, j] = types.setdefault(t, len(types))
+        if rec.get("generation") is not None:
+            generation[i] = rec["generation"]
+        if rec.get("number") is not None:
+            number[i] = rec["number"]
+        legendary[i] = bool(rec.get("legendary", False))
+        if "move_ids" in fields:
+            evo = rec.get("evolution_chain")
+            if evo is not None:
+                key = json.dumps(evo, sort_keys=True)
+                if key not in chains:
+                    chains[key] = len(chain_list)
+                    chain_list.append(evo)
+                chain[i] = chains[key]
+            ids = [m for m in rec.get("move_ids") or () if type(m) is int]
+            move_ids.extend(ids)
+            offsets[i + 1] = offsets[i] + len(ids)
+    arrays = {"stats": stats, "types": type_codes, "generation": generation, "number": number, "legendary": legendary}
+    if "move_ids" in fields:
+        arrays.update(chain=chain, move_offsets=offsets, move_ids=np.asarray(move_ids, dtype=np.int32))
+    return arrays, {"names": names, "abilities": abilities, "raw": raw}
+
+
+def write_snapshot(normalized_dir: Path, csv_path: Path, basics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write data/snapshot from the stored normalized files and the Kaggle basics."""
+    signature = source_signature(normalized_dir, csv_path)
+    keys: List[str] = []
+    records: List[Dict[str, Any]] = []
+    for p in sorted(normalized_dir.glob("*.json")):
+        with open(p, "r", encoding="utf-8") as f:
+            records.append(json.load(f))
+        keys.append(p.stem)
+    types: Dict[str, int] = {}
+    chains: Dict[str, int] = {}
+    chain_list: List[Any] = []
+    tables = {}
+    # a fresh directory nobody has mapped yet; it only becomes visible through current.json
+    gen = f"v{time.time_ns()}-{os.getpid()}"
+    out = SNAPSHOT_DIR / gen
+    out.mkdir(parents=True)
+    for table, rows in (("roster", records), ("basics", basics)):
+        arrays, info = _columns(rows, TABLE_FIELDS[table], types, chains, chain_list)
+        for col, arr in arrays.items():
+            np.save(out / f"{table}_{col}.npy", arr)
+        tables[table] = {"rows": len(rows), "columns": sorted(arrays), **info}
+    tables["roster"]["keys"] = keys
+    meta = {"version": FORMAT_VERSION, "source": signature, "types": list(types), "chains": chain_list, "tables": tables}
+    with open(out / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+    write_json_file(CURRENT_PATH, {"dir": gen})
+    _drop_old_generations(gen)
+    return {"roster": len(records), "basics": len(basics), "raw": sum(len(t["raw"]) for t in tables.values()),
+            "chains": len(chain_list)}
+
+
+def _current_dir() -> Optional[Path]:
+    current = load_json_file(CURRENT_PATH)
+    if not isinstance(current, dict) or not current.get("dir"):
+        return None
+    return SNAPSHOT_DIR / current["dir"]
+
+
+def _drop_old_generations(current: str):
+    # unlinking is safe for processes that still map the files, only new opens fail
+    gens = sorted((p for p in SNAPSHOT_DIR.iterdir() if p.is_dir() and p.name.startswith("v")),
+                  key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    keep = {current} | {p.name for p in gens[:KEEP_GENERATIONS]}
+    for p in gens:
+        if p.name not in keep:
+            shutil.rmtree(p, ignore_errors=True)
+    # flat files from the layout before generation directories
+    for p in SNAPSHOT_DIR.glob("*.npy"):
+        p.unlink(missing_ok=True)
+    (SNAPSHOT_DIR / "meta.json").unlink(missing_ok=True)
+
+
+class RosterSnapshot:
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, Dict[str, np.ndarray]]):
+        self.meta = meta
+        self.arrays = arrays
+        self.types: List[str] = meta["types"]
+        self.keys: List[str] = meta["tables"]["roster"]["keys"]
+        self.row: Dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+        self._resist: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def column(self, name: str, table: str = "roster") -> np.ndarray:
+        return self.arrays[table][name]
+
+    def records(self, table: str) -> Iterator[Dict[str, Any]]:
+        """Rebuild the stored dicts (roster: stored move_ids form, not yet resolved)."""
+        info = self.meta["tables"][table]
+        cols = self.arrays[table]
+        stats = cols["stats"].tolist()
+        type_codes = cols["types"].tolist()
+        generation = cols["generation"].tolist()
+        number = cols["number"].tolist()
+        legendary = cols["legendary"].tolist()
+        roster = table == "roster"
+        if roster:
+            chain = cols["chain"].tolist()
+            offsets = cols["move_offsets"].tolist()
+            move_ids = cols["move_ids"].tolist()
+            chains = self.meta["chains"]
+        raw = info["raw"]
+        for i, name in enumerate(info["names"]):
+            if str(i) in raw:
+                yield raw[str(i)]
+                continue
+            rec = {
+                "name": name,
+                "number": number[i] if number[i] >= 0 else None,
+                "types": [self.types[c] for c in type_codes[i] if c >= 0],
+                "abilities": list(info["abilities"][i]),
+                "stats": dict(zip(STAT_FIELDS, stats[i])),
+                "generation": generation[i] if generation[i] >= 0 else None,
+                "legendary": legendary[i],
+            }
+            if roster:
+                rec["evolution_chain"] = chains[chain[i]] if chain[i] >= 0 else None
+                rec["move_ids"] = move_ids[offsets[i]:offsets[i + 1]]
+            yield rec
+
+    def _resist_table(self) -> np.ndarray:
+        # R[atk, c1 + 1, c2 + 1]: multiplier of attacking type atk vs a (c1, c2) defender, code -1 = no type
+        if self._resist is None:
+            from .battle_sim import DEFENDER_PRODUCTS, N_TYPES, NO_TYPE, type_index
+            codes = [type_index(t) for t in self.types]
+            slots = [NO_TYPE] + [NO_TYPE if i is None else i for i in codes]
+            table = np.asarray(DEFENDER_PRODUCTS, dtype=np.float64)  # [d1][d2][atk]
+            self._resist = np.ascontiguousarray(table[np.ix_(slots, slots, range(N_TYPES))].transpose(2, 0, 1))
+        return self._resist
+
+    def multipliers(self, attacking_type: str) -> np.ndarray:
+        """Damage multiplier of attacking_type against every roster row."""
+        from .battle_sim import type_index
+        atk = type_index(attacking_type)
+        codes = self.column("types")
+        if atk is None:
+            return np.ones(len(codes))
+        return self._resist_table()[atk][codes[:, 0] + 1, codes[:, 1] + 1]
+
+    def mask(self, generation: Optional[int] = None, type: Optional[str] = None, legendary: Optional[bool] = None,
+             min_stats: Optional[Dict[str, int]] = None, max_stats: Optional[Dict[str, int]] = None,
+             resists: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Roster rows passing every filter; same semantics as bulk.matches."""
+        m = np.ones(len(self.keys), dtype=bool)
+        if generation is not None:
+            m &= self.column("generation") == generation
+        if type is not None:
+            codes = [c for c, t in enumerate(self.types) if t.lower() == type.lower()]
+            m &= np.isin(self.column("types"), codes).any(axis=1)
+        if legendary is not None:
+            m &= self.column("legendary") == legendary
+        stats = self.column("stats")
+        for bound, op in ((min_stats, np.greater_equal), (max_stats, np.less_equal)):
+            for stat, value in (bound or {}).items():
+                m &= op(stats[:, STAT_FIELDS.index(stat)], value)
+        for t in resists or ():
+            m &= self.multipliers(t) < 1.0
+        return m
+
+    def select(self, **filters: Any) -> List[str]:
+        """Roster keys passing the filters, in row (key) order."""
+        return [self.keys[i] for i in np.flatnonzero(self.mask(**filters))]
+
+
+def load_snapshot(normalized_dir: Path, csv_path: Path) -> Optional[RosterSnapshot]:
+    """The current snapshot under data/snapshot if it exists and still matches its sources, else None."""
+    gen = _current_dir()
+    if gen is None:
+        return None
+    try:
+        meta = load_json_file(gen / "meta.json")
+    except OSError:
+        # replaced and dropped between reading current.json and here
+        return None
+    if meta is None or meta.get("version") != FORMAT_VERSION:
+        return None
+    if meta["source"] != source_signature(normalized_dir, csv_path):
+        return None
+    try:
+        arrays = {table: {col: np.load(gen / f"{table}_{col}.npy", mmap_mode="r") for col in info["columns"]}
+                  for table, info in meta["tables"].items()}
+    except (OSError, ValueError):
+        return None
+    return RosterSnapshot(meta, arrays)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from .data_loader import NORMALIZED_DIR, DATA_RAW, write_roster_snapshot
+    ap = argparse.ArgumentParser(description="Columnar roster snapshot")
+    ap.add_argument("cmd", choices=["build", "check"], help="build: (re)write data/snapshot; check: is the current one usable")
+    args = ap.parse_args()
+    if args.cmd == "build":
+        print(write_roster_snapshot())
+    else:
+        t = time.perf_counter()
+        snap = load_snapshot(NORMALIZED_DIR, DATA_RAW)
+        print({"usable": snap is not None, "rows": len(snap) if snap else 0, "load_ms": round((time.perf_counter() - t) * 1000, 2)})
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Literal
 
 class Move(BaseModel):
     name: str
@@ -30,6 +30,23 @@ class PokemonResource(BaseModel):
     # additional metadata
     source: Optional[str] = "kaggle+pokeapi"
 
+class BulkPokemonRequest(BaseModel):
+    # explicit names (kept in request order); omit to page through the whole roster
+    names: Optional[List[str]] = None
+    # PokemonResource fields to return, e.g. ["stats", "types"]; name is always included
+    fields: Optional[List[str]] = None
+    generation: Optional[int] = None
+    type: Optional[str] = None
+    legendary: Optional[bool] = None
+    # inclusive stat bounds, e.g. {"speed": 100}
+    min_stats: Optional[Dict[str, int]] = None
+    max_stats: Optional[Dict[str, int]] = None
+    # attacking types every result takes less than 1x damage from, e.g. ["fire"]
+    resists: Optional[List[str]] = None
+    cursor: Optional[str] = None
+    limit: int = Field(100, ge=1, le=1000)
+    format: Literal["ndjson", "json"] = "ndjson"
+
 class BattlePokemonInstance(BaseModel):
     name: str
     level: Optional[int] = 50
@@ -38,10 +55,17 @@ class BattlePokemonInstance(BaseModel):
     item: Optional[str] = None
     # can include forced status for testing
     status: Optional[str] = None
+    # move selection when no requested move matches: "random" (default), "greedy", "expectiminimax"
+    policy: Optional[Literal["random", "greedy", "expectiminimax"]] = None
 
 class BattleOptions(BaseModel):
     seed: Optional[int] = None
     max_turns: Optional[int] = 200
+    # "full": turn-by-turn narration, "summary": faint lines + result, "none": empty battle_log
+    log_level: Literal["none", "summary", "full"] = "full"
+    # expectiminimax search limits, per move decision
+    search_depth: int = Field(3, ge=1, le=6)
+    time_budget_ms: float = Field(50.0, gt=0, le=2000)
 
 class BattleRequest(BaseModel):
     pokemon_a: BattlePokemonInstance
@@ -59,3 +83,124 @@ class BattleResult(BaseModel):
     winner: Optional[str] = None  # "pokemon_a", "pokemon_b", "draw"
     turns: int
     final_states: Dict[str, PokemonFinalState]
+
+class BatchBattleRequest(BattleRequest):
+    n_runs: int = Field(1000, ge=1, le=100000)
+    # run i uses seed base_seed + i, so any single run can be replayed via /mcp/tools/battle/simulate
+    base_seed: Optional[int] = None
+    # "vector" runs all battles in lockstep with numpy (same rules, different rng stream)
+    engine: Literal["scalar", "vector"] = "scalar"
+
+class BattleCheckpointRequest(BattleRequest):
+    # turns to play before taking the checkpoint (fewer if the battle ends first)
+    turns: int = Field(1, ge=0, le=1000)
+
+class BattleCheckpoint(BaseModel):
+    # opaque: turn, both hp values and the rng state, bound to this request's two sides
+    state: str
+    seed: int
+    turn: int
+    hp: Dict[str, int]
+    finished: bool
+    battle_log: List[str]
+
+class BattleResumeRequest(BattleRequest):
+    state: str
+    # None continues with the checkpointed dice rolls; a seed rerolls everything after the checkpoint
+    reseed: Optional[int] = None
+
+class BattleForkRequest(BattleRequest):
+    state: str
+    n_runs: int = Field(1000, ge=1, le=100000)
+    # fork i is reseeded with base_seed + i
+    base_seed: Optional[int] = None
+
+class Distribution(BaseModel):
+    mean: float
+    std: float
+    min: int
+    p5: int
+    p25: int
+    p50: int
+    p75: int
+    p95: int
+    max: int
+    histogram: Dict[int, int]
+
+class RateEstimate(BaseModel):
+    rate: float
+    ci_low: float  # 95% Wilson score interval
+    ci_high: float
+
+class BatchBattleResult(BaseModel):
+    pokemon_a: str
+    pokemon_b: str
+    n_runs: int
+    base_seed: int
+    wins_a: int
+    wins_b: int
+    draws: int
+    win_rate_a: RateEstimate
+    win_rate_b: RateEstimate
+    draw_rate: RateEstimate
+    turns: Distribution
+    remaining_hp_a: Distribution
+    remaining_hp_b: Distribution
+
+class BattleTeam(BaseModel):
+    members: List[BattlePokemonInstance] = Field(..., min_length=1, max_length=6)
+    # how the next member is picked after a faint, see team_battle.SWITCH_POLICIES
+    switch_policy: str = "in_order"
+
+class TeamBattleRequest(BaseModel):
+    team_a: BattleTeam
+    team_b: BattleTeam
+    options: Optional[BattleOptions] = BattleOptions()
+
+class TeamBattleResult(BaseModel):
+    battle_log: List[str]
+    winner: Optional[str] = None  # "team_a", "team_b", "draw"
+    turns: int
+    switches: int
+    final_states: Dict[str, List[PokemonFinalState]]
+
+class TeamBatchBattleRequest(TeamBattleRequest):
+    n_runs: int = Field(1000, ge=1, le=100000)
+    # run i uses seed base_seed + i, same as /mcp/tools/battle/simulate_team with that seed
+    base_seed: Optional[int] = None
+
+class TeamBatchBattleResult(BaseModel):
+    team_a: List[str]
+    team_b: List[str]
+    n_runs: int
+    base_seed: int
+    wins_a: int
+    wins_b: int
+    draws: int
+    win_rate_a: RateEstimate
+    win_rate_b: RateEstimate
+    draw_rate: RateEstimate
+    turns: Distribution
+    survivors_a: Distribution
+    survivors_b: Distribution
+
+class ExactBattleResult(BaseModel):
+    pokemon_a: str
+    pokemon_b: str
+    win_prob_a: float
+    win_prob_b: float
+    draw_prob: float
+    expected_turns: float
+    turn_cap_prob: float  # P(battle reaches options.max_turns and is decided on HP)
+    residual: float       # probability mass left unresolved (below the solver tolerance)
+    states: int           # size of the HP grid
+    cached: bool = False
+
+class CounterEntry(BaseModel):
+    name: str
+    win_rate_vs: float      # P(this pokemon beats the target)
+    target_win_rate: float  # P(target beats this pokemon)
+
+class CountersResult(BaseModel):
+    name: str
+    counters: List[CounterEntry]
@@ -1,24 +1,149 @@
 # src/server.py
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from .data_loader import get_normalized_pokemon, normalize_all_and_write
-from .schemas import PokemonResource, BattleRequest, BattleResult
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from .data_loader import (get_normalized_pokemon_async, get_resident_pokemon, get_index, reload_index, normalize_name, suggest_names,
+                          normalize_all_and_write)
+from .schemas import (PokemonResource, BulkPokemonRequest, BattleRequest, BattleResult, BatchBattleRequest, BatchBattleResult, CountersResult,
+                      TeamBattleRequest, TeamBattleResult, TeamBatchBattleRequest, TeamBatchBattleResult, ExactBattleResult,
+                      BattleCheckpointRequest, BattleCheckpoint, BattleResumeRequest, BattleForkRequest)
 from .battle_sim import simulate_battle
-from typing import Dict, Any
+from .batch_sim import simulate_batch, stream_batch_part, split_batch, merge_batches
+from .battle_state import BattleState, sides_fingerprint, checkpoint_battle, resume_battle, fork_batch, stream_battle_part
+from .team_battle import simulate_team_battle, simulate_team_batch, SWITCH_POLICIES
+from .exact_sim import solve_matchup
+from .matchups import best_counters, build_matchup_matrix
+from .move_db import move_dicts
+from .offload import QueueFull, executor_from_env
+from .jobs import JobManager
+from .utils import SERVE_ONLY
+from .pokeapi_client import client_status
+from .response_cache import ResponseCache, etag_matches
+from .bulk import check_fields, check_filters, decode_cursor, encode_cursor, matches, project, select_roster
+from . import metrics
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from contextlib import nullcontext
 from pathlib import Path
+import asyncio
 import json
+import os
+import time
 
 app = FastAPI(title="Pokemon MCP Server (MCP-like)")
 
+class MetricsMiddleware:
+    """
+    Request latency/count per route template, plus opt-in per-request profiling:
+    send "X-Profile: 1" and the response carries Server-Timing and an
+    X-Profile-Breakdown JSON header with every span/counter recorded for that call.
+    Pure ASGI so streamed responses aren't buffered.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = (b"x-profile", b"1") in scope.get("headers", ())
+        if not metrics.ENABLED and not profile:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if profile:
+                    total = ("span", "total", (), time.perf_counter() - start)
+                    timing = metrics.server_timing(records + [total])
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1")),
+                        (b"x-profile-breakdown", json.dumps(metrics.breakdown(records)).encode("latin-1")),
+                    ]
+            await send(message)
+
+        with metrics.collect() if profile else nullcontext([]) as records:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                labels = {"route": getattr(route, "path", None) or "unmatched"}
+                metrics.observe("http.request", time.perf_counter() - start, labels)
+                metrics.inc("http.requests", labels={**labels, "status": str(status["code"])})
+
+app.add_middleware(MetricsMiddleware)
+
+# CPU-bound simulations run here, not on the event loop (SIM_WORKERS / SIM_MAX_QUEUE)
+sim_executor = executor_from_env()
+jobs = JobManager()
+# encoded pokemon_data responses; only change when the normalized data does
+resource_cache = ResponseCache()
+RESOURCE_MAX_AGE = int(os.environ.get("RESOURCE_MAX_AGE", "300"))
+
+@app.on_event("startup")
+async def load_pokemon_index():
+    # build the resident pokemon index once so lookups never hit disk/pandas per request
+    await asyncio.to_thread(get_index)
+    sim_executor.start()
+
+@app.on_event("shutdown")
+async def stop_sim_executor():
+    sim_executor.shutdown()
+
+def matchup_key(*sides: BaseModel) -> str:
+    # routing key under SIM_ROUTING=matchup: same pokemon/teams (and their settings) -> same worker
+    return "|".join(side.model_dump_json() for side in sides)
+
+async def run_simulation(fn, *args, key: Optional[str] = None):
+    try:
+        return await sim_executor.run(fn, *args, key=key)
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Simulation queue is full, retry shortly", headers={"Retry-After": "1"})
+
+async def run_batch(payload: BatchBattleRequest) -> Optional[BatchBattleResult]:
+    parts = split_batch(payload, sim_executor.shards)
+    if len(parts) == 1:
+        return await run_simulation(simulate_batch, payload, key=matchup_key(payload.pokemon_a, payload.pokemon_b))
+    # big batch over several shards: consecutive run ranges, merged back exactly
+    try:
+        results = await sim_executor.run_sharded(simulate_batch, [(p,) for p in parts])
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Simulation queue is full, retry shortly", headers={"Retry-After": "1"})
+    if any(r is None for r in results):
+        return None
+    return merge_batches(results, parts[0].base_seed)
+
+class PokemonNotFound(Exception):
+    """404 whose body adds "did_you_mean": requested name -> closest known names, for each name that didn't resolve."""
+    def __init__(self, detail: str, names: List[str]):
+        self.detail = detail
+        self.names = names
+
+@app.exception_handler(PokemonNotFound)
+async def pokemon_not_found(request: Request, exc: PokemonNotFound):
+    missing = [n for n in exc.names if get_resident_pokemon(n) is None]
+    return JSONResponse(status_code=404, content={"detail": exc.detail, "did_you_mean": {n: suggest_names(n) for n in missing}})
+
+def model_response(model: BaseModel) -> Response:
+    # encode here rather than in FastAPI so the serialization cost shows up as its own span
+    with metrics.span("encode.response"):
+        body = model.model_dump_json().encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
 # Minimal discovery endpoint following MCP idea
 @app.get("/.well-known/mcp")
-def discovery():
+async def discovery():
     # This is a lightweight discovery descriptor: list resources and tools and sample schemas
     resources = {
         "pokemon_data": {
             "description": "Comprehensive pokemon data resource",
             "endpoint": "/mcp/resources/pokemon_data/{name}",
             "schema": "schemas.PokemonResource (see /docs)"
+        },
+        "pokemon_data_bulk": {
+            "description": "Many pokemon in one request: names and/or filters, field projection, cursor paging, NDJSON",
+            "endpoint": "/mcp/resources/pokemon_data/bulk",
+            "input": "schemas.BulkPokemonRequest"
         }
     }
     tools = {
@@ -27,15 +152,68 @@ def discovery():
             "endpoint": "/mcp/tools/battle/simulate",
             "input": "schemas.BattleRequest",
             "output": "schemas.BattleResult"
+        },
+        "pokemon_battle_batch": {
+            "description": "Run N seeded battles between two pokemon and return win-rate statistics",
+            "endpoint": "/mcp/tools/battle/simulate_batch",
+            "input": "schemas.BatchBattleRequest",
+            "output": "schemas.BatchBattleResult"
+        },
+        "pokemon_battle_stream": {
+            "description": "simulate as Server-Sent Events: start, one event per turn as it is computed, result",
+            "endpoint": "/mcp/tools/battle/simulate_stream",
+            "input": "schemas.BattleRequest"
+        },
+        "pokemon_battle_batch_stream": {
+            "description": "simulate_batch as Server-Sent Events: one summary per run, then the batch result",
+            "endpoint": "/mcp/tools/battle/simulate_batch_stream",
+            "input": "schemas.BatchBattleRequest"
+        },
+        "pokemon_battle_checkpoint": {
+            "description": "Play the first N turns of a seeded battle and return its state (turn, hp, rng) as an opaque token",
+            "endpoint": "/mcp/tools/battle/checkpoint",
+            "input": "schemas.BattleCheckpointRequest",
+            "output": "schemas.BattleCheckpoint"
+        },
+        "pokemon_battle_resume": {
+            "description": "Continue a checkpointed battle to the end: the exact original battle, or rerolled with reseed",
+            "endpoint": "/mcp/tools/battle/resume",
+            "input": "schemas.BattleResumeRequest",
+            "output": "schemas.BattleResult"
+        },
+        "pokemon_battle_fork": {
+            "description": "What-if from a checkpoint: N reseeded forks of the same position, win-rate statistics",
+            "endpoint": "/mcp/tools/battle/fork",
+            "input": "schemas.BattleForkRequest",
+            "output": "schemas.BatchBattleResult"
+        },
+        "pokemon_battle_solver": {
+            "description": "Exact win/draw probabilities and expected turns for a 1v1 battle (no sampling)",
+            "endpoint": "/mcp/tools/battle/solve",
+            "input": "schemas.BattleRequest",
+            "output": "schemas.ExactBattleResult"
+        },
+        "pokemon_team_battle_simulator": {
+            "description": "Simulate a battle between two teams of up to 6, switching in the next member on a faint",
+            "endpoint": "/mcp/tools/battle/simulate_team",
+            "input": "schemas.TeamBattleRequest",
+            "output": "schemas.TeamBattleResult"
+        },
+        "pokemon_team_battle_batch": {
+            "description": "Run N seeded team battles and return team win-rate statistics",
+            "endpoint": "/mcp/tools/battle/simulate_team_batch",
+            "input": "schemas.TeamBatchBattleRequest",
+            "output": "schemas.TeamBatchBattleResult"
+        },
+        "pokemon_counters": {
+            "description": "Best counters to a pokemon, read from the precomputed round-robin matchup matrix",
+            "endpoint": "/mcp/tools/matchups/counters/{name}",
+            "output": "schemas.CountersResult"
         }
     }
     return {"resources": resources, "tools": tools}
 
-@app.get("/mcp/resources/pokemon_data/{name}", response_model=PokemonResource)
-def pokemon_resource(name: str):
-    p = get_normalized_pokemon(name)
-    if not p:
-        raise HTTPException(status_code=404, detail=f"Pokemon {name} not found")
+def build_resource(p: Dict[str, Any]) -> PokemonResource:
     # massage into schema-friendly shape
     # ensure stats object has expected keys
     stats = p.get("stats", {})
@@ -54,24 +232,249 @@ def pokemon_resource(name: str):
         },
         generation=p.get("generation"),
         legendary=p.get("legendary", False),
-        moves=p.get("moves", []),
+        moves=move_dicts(p.get("moves", [])),
         evolution_chain=p.get("evolution_chain", None)
     )
 
+@app.get("/mcp/resources/pokemon_data/{name}", response_model=PokemonResource)
+async def pokemon_resource(name: str, if_none_match: Optional[str] = Header(None)):
+    p = await get_normalized_pokemon_async(name)
+    if not p:
+        raise PokemonNotFound(f"Pokemon {name} not found", [name])
+    cached = resource_cache.get(normalize_name(p["name"]), p, build_resource)
+    headers = {"ETag": cached.etag, "Cache-Control": f"public, max-age={RESOURCE_MAX_AGE}"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@app.post("/mcp/resources/pokemon_data/bulk")
+async def pokemon_resource_bulk(payload: BulkPokemonRequest):
+    try:
+        fields = check_fields(payload.fields)
+        check_filters(payload.min_stats, payload.max_stats, payload.resists)
+        offset = decode_cursor(payload.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    filters = {"generation": payload.generation, "type": payload.type, "legendary": payload.legendary,
+               "min_stats": payload.min_stats, "max_stats": payload.max_stats, "resists": payload.resists}
+    # (requested name, record or None) in output order
+    if payload.names is not None:
+        found = await asyncio.gather(*(get_normalized_pokemon_async(n) for n in payload.names))
+        selected = [(n, p) for n, p in zip(payload.names, found) if p is None or matches(p, **filters)]
+    else:
+        idx = get_index()
+        selected = [(k, idx.record(k)) for k in select_roster(idx, **filters)]
+    page = selected[offset:offset + payload.limit]
+    next_cursor = encode_cursor(offset + payload.limit) if offset + payload.limit < len(selected) else None
+
+    def encode(name: str, p: Optional[Dict[str, Any]]) -> bytes:
+        if p is None:
+            return json.dumps({"name": name, "error": "not found", "did_you_mean": suggest_names(name)}, ensure_ascii=False).encode("utf-8")
+        cached = resource_cache.get(normalize_name(p["name"]), p, build_resource)
+        if fields is None:
+            return cached.body
+        return json.dumps(project(cached.data, fields), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    headers = {"X-Total-Count": str(len(selected))}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if payload.format == "json":
+        body = b'{"items":[' + b",".join(encode(n, p) for n, p in page) + b'],"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    # async so Starlette doesn't hop to the threadpool for every line
+    async def lines():
+        for n, p in page:
+            yield encode(n, p) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
 @app.post("/mcp/tools/battle/simulate", response_model=BattleResult)
-def battle_sim_tool(payload: BattleRequest):
+async def battle_sim_tool(payload: BattleRequest):
     # run simulation
-    result = simulate_battle(payload)
-    return result
+    result = await run_simulation(simulate_battle, payload, key=matchup_key(payload.pokemon_a, payload.pokemon_b))
+    return model_response(result)
+
+@app.post("/mcp/tools/battle/simulate_batch", response_model=BatchBattleResult)
+async def battle_batch_tool(payload: BatchBattleRequest):
+    result = await run_batch(payload)
+    if result is None:
+        raise PokemonNotFound(f"Pokemon {payload.pokemon_a.name} or {payload.pokemon_b.name} not found", [payload.pokemon_a.name, payload.pokemon_b.name])
+    return model_response(result)
+
+# a stream is a series of simulation jobs of up to STREAM_PART events, or fewer after STREAM_PART_S
+STREAM_PART = 1024
+STREAM_PART_S = 0.05
+STREAM_RETRY_S = 0.05
+
+def sse(event: Dict[str, Any]) -> bytes:
+    data = json.dumps({k: v for k, v in event.items() if k != "event"}, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event['event']}\ndata: {data}\n\n".encode("utf-8")
+
+async def stream_part(fn, payload, cursor, key: Optional[str]):
+    # the stream was admitted with its first part: later parts wait for room in the queue instead of failing
+    while True:
+        try:
+            return await sim_executor.run(fn, payload, cursor, STREAM_PART, STREAM_PART_S, key=key)
+        except QueueFull:
+            await asyncio.sleep(STREAM_RETRY_S)
+
+async def sse_response(fn, payload, key: Optional[str]) -> StreamingResponse:
+    # fn(payload, cursor, ...) parts (see stream_battle_part) run on the simulation executor, the first one
+    # before answering so a full queue is still a 503; only one part runs ahead of what was sent, so a slow
+    # reader pauses the simulation instead of buffering its output
+    first = await run_simulation(fn, payload, None, STREAM_PART, STREAM_PART_S, key=key)
+    async def body():
+        events, cursor = first
+        ahead = None
+        try:
+            while True:
+                if cursor is not None:
+                    ahead = asyncio.ensure_future(stream_part(fn, payload, cursor, key))
+                yield b"".join(sse(ev) for ev in events)
+                if ahead is None:
+                    return
+                events, cursor = await ahead
+                ahead = None
+        finally:
+            if ahead is not None:
+                ahead.cancel()
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/mcp/tools/battle/simulate_stream")
+async def battle_stream_tool(payload: BattleRequest):
+    return await sse_response(stream_battle_part, payload, matchup_key(payload.pokemon_a, payload.pokemon_b))
+
+@app.post("/mcp/tools/battle/simulate_batch_stream")
+async def battle_batch_stream_tool(payload: BatchBattleRequest):
+    if payload.engine != "scalar":
+        raise HTTPException(status_code=422, detail="Streaming runs the scalar engine only")
+    a, b = await asyncio.gather(get_normalized_pokemon_async(payload.pokemon_a.name), get_normalized_pokemon_async(payload.pokemon_b.name))
+    if a is None or b is None:
+        raise PokemonNotFound(f"Pokemon {payload.pokemon_a.name} or {payload.pokemon_b.name} not found", [payload.pokemon_a.name, payload.pokemon_b.name])
+    return await sse_response(stream_batch_part, payload, matchup_key(payload.pokemon_a, payload.pokemon_b))
+
+@app.post("/mcp/tools/battle/solve", response_model=ExactBattleResult)
+async def battle_solve_tool(payload: BattleRequest):
+    if any(p.policy not in (None, "random") for p in (payload.pokemon_a, payload.pokemon_b)):
+        raise HTTPException(status_code=422, detail="The exact solver models random move choice only")
+    result = await run_simulation(solve_matchup, payload, key=matchup_key(payload.pokemon_a, payload.pokemon_b))
+    if result is None:
+        raise PokemonNotFound(f"Pokemon {payload.pokemon_a.name} or {payload.pokemon_b.name} not found", [payload.pokemon_a.name, payload.pokemon_b.name])
+    return model_response(result)
+
+@app.post("/mcp/tools/battle/checkpoint", response_model=BattleCheckpoint)
+async def battle_checkpoint_tool(payload: BattleCheckpointRequest):
+    result = await run_simulation(checkpoint_battle, payload, key=matchup_key(payload.pokemon_a, payload.pokemon_b))
+    if result is None:
+        raise PokemonNotFound(f"Pokemon {payload.pokemon_a.name} or {payload.pokemon_b.name} not found", [payload.pokemon_a.name, payload.pokemon_b.name])
+    return model_response(result)
 
-# util route to normalize whole dataset (heavy)
-@app.post("/admin/normalize_all")
-def admin_normalize_all():
+async def run_from_state(fn, payload):
+    # cheap checks here so a bad token is a 422, not a worker error
     try:
-        normalize_all_and_write()
-        return {"status": "ok"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        state = BattleState.decode(payload.state)
+        if state.fingerprint != sides_fingerprint(payload):
+            raise ValueError("The battle state belongs to a different matchup")
+        result = await run_simulation(fn, payload, key=matchup_key(payload.pokemon_a, payload.pokemon_b))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if result is None:
+        raise PokemonNotFound(f"Pokemon {payload.pokemon_a.name} or {payload.pokemon_b.name} not found", [payload.pokemon_a.name, payload.pokemon_b.name])
+    return model_response(result)
+
+@app.post("/mcp/tools/battle/resume", response_model=BattleResult)
+async def battle_resume_tool(payload: BattleResumeRequest):
+    return await run_from_state(resume_battle, payload)
+
+@app.post("/mcp/tools/battle/fork", response_model=BatchBattleResult)
+async def battle_fork_tool(payload: BattleForkRequest):
+    return await run_from_state(fork_batch, payload)
+
+def check_switch_policies(payload: TeamBattleRequest):
+    for team in (payload.team_a, payload.team_b):
+        if team.switch_policy not in SWITCH_POLICIES:
+            raise HTTPException(status_code=422, detail=f"Unknown switch_policy {team.switch_policy!r}; available: {', '.join(SWITCH_POLICIES)}")
+
+@app.post("/mcp/tools/battle/simulate_team", response_model=TeamBattleResult)
+async def team_battle_tool(payload: TeamBattleRequest):
+    check_switch_policies(payload)
+    return model_response(await run_simulation(simulate_team_battle, payload, key=matchup_key(payload.team_a, payload.team_b)))
+
+@app.post("/mcp/tools/battle/simulate_team_batch", response_model=TeamBatchBattleResult)
+async def team_batch_tool(payload: TeamBatchBattleRequest):
+    check_switch_policies(payload)
+    result = await run_simulation(simulate_team_batch, payload, key=matchup_key(payload.team_a, payload.team_b))
+    if result is None:
+        raise PokemonNotFound("One or more team members not found", [m.name for team in (payload.team_a, payload.team_b) for m in team.members])
+    return model_response(result)
+
+@app.get("/mcp/tools/matchups/counters/{name}", response_model=CountersResult)
+async def counters_tool(name: str, top: int = 10):
+    p = await get_normalized_pokemon_async(name)
+    if not p:
+        raise PokemonNotFound(f"Pokemon {name} not found", [name])
+    counters = await asyncio.to_thread(best_counters, normalize_name(p["name"]), top)
+    if counters is None:
+        raise HTTPException(status_code=404, detail="Matchup matrix not built yet (POST /admin/matchups/build)")
+    return CountersResult(name=p["name"], counters=counters)
+
+def start_job(kind: str, fn, *args):
+    running = jobs.running(kind)
+    if running is not None:
+        raise HTTPException(status_code=409, detail=f"{kind} job {running.id} is already running")
+    job = jobs.submit(kind, fn, *args)
+    return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status, "status_url": f"/admin/jobs/{job.id}"})
+
+async def normalize_and_reload():
+    # the ingest has blocking CSV/disk phases: run it on its own loop in a thread (normalize_all_and_write),
+    # not on the server's loop; only the worker restart below has to happen here
+    result = await asyncio.to_thread(normalize_all_and_write)
+    if result["added"] or result["updated"] or result["moves_changed"] or result["resumed"]:
+        await asyncio.to_thread(reload_index)
+        resource_cache.clear()
+        # simulation workers hold their own copy of the index
+        sim_executor.restart()
+    return result
+
+# util route to normalize whole dataset (heavy) - runs in the background, poll /admin/jobs/{job_id}
+@app.post("/admin/normalize_all", status_code=202)
+async def admin_normalize_all():
+    if SERVE_ONLY:
+        raise HTTPException(status_code=403, detail="Serve-only mode (SERVE_ONLY=1): normalization needs live PokeAPI access")
+    return start_job("normalize_all", normalize_and_reload)
+
+# util route to (re)build or resume the round-robin matchup matrix (very heavy)
+@app.post("/admin/matchups/build", status_code=202)
+async def admin_build_matchups(n_runs: int = 64, seed: int = 0, workers: Optional[int] = None):
+    return start_job("matchups_build", lambda: build_matchup_matrix(n_runs=n_runs, seed=seed, workers=workers))
+
+@app.get("/admin/jobs")
+async def admin_jobs():
+    return {"jobs": [j.as_dict() for j in jobs.list()], "simulations": sim_executor.status()}
+
+@app.get("/admin/jobs/{job_id}")
+async def admin_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.as_dict()
+
+@app.get("/metrics")
+async def metrics_route():
+    # Prometheus text exposition; gauges are sampled at scrape time
+    lookups = resource_cache.stats["hits"] + resource_cache.stats["misses"]
+    upstream = client_status()
+    gauges = {
+        "resource_cache.entries": len(resource_cache),
+        "resource_cache.hit_ratio": resource_cache.stats["hits"] / lookups if lookups else 0.0,
+        "sim.pending": sim_executor.pending,
+        "index.records": len(get_index()),
+        "jobs.running": sum(1 for j in jobs.list() if j.status == "running"),
+        "pokeapi.circuit_open": int(upstream["circuit"] != "closed"),
+        "pokeapi.negative_entries": upstream["negative_entries"],
+        "pokeapi.inflight": upstream["inflight"],
+    }
+    return Response(content=metrics.render_prometheus(gauges), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
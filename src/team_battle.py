@@ -0,0 +1,226 @@
+"""
+Team-vs-team battles (up to 6 per side) on top of the 1v1 engine.
+
+The active pair fights with battle_sim.run_battle; when one (or both) faints,
+the owning side's switch policy brings in the next member and the turn count
+carries on. HP persists, so a survivor stays in with whatever it has left.
+There is no voluntary switching.
+
+Everything fixed for the request is built once in prepare_teams: member
+templates, the move table of every (a, b) member pair and the matchup scores
+the switch policies read. Batch runs only copy the templates.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .schemas import TeamBattleRequest, TeamBattleResult, TeamBatchBattleRequest, TeamBatchBattleResult, PokemonFinalState
+from .battle_sim import make_instance, build_move_table, run_battle, render_events, status_of, not_found_line, MoveEntry, SUMMARY_EVENTS, EV_TURN
+from .batch_sim import wilson_interval, distribution
+from .data_loader import get_normalized_pokemon
+from .policies import make_policy
+from .metrics import span, inc
+from collections import Counter
+import random
+
+TEAM_SIDES = ("team_a", "team_b")
+TEAM_LABELS = ("Team A", "Team B")
+
+# policy(alive member indices, scores[own][opponent], opponent active index) -> member index to send in
+SwitchPolicy = Callable[[List[int], List[List[float]], int], int]
+
+
+def in_order(alive: List[int], scores: List[List[float]], opponent: int) -> int:
+    return alive[0]
+
+
+def best_matchup(alive: List[int], scores: List[List[float]], opponent: int) -> int:
+    # ties go to the earlier member
+    return max(alive, key=lambda i: (scores[i][opponent], -i))
+
+
+SWITCH_POLICIES: Dict[str, SwitchPolicy] = {
+    "in_order": in_order,
+    "best_matchup": best_matchup,
+}
+
+
+def register_switch_policy(name: str, policy: SwitchPolicy):
+    SWITCH_POLICIES[name] = policy
+
+
+def expected_pressure(table: List[MoveEntry], target_hp: int) -> float:
+    """Mean fraction of target's max HP taken per hit, averaged over the moveset (moves are picked at random)."""
+    if not table:
+        return 0.0
+    return sum(0.0 if e.no_damage else e.base * e.mod * 0.925 * e.accuracy for e in table) / len(table) / max(1, target_hp)
+
+
+class PreparedTeams:
+    def __init__(self, templates: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]], requests: Tuple[List[Any], List[Any]],
+                 tables: Tuple[List[List[List[MoveEntry]]], List[List[List[MoveEntry]]]],
+                 scores: Tuple[List[List[float]], List[List[float]]], policies: Tuple[SwitchPolicy, SwitchPolicy],
+                 move_policies: Optional[Dict[Tuple[int, int], Tuple[Any, Any]]] = None):
+        self.templates = templates  # per side, member instances at full HP
+        self.requests = requests    # per side, BattlePokemonInstance per member
+        self.tables = tables        # tables[side][i][j]: member i's moves vs opponent member j
+        self.scores = scores        # scores[side][i][j]: how well member i does against opponent member j
+        self.policies = policies
+        self.move_policies = move_policies  # (i, j) -> run_battle policies, None when everyone picks at random
+
+    def fresh(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # only hp changes during a battle, a shallow copy is enough
+        return [dict(t) for t in self.templates[0]], [dict(t) for t in self.templates[1]]
+
+
+def prepare_teams(request: TeamBattleRequest) -> Tuple[Optional[PreparedTeams], List[str]]:
+    """(PreparedTeams, []) or (None, names that were not found). Raises KeyError for an unknown switch policy."""
+    policies = (SWITCH_POLICIES[request.team_a.switch_policy], SWITCH_POLICIES[request.team_b.switch_policy])
+    members = (request.team_a.members, request.team_b.members)
+    missing: List[str] = []
+    templates: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]] = ([], [])
+    for side in (0, 1):
+        for m in members[side]:
+            data = get_normalized_pokemon(m.name)
+            if not data:
+                missing.append(m.name)
+                continue
+            templates[side].append(make_instance(data, m))
+    if missing:
+        return None, missing
+    A, B = templates
+    tables_a = [[build_move_table(a, b) for b in B] for a in A]
+    tables_b = [[build_move_table(b, a) for a in A] for b in B]
+    pressure_a = [[expected_pressure(tables_a[i][j], B[j]["max_hp"]) for j in range(len(B))] for i in range(len(A))]
+    pressure_b = [[expected_pressure(tables_b[j][i], A[i]["max_hp"]) for i in range(len(A))] for j in range(len(B))]
+    scores_a = [[pressure_a[i][j] - pressure_b[j][i] for j in range(len(B))] for i in range(len(A))]
+    scores_b = [[pressure_b[j][i] - pressure_a[i][j] for i in range(len(A))] for j in range(len(B))]
+    move_policies = None
+    if any(m.policy not in (None, "random") for m in (*members[0], *members[1])):
+        # one policy object per member, so search caches carry over between stretches and runs
+        opt = request.options
+        depth = getattr(opt, "search_depth", None) or 3
+        budget = getattr(opt, "time_budget_ms", None) or 50.0
+        mine = [make_policy(m.policy, m, depth, budget) for m in members[0]]
+        theirs = [make_policy(m.policy, m, depth, budget) for m in members[1]]
+        move_policies = {(i, j): (mine[i], theirs[j]) for i in range(len(A)) for j in range(len(B))}
+    return PreparedTeams(templates, (list(members[0]), list(members[1])), (tables_a, tables_b), (scores_a, scores_b), policies, move_policies), []
+
+
+def _alive(team: List[Dict[str, Any]]) -> List[int]:
+    return [i for i, m in enumerate(team) if m["hp"] > 0]
+
+
+def run_team_battle(prep: PreparedTeams, teams: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]], rnd: random.Random, max_turns: int,
+                    log: Optional[List[str]] = None, summary: bool = False) -> Tuple[int, int]:
+    """
+    Mutates the member dicts in teams and returns (turns, switches).
+    With log=None nothing is rendered; otherwise each 1v1 stretch is rendered
+    (full, or faint lines only with summary=True) plus the switch-in lines.
+    """
+    A, B = teams
+    active = [0, 0]
+    turns = switches = 0
+    while True:
+        i, j = active
+        events: Optional[List[tuple]] = [] if log is not None else None
+        tables = (prep.tables[0][i][j], prep.tables[1][j][i])
+        move_policies = prep.move_policies[i, j] if prep.move_policies is not None else None
+        played = run_battle(A[i], B[j], prep.requests[0][i], prep.requests[1][j], rnd, max_turns - turns, events, tables, move_policies)
+        if log is not None:
+            if summary:
+                events = [ev for ev in events if ev[0] in SUMMARY_EVENTS]
+            else:
+                # turn numbers continue across switches
+                events = [(EV_TURN, ev[1] + turns) if ev[0] == EV_TURN else ev for ev in events]
+            log.extend(render_events(events, (A[i], B[j]), tables))
+        turns += played
+        alive = (_alive(A), _alive(B))
+        if turns >= max_turns or not alive[0] or not alive[1]:
+            return turns, switches
+        # both sides pick against the opponent active at the time of the faint
+        nxt = list(active)
+        for side, team in ((0, A), (1, B)):
+            if team[active[side]]["hp"] <= 0:
+                nxt[side] = prep.policies[side](alive[side], prep.scores[side], active[1 - side])
+                switches += 1
+                if log is not None:
+                    log.append(f"{TEAM_LABELS[side]} sends out {team[nxt[side]]['name']}!")
+        active = nxt
+
+
+def decide_team_winner(A: List[Dict[str, Any]], B: List[Dict[str, Any]]) -> str:
+    alive_a, alive_b = len(_alive(A)), len(_alive(B))
+    if alive_a and not alive_b:
+        return "team_a"
+    if alive_b and not alive_a:
+        return "team_b"
+    if not alive_a and not alive_b:
+        return "draw"
+    # max turns reached: more members standing, then more total HP fraction left
+    if alive_a != alive_b:
+        return "team_a" if alive_a > alive_b else "team_b"
+    frac_a = sum(m["hp"] / m["max_hp"] for m in A)
+    frac_b = sum(m["hp"] / m["max_hp"] for m in B)
+    if frac_a != frac_b:
+        return "team_a" if frac_a > frac_b else "team_b"
+    return "draw"
+
+
+def simulate_team_battle(request: TeamBattleRequest) -> TeamBattleResult:
+    opt = request.options or {}
+    seed = opt.seed if opt.seed is not None else random.randint(1, 10**9)
+    rnd = random.Random(seed)
+    max_turns = opt.max_turns or 200
+    prep, missing = prepare_teams(request)
+    if prep is None:
+        return TeamBattleResult(battle_log=[not_found_line(n) for n in missing], winner=None, turns=0, switches=0, final_states={})
+
+    A, B = prep.fresh()
+    log_level = getattr(opt, "log_level", None) or "full"
+    log: Optional[List[str]] = [] if log_level != "none" else None
+    with span("sim.team_turn_loop"):
+        turns, switches = run_team_battle(prep, (A, B), rnd, max_turns, log, summary=log_level == "summary")
+    inc("sim.turns", turns)
+    winner = decide_team_winner(A, B)
+    if log_level == "summary":
+        log.append(f"Battle ended after {turns} turns: {winner}")
+    final_states = {
+        side: [PokemonFinalState(name=m["name"], hp=m["hp"], max_hp=m["max_hp"], status=status_of(m)) for m in team]
+        for side, team in zip(TEAM_SIDES, (A, B))
+    }
+    return TeamBattleResult(battle_log=log or [], winner=winner, turns=turns, switches=switches, final_states=final_states)
+
+
+def simulate_team_batch(request: TeamBatchBattleRequest) -> Optional[TeamBatchBattleResult]:
+    """Log-free team battles, run i seeded with base_seed + i. None when a member is unknown."""
+    opt = request.options
+    max_turns = (opt.max_turns if opt else None) or 200
+    base_seed = request.base_seed if request.base_seed is not None else random.randint(1, 10**9)
+    prep, missing = prepare_teams(request)
+    if prep is None:
+        return None
+
+    winners: List[str] = []
+    turns: List[int] = []
+    survivors_a: List[int] = []
+    survivors_b: List[int] = []
+    with span("sim.team_batch"):
+        for i in range(request.n_runs):
+            A, B = prep.fresh()
+            t, _ = run_team_battle(prep, (A, B), random.Random(base_seed + i), max_turns)
+            winners.append(decide_team_winner(A, B))
+            turns.append(t)
+            survivors_a.append(len(_alive(A)))
+            survivors_b.append(len(_alive(B)))
+    inc("sim.battles", request.n_runs)
+    n = len(winners)
+    c = Counter(winners)
+    return TeamBatchBattleResult(
+        team_a=[m["name"] for m in prep.templates[0]], team_b=[m["name"] for m in prep.templates[1]],
+        n_runs=n, base_seed=base_seed,
+        wins_a=c["team_a"], wins_b=c["team_b"], draws=c["draw"],
+        win_rate_a=wilson_interval(c["team_a"], n),
+        win_rate_b=wilson_interval(c["team_b"], n),
+        draw_rate=wilson_interval(c["draw"], n),
+        turns=distribution(turns),
+        survivors_a=distribution(survivors_a),
+        survivors_b=distribution(survivors_b),
+    )
@@ -1,12 +1,27 @@
 import os
 import json
+import hashlib
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 RAW_DIR = DATA_DIR / "raw"
 CACHE_DIR = DATA_DIR / "cache"
+LOCK_DIR = CACHE_DIR / "locks"
 POKEAPI_CACHE = CACHE_DIR / "pokeapi"
+POKEAPI_CACHE_DB = CACHE_DIR / "pokeapi.sqlite"
+
+# "files" (one json per endpoint), "sqlite" (single-file store, see cache_store.py)
+# or "auto": sqlite once `python -m src.cache_store migrate` has created the db
+CACHE_BACKEND = os.environ.get("POKEAPI_CACHE_BACKEND", "auto")
+# store only the fields we read (see cache_store.PROJECTIONS); set to 0 to keep raw payloads
+CACHE_PROJECT = os.environ.get("POKEAPI_CACHE_PROJECT", "1") != "0"
+# serve prebuilt data only: no live PokeAPI calls, no records built on the fly
+SERVE_ONLY = os.environ.get("SERVE_ONLY", "0") == "1"
+
+_store = None
 
 def ensure_dirs():
     RAW_DIR.mkdir(parents=True, exist_ok=True)
@@ -16,13 +31,97 @@ def cache_path_for(endpoint: str) -> Path:
     safe = endpoint.strip("/").replace("/", "__")
     return POKEAPI_CACHE / f"{safe}.json"
 
+def get_cache_store():
+    """The SqliteCacheStore behind cache_path_for paths, or None for the plain-files backend."""
+    global _store
+    if _store is None:
+        backend = CACHE_BACKEND
+        if backend == "auto":
+            backend = "sqlite" if POKEAPI_CACHE_DB.exists() else "files"
+        if backend == "sqlite":
+            from .cache_store import SqliteCacheStore
+            _store = SqliteCacheStore(POKEAPI_CACHE_DB, project=CACHE_PROJECT)
+        else:
+            _store = False
+    return _store or None
+
 def load_json_file(p: Path) -> Any:
+    if p.parent == POKEAPI_CACHE:
+        store = get_cache_store()
+        if store is not None:
+            data = store.get(p.stem)
+            if data is not None:
+                return data
+            # not migrated yet: fall back to the legacy file below
     if not p.exists():
         return None
     with open(p, "r", encoding="utf-8") as f:
         return json.load(f)
 
 def write_json_file(p: Path, data: Any):
+    if p.parent == POKEAPI_CACHE:
+        store = get_cache_store()
+        if store is not None:
+            store.put(p.stem, data)
+            return
+    _write_atomic(p, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+
+def _write_atomic(p: Path, body: bytes):
+    # temp file in the same directory + rename: readers see the old file or the new one, never half of it
     p.parent.mkdir(parents=True, exist_ok=True)
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def write_json_if_changed(p: Path, data: Any) -> bool:
+    """write_json_file for plain files, skipped when the file already holds exactly these bytes."""
+    body = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    try:
+        if p.read_bytes() == body:
+            return False
+    except FileNotFoundError:
+        pass
+    _write_atomic(p, body)
+    return True
+
+def content_hash(data: Any) -> str:
+    """Stable short hash of a JSON-able value (key order doesn't matter)."""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+def file_hash(p: Path) -> Optional[str]:
+    try:
+        return hashlib.blake2b(p.read_bytes(), digest_size=8).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def cache_entry_hash(p: Path) -> Optional[str]:
+    """Hash of a PokeAPI cache entry as stored (no JSON decoding); None when it isn't cached."""
+    store = get_cache_store()
+    if store is not None:
+        raw = store.get_raw(p.stem)
+        if raw is not None:
+            return hashlib.blake2b(raw, digest_size=8).hexdigest()
+    return file_hash(p)
+
+@contextmanager
+def file_lock(name: str) -> Iterator[None]:
+    """Exclusive flock on data/cache/locks/{name}.lock: one holder across threads and worker processes."""
+    try:
+        import fcntl
+    except ImportError:
+        # no flock (Windows): atomic writes still keep readers safe, duplicate work is possible
+        yield
+        return
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_DIR / f"{name}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,144 @@
+from typing import Dict, Any, List, Tuple, NamedTuple
+from .battle_sim import (make_instance, build_move_table, requested_move_index, chip_damage,
+                         PARALYSIS_SKIP, CRIT_CHANCE, CRIT_MULT, RAND_LOW, RAND_HIGH)
+import numpy as np
+
+MAX_MOVES = 4
+
+WINNER_CODES = ("pokemon_a", "pokemon_b", "draw")
+
+
+class VectorBatch(NamedTuple):
+    winner: np.ndarray  # int8 index into WINNER_CODES
+    turns: np.ndarray
+    hp_a: np.ndarray
+    hp_b: np.ndarray
+
+
+def _side_row(actor: Dict[str, Any], target: Dict[str, Any], request_inst: Any) -> Dict[str, Any]:
+    """Per-move damage terms for `actor` hitting `target`, burn penalty already folded in."""
+    table = build_move_table(actor, target)[:MAX_MOVES]
+    base = [0.0] * MAX_MOVES
+    mod = [0.0] * MAX_MOVES
+    acc = [1.0] * MAX_MOVES
+    zero = [True] * MAX_MOVES
+    for i, entry in enumerate(table):
+        base[i] = entry.base
+        mod[i] = entry.mod
+        acc[i] = entry.accuracy
+        zero[i] = entry.no_damage
+    fixed = requested_move_index(actor, request_inst)
+    return {
+        "hp": actor["hp"],
+        "speed": actor["stats"]["speed"] * (0.5 if actor["_paralyzed"] else 1.0),
+        "par": actor["_paralyzed"],
+        "chip": chip_damage(actor),
+        "n_moves": len(table),
+        # a requested move is used every turn, no rng draw; -1 picks at random
+        "fixed": -1 if fixed is None else fixed,
+        "base": base,
+        "mod": mod,
+        "acc": acc,
+        "zero": zero,
+    }
+
+
+def build_tables(pairs: List[Tuple[Dict[str, Any], Any, Dict[str, Any], Any]]) -> Dict[str, np.ndarray]:
+    """
+    pairs: (pokemon_a data, pokemon_a request instance, pokemon_b data, pokemon_b request instance)
+    Returns one row of arrays per pair; rows can be repeated with np.repeat for many runs.
+    """
+    rows_a, rows_b = [], []
+    for data_a, ra, data_b, rb in pairs:
+        A = make_instance(data_a, ra)
+        B = make_instance(data_b, rb)
+        rows_a.append(_side_row(A, B, ra))
+        rows_b.append(_side_row(B, A, rb))
+    t: Dict[str, np.ndarray] = {}
+    for side, rows in (("a", rows_a), ("b", rows_b)):
+        t[f"hp_{side}"] = np.array([r["hp"] for r in rows], dtype=np.int32)
+        t[f"par_{side}"] = np.array([r["par"] for r in rows], dtype=bool)
+        t[f"chip_{side}"] = np.array([r["chip"] for r in rows], dtype=np.int32)
+        t[f"n_moves_{side}"] = np.array([r["n_moves"] for r in rows], dtype=np.int64)
+        t[f"fixed_{side}"] = np.array([r["fixed"] for r in rows], dtype=np.int64)
+        t[f"base_{side}"] = np.array([r["base"] for r in rows], dtype=np.float64)
+        t[f"mod_{side}"] = np.array([r["mod"] for r in rows], dtype=np.float64)
+        t[f"acc_{side}"] = np.array([r["acc"] for r in rows], dtype=np.float64)
+        t[f"zero_{side}"] = np.array([r["zero"] for r in rows], dtype=bool)
+    # ties go to pokemon_a, same as the scalar order selection
+    t["a_first"] = np.array([ra_["speed"] >= rb_["speed"] for ra_, rb_ in zip(rows_a, rows_b)], dtype=bool)
+    return t
+
+
+def _act(t: Dict[str, np.ndarray], x: str, hp_target: np.ndarray, acting: np.ndarray, rng: np.random.Generator):
+    n = hp_target.shape[0]
+    rows = np.arange(n)
+    fixed = t[f"fixed_{x}"]
+    k = np.where(fixed >= 0, fixed, rng.integers(0, t[f"n_moves_{x}"]))
+    acting = acting & ~(t[f"par_{x}"] & (rng.random(n) < PARALYSIS_SKIP))
+    hit = acting & ~(rng.random(n) > t[f"acc_{x}"][rows, k])
+    crit = np.where(rng.random(n) < CRIT_CHANCE, CRIT_MULT, 1.0)
+    rand_factor = rng.uniform(RAND_LOW, RAND_HIGH, n)
+    dmg = np.floor(t[f"base_{x}"][rows, k] * (t[f"mod_{x}"][rows, k] * crit * rand_factor))
+    dmg = np.where(t[f"zero_{x}"][rows, k], 0, np.maximum(1, dmg)).astype(np.int32)
+    return np.where(hit, np.maximum(0, hp_target - dmg), hp_target)
+
+
+def run_lockstep(tables: Dict[str, np.ndarray], max_turns: int, rng: np.random.Generator) -> VectorBatch:
+    """
+    Advance every battle in `tables` one turn at a time with masked array ops,
+    retiring battles as they finish. Same rules as battle_sim.run_battle; the
+    rng stream differs, so results agree in distribution, not per seed.
+    """
+    n_total = tables["hp_a"].shape[0]
+    winner = np.full(n_total, 2, dtype=np.int8)
+    turns_out = np.zeros(n_total, dtype=np.int32)
+    hp_a_out = tables["hp_a"].copy()
+    hp_b_out = tables["hp_b"].copy()
+
+    t = {k: v for k, v in tables.items()}
+    hp_a = t["hp_a"].copy()
+    hp_b = t["hp_b"].copy()
+    ids = np.arange(n_total)
+    turn = 0
+    while ids.size and turn < max_turns:
+        turn += 1
+        alive = (hp_a > 0) & (hp_b > 0)
+        a_first = t["a_first"]
+        # first mover
+        new_b = _act(t, "a", hp_b, alive & a_first, rng)
+        new_a = _act(t, "b", hp_a, alive & ~a_first, rng)
+        hp_a, hp_b = new_a, new_b
+        # second mover only if both still standing
+        alive = (hp_a > 0) & (hp_b > 0)
+        new_b = _act(t, "a", hp_b, alive & ~a_first, rng)
+        new_a = _act(t, "b", hp_a, alive & a_first, rng)
+        hp_a, hp_b = new_a, new_b
+        # end of turn status chip
+        hp_a = np.maximum(0, hp_a - t["chip_a"])
+        hp_b = np.maximum(0, hp_b - t["chip_b"])
+
+        done = (hp_a <= 0) | (hp_b <= 0) | (turn >= max_turns)
+        if done.any():
+            fin = ids[done]
+            fa, fb = hp_a[done], hp_b[done]
+            turns_out[fin] = turn
+            hp_a_out[fin] = fa
+            hp_b_out[fin] = fb
+            w = np.full(fin.shape[0], 2, dtype=np.int8)
+            w[fa > fb] = 0
+            w[fb > fa] = 1
+            w[(fa <= 0) & (fb <= 0)] = 2
+            winner[fin] = w
+            keep = ~done
+            ids = ids[keep]
+            hp_a, hp_b = hp_a[keep], hp_b[keep]
+            t = {k: v[keep] for k, v in t.items()}
+    return VectorBatch(winner=winner, turns=turns_out, hp_a=hp_a_out, hp_b=hp_b_out)
+
+
+def simulate_vectorized(data_a: Dict[str, Any], ra: Any, data_b: Dict[str, Any], rb: Any, n_runs: int, max_turns: int = 200, seed: int = None) -> VectorBatch:
+    """n_runs battles of one matchup in lockstep."""
+    one = build_tables([(data_a, ra, data_b, rb)])
+    tables = {k: np.repeat(v, n_runs, axis=0) for k, v in one.items()}
+    return run_lockstep(tables, max_turns, np.random.default_rng(seed))
@@ -1,3 +1,4 @@
+import json
 import requests
 
 BASE_URL = "http://localhost:8000"
@@ -14,6 +15,156 @@ def test_pokemon_data():
     print("Status:", r.status_code)
     print("Response:", r.json())
 
+def test_pokemon_data_fuzzy():
+    print("\n🔤 Checking typo tolerance and 'did you mean'...")
+    r = requests.get(f"{BASE_URL}/mcp/resources/pokemon_data/charzard")
+    assert r.status_code == 200 and r.json()["name"] == "Charizard", r.text
+    r = requests.get(f"{BASE_URL}/mcp/resources/pokemon_data/aegislash-blade")
+    assert r.status_code == 200 and r.json()["name"] == "Aegislash Blade Form", r.text
+    r = requests.get(f"{BASE_URL}/mcp/resources/pokemon_data/dragonight")
+    print("Status:", r.status_code, r.json())
+    assert r.status_code == 404 and "Dragonite" in r.json()["did_you_mean"]["dragonight"]
+
+def test_pokemon_data_etag():
+    print("\n🏷️ Checking Pokemon Data ETag revalidation...")
+    r = requests.get(f"{BASE_URL}/mcp/resources/pokemon_data/Pikachu")
+    etag = r.headers.get("ETag")
+    assert etag, r.headers
+    r2 = requests.get(f"{BASE_URL}/mcp/resources/pokemon_data/Pikachu", headers={"If-None-Match": etag})
+    print("Status:", r2.status_code)
+    assert r2.status_code == 304 and not r2.content
+
+def test_metrics_and_profile():
+    print("\n⏱️ Checking /metrics and the X-Profile header...")
+    payload = {"pokemon_a": {"name": "pikachu"}, "pokemon_b": {"name": "charmander"}, "options": {"seed": 1}}
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate", json=payload, headers={"X-Profile": "1"})
+    print("Server-Timing:", r.headers.get("Server-Timing"))
+    assert "sim_turn_loop" in r.headers["Server-Timing"], r.headers
+    assert "sim.turn_loop" in json.loads(r.headers["X-Profile-Breakdown"])
+    m = requests.get(f"{BASE_URL}/metrics")
+    assert m.status_code == 200 and 'pokemon_mcp_http_requests_total{route="/mcp/tools/battle/simulate"' in m.text
+
+def test_pokemon_data_bulk():
+    print("\n📦 Checking bulk Pokemon Data (gen 1, stats+types)...")
+    payload = {"generation": 1, "fields": ["stats", "types"], "limit": 5}
+    r = requests.post(f"{BASE_URL}/mcp/resources/pokemon_data/bulk", json=payload)
+    print("Status:", r.status_code)
+    items = [json.loads(line) for line in r.text.splitlines()]
+    assert len(items) == 5 and all(set(i) == {"name", "types", "stats"} for i in items), items
+    nxt = requests.post(f"{BASE_URL}/mcp/resources/pokemon_data/bulk", json={**payload, "cursor": r.headers["X-Next-Cursor"]})
+    assert json.loads(nxt.text.splitlines()[0])["name"] not in {i["name"] for i in items}
+    print("First page:", [i["name"] for i in items])
+    fast = requests.post(f"{BASE_URL}/mcp/resources/pokemon_data/bulk",
+                         json={"min_stats": {"speed": 100}, "resists": ["fire"], "fields": ["stats", "types"], "format": "json"}).json()
+    assert fast["items"] and all(i["stats"]["speed"] >= 100 for i in fast["items"]), fast
+    print("speed >= 100 resisting fire:", [i["name"] for i in fast["items"]][:10])
+
+def test_pokeapi_client_resilience():
+    print("\n🛡️ Checking PokeAPI client negative cache, single flight and circuit breaker (in-process, mock upstream)...")
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from src import pokeapi_client as client
+    from src.mock_pokeapi import make_server
+
+    def serve(**kw):
+        srv = make_server(latency=0.2, **kw)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv, f"http://127.0.0.1:{srv.server_address[1]}/api/v2"
+
+    healthy, healthy_url = serve()
+    failing, failing_url = serve(fail_rate=1.0)
+    saved = (client.BASE, client.NEGATIVE_TTL, client.breaker)
+    tag = f"smoke-{time.time_ns()}"
+    try:
+        client.BASE, client.NEGATIVE_TTL = healthy_url, 1.0
+        client.breaker = client.CircuitBreaker(failures=3, cooldown=0.5)
+        # concurrent misses on one endpoint: one upstream call, the 404 is then remembered
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(client.fetch_and_cache, [f"pokemon/{tag}"] * 8)) == [None] * 8
+        assert healthy.counts["requests"] == 1, healthy.counts
+        assert client.fetch_and_cache(f"pokemon/{tag}") is None and healthy.counts["requests"] == 1
+        time.sleep(1.1)
+        client.fetch_and_cache(f"pokemon/{tag}")
+        assert healthy.counts["requests"] == 2, "404 not asked again after NEGATIVE_TTL"
+
+        # 3 failures open the circuit, then fetches fail fast without going upstream
+        client.BASE = failing_url
+        for i in range(3):
+            client.fetch_and_cache(f"pokemon/{tag}-{i}")
+        assert client.breaker.state == "open" and failing.counts["requests"] == 3, client.client_status()
+        t = time.perf_counter()
+        assert client.fetch_and_cache(f"pokemon/{tag}-x") is None
+        assert failing.counts["requests"] == 3 and time.perf_counter() - t < 0.1
+        # after the cooldown one trial request goes through; an answer closes the circuit
+        time.sleep(0.6)
+        assert client.breaker.state == "half_open"
+        client.BASE = healthy_url
+        client.fetch_and_cache(f"pokemon/{tag}-y")
+        assert healthy.counts["requests"] == 3 and client.breaker.state == "closed", client.client_status()
+        print("Client status:", client.client_status())
+    finally:
+        client.BASE, client.NEGATIVE_TTL, client.breaker = saved
+        client.forget_failures()
+        healthy.shutdown()
+        failing.shutdown()
+
+def test_incremental_normalize():
+    print("\n♻️ Checking incremental normalization (temp data dir, mock upstream)...")
+    import os
+    import shutil
+    import subprocess
+    import sys
+    import tempfile
+    import threading
+    from pathlib import Path
+    from src.mock_pokeapi import make_server
+
+    here = Path(__file__).resolve().parent
+    tmp = Path(tempfile.mkdtemp())
+    srv = make_server(root=here / "data" / "cache" / "pokeapi")
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        # a copy of the code (data paths are relative to it) with a 3-row CSV and an empty PokeAPI cache
+        shutil.copytree(here / "src", tmp / "src", ignore=shutil.ignore_patterns("__pycache__"))
+        (tmp / "data" / "raw").mkdir(parents=True)
+        with open(here / "data" / "raw" / "All_Pokemon.csv", encoding="utf-8") as f:
+            rows = [next(f) for _ in range(4)]
+        (tmp / "data" / "raw" / "All_Pokemon.csv").write_text("".join(rows), encoding="utf-8")
+        env = {**os.environ, "PYTHONPATH": str(tmp), "POKEAPI_CACHE_BACKEND": "files"}
+        cmd = [sys.executable, "-W", "ignore", "-m", "src.async_ingest", "--rate", "500",
+               "--base-url", f"http://127.0.0.1:{srv.server_address[1]}/api/v2"]
+
+        def run():
+            out = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True, timeout=120)
+            assert out.returncode == 0, out.stderr
+            return json.loads(out.stdout)
+
+        def mtimes():
+            return {p.stem: p.stat().st_mtime_ns for p in (tmp / "data" / "normalized").glob("*.json")}
+
+        first = run()
+        assert first["reenriched"] == 3 and len(first["added"]) == 3 and srv.counts["requests"] > 0, first
+        before, fetched = mtimes(), srv.counts["requests"]
+        # nothing changed: no row re-enriched, no request, no file rewritten
+        second = run()
+        assert second["reenriched"] == 0 and second["added"] == second["updated"] == [] and second["unchanged"] == 3, second
+        assert srv.counts["requests"] == fetched and mtimes() == before
+        # one upstream entry changes (first two moves swapped): only its record is re-enriched and rewritten
+        key = first["added"][0]
+        entry = tmp / "data" / "cache" / "pokeapi" / f"pokemon__{key}.json"
+        payload = json.loads(entry.read_text(encoding="utf-8"))
+        payload["moves"][:2] = payload["moves"][1::-1]
+        entry.write_text(json.dumps(payload), encoding="utf-8")
+        third = run()
+        assert third["reasons"] == {key: ["inputs"]} and third["updated"] == [key] and third["unchanged"] == 2, third
+        after = mtimes()
+        assert [k for k in after if after[k] != before[k]] == [key], (before, after)
+        print("First run added:", first["added"], "then re-enriched:", list(third["reasons"]))
+    finally:
+        srv.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
 def test_battle_sim():
     print("\n⚔️ Checking Battle Simulation...")
     payload = {
@@ -38,8 +189,182 @@ def test_battle_sim():
     r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate", json=payload)
     print("Status:", r.status_code)
     print("Response:", r.json())
+    # seed 0 is a seed like any other (batch run 0 with base_seed 0 uses it)
+    seeded = {"pokemon_a": {"name": "Pikachu"}, "pokemon_b": {"name": "Charizard"}, "options": {"seed": 0}}
+    runs = [requests.post(f"{BASE_URL}/mcp/tools/battle/simulate", json=seeded).json() for _ in range(2)]
+    assert runs[0] == runs[1], runs
+
+def test_battle_batch():
+    print("\n🎲 Checking Batch Battle Simulation...")
+    payload = {
+        "pokemon_a": {"name": "Bulbasaur"},
+        "pokemon_b": {"name": "Squirtle"},
+        "options": {"max_turns": 50},
+        "n_runs": 500,
+        "base_seed": 42
+    }
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_batch", json=payload)
+    print("Status:", r.status_code)
+    print("Response:", r.json())
+
+def _sse_events(r):
+    events = []
+    for block in r.text.strip().split("\n\n"):
+        kind, data = block.split("\n")
+        events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_battle_streams():
+    print("\n📡 Checking streamed battle and batch (SSE) against the plain tools...")
+    payload = {"pokemon_a": {"name": "pikachu"}, "pokemon_b": {"name": "bulbasaur"}, "options": {"seed": 11}}
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_stream", json=payload)
+    assert r.headers["Content-Type"].startswith("text/event-stream"), r.headers
+    events = _sse_events(r)
+    plain = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate", json=payload).json()
+    assert events[0][0] == "start" and events[-1][0] == "result"
+    assert [line for kind, ev in events if kind == "turn" for line in ev["log"]] == plain["battle_log"]
+    assert events[-1][1]["winner"] == plain["winner"] and events[-1][1]["turns"] == plain["turns"]
+
+    batch = {"pokemon_a": {"name": "pikachu"}, "pokemon_b": {"name": "bulbasaur"}, "n_runs": 300, "base_seed": 5}
+    events = _sse_events(requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_batch_stream", json=batch))
+    runs = [ev for kind, ev in events if kind == "run"]
+    result = events[-1][1]
+    print("Runs streamed:", len(runs), "win rate A:", result["win_rate_a"])
+    assert len(runs) == 300 and result["wins_a"] == sum(ev["winner"] == "pokemon_a" for ev in runs)
+    assert result == requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_batch", json=batch).json()
+
+def test_stream_admission():
+    print("\n🚦 Checking streams go through the simulation queue (in-process)...")
+    import asyncio
+    import httpx
+    from src import server
+
+    async def post(path, body):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as c:
+            return await c.post(path, json=body)
+
+    batch = {"pokemon_a": {"name": "pikachu"}, "pokemon_b": {"name": "bulbasaur"}, "n_runs": 3000, "base_seed": 5}
+    battle = {"pokemon_a": {"name": "pikachu"}, "pokemon_b": {"name": "bulbasaur"}, "options": {"seed": 11}}
+    executor = server.sim_executor
+    executor.pending = executor.max_queue
+    try:
+        for path, body in (("/mcp/tools/battle/simulate_batch_stream", batch), ("/mcp/tools/battle/simulate_stream", battle)):
+            r = asyncio.run(post(path, body))
+            assert r.status_code == 503 and r.headers["Retry-After"] == "1", (path, r.status_code)
+    finally:
+        executor.pending = 0
+    r = asyncio.run(post("/mcp/tools/battle/simulate_batch_stream", batch))
+    runs = [ev for kind, ev in _sse_events(r) if kind == "run"]
+    assert [ev["run"] for ev in runs] == list(range(3000)) and executor.pending == 0
+    print("Full queue: 503; streamed runs:", len(runs))
+
+def test_battle_checkpoint():
+    print("\n💾 Checking checkpoint / resume replay and forks...")
+    payload = {"pokemon_a": {"name": "Snorlax"}, "pokemon_b": {"name": "Machamp"}, "options": {"seed": 3}}
+    plain = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate", json=payload).json()
+    cp = requests.post(f"{BASE_URL}/mcp/tools/battle/checkpoint", json={**payload, "turns": 1}).json()
+    assert cp["turn"] == 1 and cp["seed"] == 3, cp
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/resume", json={**payload, "state": cp["state"]})
+    assert r.status_code == 200, r.text
+    resumed = r.json()
+    assert cp["battle_log"] + resumed["battle_log"] == plain["battle_log"]
+    assert (resumed["winner"], resumed["turns"], resumed["final_states"]) == (plain["winner"], plain["turns"], plain["final_states"])
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/fork", json={**payload, "state": cp["state"], "n_runs": 200, "base_seed": 1})
+    forks = r.json()
+    assert forks["wins_a"] + forks["wins_b"] + forks["draws"] == 200, forks
+    print("State size:", len(cp["state"]), "fork win rate A:", forks["win_rate_a"])
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/resume", json={**payload, "pokemon_b": {"name": "Pikachu"}, "state": cp["state"]})
+    assert r.status_code == 422, r.text
+
+def test_expectiminimax_history_independent():
+    print("\n🧠 Checking expectiminimax picks depend only on the battle state...")
+    # resume starts a fresh policy; the uninterrupted battle's policy has searched every earlier turn
+    payload = {"pokemon_a": {"name": "Shuckle", "policy": "expectiminimax"}, "pokemon_b": {"name": "Shuckle", "policy": "expectiminimax"},
+               "options": {"seed": 2, "search_depth": 2, "time_budget_ms": 2000}}
+    plain = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate", json=payload).json()
+    assert plain["turns"] > 10, plain["turns"]
+    for k in (1, 5, 10):
+        cp = requests.post(f"{BASE_URL}/mcp/tools/battle/checkpoint", json={**payload, "turns": k}).json()
+        resumed = requests.post(f"{BASE_URL}/mcp/tools/battle/resume", json={**payload, "state": cp["state"]}).json()
+        assert cp["battle_log"] + resumed["battle_log"] == plain["battle_log"], k
+    print("Turns:", plain["turns"], "winner:", plain["winner"])
+
+def test_exact_solver_matches_batch():
+    print("\n🎯 Checking exact solver against a seeded batch...")
+    pair = {"pokemon_a": {"name": "Snorlax", "status": "burn"}, "pokemon_b": {"name": "Machamp"}}
+    exact = requests.post(f"{BASE_URL}/mcp/tools/battle/solve", json=pair).json()
+    n = 20000
+    batch = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_batch", json={**pair, "n_runs": n, "base_seed": 1, "engine": "vector"}).json()
+    for key, rate in (("win_prob_a", "win_rate_a"), ("draw_prob", "draw_rate")):
+        p = exact[key]
+        se = max((p * (1 - p) / n) ** 0.5, 1.0 / n)
+        assert abs(p - batch[rate]["rate"]) < 4 * se, (key, p, batch[rate])
+    print("Exact:", exact)
+
+def test_team_battle():
+    print("\n👥 Checking Team Battle (3v3)...")
+    payload = {
+        "team_a": {"members": [{"name": "Pikachu"}, {"name": "Charizard"}, {"name": "Blastoise"}]},
+        "team_b": {"members": [{"name": "Gengar"}, {"name": "Snorlax"}, {"name": "Dragonite"}], "switch_policy": "best_matchup"},
+        "options": {"seed": 7, "log_level": "summary"}
+    }
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_team", json=payload)
+    print("Status:", r.status_code)
+    print("Response:", r.json())
+    r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_team_batch", json={**payload, "n_runs": 200, "base_seed": 1})
+    body = r.json()
+    assert body["wins_a"] + body["wins_b"] + body["draws"] == 200, body
+    print("Team A win rate:", body["win_rate_a"])
+
+def _tv_distance(h1, h2, n1, n2):
+    keys = set(h1) | set(h2)
+    return 0.5 * sum(abs(h1.get(k, 0) / n1 - h2.get(k, 0) / n2) for k in keys)
+
+def test_vector_engine_matches_scalar():
+    print("\n📐 Checking vector engine against scalar engine (distributions)...")
+    matchups = [
+        ({"name": "Bulbasaur"}, {"name": "Squirtle"}),
+        ({"name": "Pikachu", "moves": ["Thunder"]}, {"name": "Charizard"}),
+        ({"name": "Staravia", "status": "poison"}, {"name": "Servine"}),
+        ({"name": "Virizion", "status": "paralysis"}, {"name": "Sharpedo"}),
+        ({"name": "Sigilyph", "status": "burn"}, {"name": "Tirtouga"}),
+    ]
+    n = 4000
+    for a, b in matchups:
+        res = {}
+        for engine in ("scalar", "vector"):
+            payload = {"pokemon_a": a, "pokemon_b": b, "options": {"max_turns": 60},
+                       "n_runs": n, "base_seed": 1234, "engine": engine}
+            r = requests.post(f"{BASE_URL}/mcp/tools/battle/simulate_batch", json=payload)
+            assert r.status_code == 200, r.text
+            res[engine] = r.json()
+        s, v = res["scalar"], res["vector"]
+        # win rates within a few standard errors of each other
+        for key in ("win_rate_a", "win_rate_b", "draw_rate"):
+            p1, p2 = s[key]["rate"], v[key]["rate"]
+            se = max(((p1 * (1 - p1) + p2 * (1 - p2)) / n) ** 0.5, 1.0 / n)
+            assert abs(p1 - p2) < 4 * se + 1e-9, (a, b, key, p1, p2)
+        # turn-count and remaining-HP distributions close in total variation
+        for key in ("turns", "remaining_hp_a", "remaining_hp_b"):
+            tv = _tv_distance(s[key]["histogram"], v[key]["histogram"], n, n)
+            assert tv < 0.06, (a, b, key, tv)
+        print(a["name"], "vs", b["name"], "scalar", s["win_rate_a"]["rate"], "vector", v["win_rate_a"]["rate"])
 
 if __name__ == "__main__":
     test_discovery()
     test_pokemon_data()
+    test_pokemon_data_fuzzy()
+    test_pokemon_data_etag()
+    test_pokemon_data_bulk()
+    test_metrics_and_profile()
+    test_pokeapi_client_resilience()
+    test_incremental_normalize()
     test_battle_sim()
+    test_battle_batch()
+    test_battle_streams()
+    test_stream_admission()
+    test_battle_checkpoint()
+    test_expectiminimax_history_independent()
+    test_exact_solver_matches_batch()
+    test_team_battle()
+    test_vector_engine_matches_scalar()